@@ -7,6 +7,9 @@ from EXCEPTIONS.custom_exceptions import ApplicationStartError
 from INFRASTRUCTURE.binaryfile_repositories import BinaryFileActivityRepository, BinaryFilePersonRepository
 from INFRASTRUCTURE.inmemory_repositories import PersonRepository, ActivityRepository
 from INFRASTRUCTURE.json_repositories import JsonFilePersonRepository, JsonFileActivityRepository
+from INFRASTRUCTURE.jsonlines_repositories import JsonLinesPersonRepository, JsonLinesActivityRepository
+from INFRASTRUCTURE.recordfile_repositories import RecordFilePersonRepository, RecordFileActivityRepository
+from INFRASTRUCTURE.sqlite_repositories import SqlitePersonRepository, SqliteActivityRepository
 from INFRASTRUCTURE.stacks import UndoStack, RedoStack
 from INFRASTRUCTURE.textfile_repositories import TextFilePersonRepository, TextFileActivityRepository
 from PRESENTATION.UI import UI
@@ -31,17 +34,25 @@ class ApplicationCoordinator:
         activity_validator = Validator()
         undo_stack = UndoStack()
         redo_stack = RedoStack()
+        batch_size = self.__application_setter.group_commit_batch_size
+        time_window = self.__application_setter.group_commit_time_window
+        conflict_mode = self.__application_setter.conflict_mode
 
         if self.__application_setter.repository_type == "inmemory":
             person_repository = PersonRepository()
-            activity_repository = ActivityRepository()
+            activity_repository = ActivityRepository(conflict_mode)
             person_repository.populate_repository()
             activity_repository.populate_repository()
         elif self.__application_setter.repository_type == "textfile":
             persons_text_file_name = self.__application_setter.persons_file
             activities_text_file_name = self.__application_setter.activities_file
-            person_repository = TextFilePersonRepository(persons_text_file_name)
-            activity_repository = TextFileActivityRepository(activities_text_file_name)
+            journal_mode = self.__application_setter.journal_mode
+            compaction_threshold = self.__application_setter.journal_compaction_threshold
+            person_repository = TextFilePersonRepository(persons_text_file_name, journal_mode, compaction_threshold,
+                                                         batch_size, time_window)
+            activity_repository = TextFileActivityRepository(activities_text_file_name, journal_mode,
+                                                             compaction_threshold, batch_size, time_window,
+                                                             conflict_mode)
         elif self.__application_setter.repository_type == "binaryfile":
             persons_binary_file_name = self.__application_setter.persons_file
             activities_binary_file_name = self.__application_setter.activities_file
@@ -67,8 +78,9 @@ class ApplicationCoordinator:
             with open(activities_binary_file_name, mode="wb") as activities_binary_file:
                 pickle.dump(activities, activities_binary_file)
 
-            person_repository = BinaryFilePersonRepository(persons_binary_file_name)
-            activity_repository = BinaryFileActivityRepository(activities_binary_file_name)
+            person_repository = BinaryFilePersonRepository(persons_binary_file_name, batch_size, time_window)
+            activity_repository = BinaryFileActivityRepository(activities_binary_file_name, batch_size, time_window,
+                                                               conflict_mode)
         elif self.__application_setter.repository_type == "jsonfile":
             persons_json_file_name = self.__application_setter.persons_file
             activities_json_file_name = self.__application_setter.activities_file
@@ -143,8 +155,26 @@ class ApplicationCoordinator:
                 pretty_printed_activities_dictionary = json.dumps(activities_list_as_dictionary, indent=4)
                 activities_json_file.write(pretty_printed_activities_dictionary)
 
-            person_repository = JsonFilePersonRepository(persons_json_file_name)
-            activity_repository = JsonFileActivityRepository(activities_json_file_name)
+            person_repository = JsonFilePersonRepository(persons_json_file_name, batch_size, time_window)
+            activity_repository = JsonFileActivityRepository(activities_json_file_name, batch_size, time_window,
+                                                             conflict_mode)
+        elif self.__application_setter.repository_type == "jsonlines":
+            persons_json_lines_file_name = self.__application_setter.persons_file
+            activities_json_lines_file_name = self.__application_setter.activities_file
+            person_repository = JsonLinesPersonRepository(persons_json_lines_file_name)
+            activity_repository = JsonLinesActivityRepository(activities_json_lines_file_name,
+                                                              conflict_mode=conflict_mode)
+        elif self.__application_setter.repository_type == "sqlite":
+            persons_database_name = self.__application_setter.persons_file
+            activities_database_name = self.__application_setter.activities_file
+            person_repository = SqlitePersonRepository(persons_database_name)
+            activity_repository = SqliteActivityRepository(activities_database_name, conflict_mode)
+        elif self.__application_setter.repository_type == "recordfile":
+            persons_record_file_name = self.__application_setter.persons_file
+            activities_record_file_name = self.__application_setter.activities_file
+            person_repository = RecordFilePersonRepository(persons_record_file_name)
+            activity_repository = RecordFileActivityRepository(activities_record_file_name,
+                                                               conflict_mode=conflict_mode)
         else:
             raise ApplicationStartError("The settings are invalid!\n")
 
@@ -153,7 +183,13 @@ class ApplicationCoordinator:
                                            redo_stack)
         undo_service = UndoService(person_repository, activity_repository, undo_stack, redo_stack)
         redo_service = RedoService(person_repository, activity_repository, undo_stack, redo_stack)
-        statistics_service = StatisticsService(activity_repository)
+        statistics_service = StatisticsService(activity_repository, self.__application_setter.working_hours,
+                                               self.__application_setter.numpy_analytics)
 
         console = UI(person_service, activity_service, statistics_service, undo_service, redo_service)
-        console.run()
+        try:
+            console.run()
+        finally:
+            # the changes still pending in a batch are written when the application stops
+            person_repository.flush()
+            activity_repository.flush()
@@ -1,3 +1,12 @@
+import math
+
+from BUSINESS.services import DEFAULT_WORKING_HOURS
+from EXCEPTIONS.custom_exceptions import ApplicationStartError
+from INFRASTRUCTURE.group_commit import DEFAULT_BATCH_SIZE
+from INFRASTRUCTURE.inmemory_repositories import PLANNER_CONFLICTS, CONFLICT_MODES
+from INFRASTRUCTURE.textfile_repositories import DEFAULT_COMPACTION_THRESHOLD
+
+
 class Settings:
     """
     Class used to instantiate application setters, i.e. objects used to translate the data from the configuration file
@@ -27,6 +36,117 @@ class Settings:
         """ Property used to access the input file for the activities """
         return self.__settings_dictionary["activities"]
 
+    @property
+    def journal_mode(self):
+        """
+        Property used to access whether the text file repositories append their changes to a journal.
+        The setting is optional: "journal = on" enables the journal mode, which is disabled by default.
+        Raises ApplicationStartError if the setting is neither "on" nor "off".
+        """
+        journal_mode = self.__get_optional_setting("journal", "off")
+        if journal_mode not in ("on", "off"):
+            raise ApplicationStartError("The journal must be either on or off!\n")
+        return journal_mode == "on"
+
+    @property
+    def journal_compaction_threshold(self):
+        """
+        Property used to access the size (in bytes) a journal can reach before being compacted.
+        The setting is optional: e.g. "journal_threshold = 1048576".
+        Raises ApplicationStartError if the setting is not a positive integer.
+        """
+        return self.__get_positive_setting("journal_threshold", DEFAULT_COMPACTION_THRESHOLD, int)
+
+    @property
+    def group_commit_batch_size(self):
+        """
+        Property used to access the number of changes after which a file repository rewrites its file.
+        The setting is optional: e.g. "batch_size = 100". By default, the file is rewritten after every change.
+        Raises ApplicationStartError if the setting is not a positive integer.
+        """
+        return self.__get_positive_setting("batch_size", DEFAULT_BATCH_SIZE, int)
+
+    @property
+    def group_commit_time_window(self):
+        """
+        Property used to access the number of seconds after which the pending changes of a file repository are written.
+        The setting is optional: e.g. "batch_window = 2.5". By default, there is no time window.
+        Raises ApplicationStartError if the setting is not a positive number.
+        """
+        return self.__get_positive_setting("batch_window", None, float)
+
+    @property
+    def working_hours(self):
+        """
+        Property used to access the hours of a day in which the free time is computed, as a tuple (first hour, last
+            hour + 1).
+        The setting is optional: e.g. "working_hours = 9-17" means from 9:00 to 17:00. By default, it is 8-20.
+        Raises ApplicationStartError if the setting is not of the form "first hour-last hour", with
+            0 <= first hour < last hour <= 24.
+        """
+        working_hours = self.__get_optional_setting("working_hours", None)
+        if working_hours is None:
+            return DEFAULT_WORKING_HOURS
+        try:
+            first_working_hour, end_of_working_hours = (int(hour) for hour in working_hours.split("-"))
+        except ValueError:
+            raise ApplicationStartError("The working hours must be given as first hour-last hour (e.g. 8-20)!\n")
+        if not (0 <= first_working_hour < end_of_working_hours <= 24):
+            raise ApplicationStartError("The working hours must be in [0, 24]!\n")
+        return first_working_hour, end_of_working_hours
+
+    @property
+    def numpy_analytics(self):
+        """
+        Property used to access whether the statistics over all the activities are computed by the columnar analytics
+            engine (which needs NumPy).
+        The setting is optional: "analytics = numpy" enables the engine; by default, they are computed in pure Python.
+        """
+        return self.__get_optional_setting("analytics", "python") == "numpy"
+
+    @property
+    def conflict_mode(self):
+        """
+        Property used to access which activities cannot take place at the same time.
+        The setting is optional: "conflicts = participant" only rejects the activities that would book a person twice at
+            the same hour; by default ("conflicts = planner"), no two activities can take place at the same time.
+        Raises ApplicationStartError if the setting is neither "planner" nor "participant".
+        """
+        conflict_mode = self.__get_optional_setting("conflicts", PLANNER_CONFLICTS)
+        if conflict_mode not in CONFLICT_MODES:
+            raise ApplicationStartError("The conflicts must be one of: " + ", ".join(CONFLICT_MODES) + "!\n")
+        return conflict_mode
+
+    def __get_optional_setting(self, application_property, default_value):
+        """
+        Gets the value of a setting that does not have to be present in the configuration file.
+        :param application_property: the name of the setting
+        :param default_value: the value returned if the setting is missing
+        :return: the value of the setting, or the default value
+        """
+        return self.__settings_dictionary.get(application_property, default_value)
+
+    def __get_positive_setting(self, application_property, default_value, number_type):
+        """
+        Gets the value of an optional setting which must be a positive (finite) number.
+        Raises ApplicationStartError if the setting is not a positive number of the given type.
+        :param application_property: the name of the setting
+        :param default_value: the value returned if the setting is missing
+        :param number_type: the type of the number (int or float)
+        :return: the value of the setting converted to the given type, or the default value
+        """
+        value = self.__get_optional_setting(application_property, None)
+        if value is None:
+            return default_value
+        number_description = "integer" if number_type is int else "number"
+        try:
+            number = number_type(value)
+        except ValueError:
+            raise ApplicationStartError(f"The {application_property} must be a positive {number_description}!\n")
+        if math.isfinite(number) is False or number <= 0:
+            raise ApplicationStartError(f"The {application_property} must be a positive {number_description}!\n")
+        return number
+
     def __read_settings_from_file(self):
         """
         Reads the configuration of the application and creates a dictionary containing all the needed information.
@@ -1,8 +1,18 @@
 import copy
-from datetime import date
+import heapq
+import itertools
+from datetime import date, timedelta
 
 from DOMAIN.entities import Person, Activity, Operation
 from EXCEPTIONS.custom_exceptions import PersonServiceError, ActivityServiceError, ActivityValidatorError
+from INFRASTRUCTURE.columnar_index import is_numpy_available
+from INFRASTRUCTURE.indexes import DEFAULT_MAXIMUM_EDIT_DISTANCE, HOURS_PER_DAY
+from INFRASTRUCTURE.inmemory_repositories import PLANNER_CONFLICTS
+from UTILITY.cache import LRUCache, DEFAULT_CACHE_SIZE
+from UTILITY.utils import Utility
+
+DEFAULT_WORKING_HOURS = (8, 20)
+WHOLE_DAY = (0, HOURS_PER_DAY)
 
 
 class UndoService:
@@ -186,23 +196,112 @@ class StatisticsService:
     Class used to instantiate statistics services, i.e. the objects that are responsible to create some statistics.
     """
 
-    def __init__(self, activity_repository):
+    def __init__(self, activity_repository, working_hours=DEFAULT_WORKING_HOURS, use_numpy_analytics=False,
+                 cache_size=DEFAULT_CACHE_SIZE):
         """
         The constructor for a new object of type StatisticsService.
         A statistics service must have permission to access the activities,
         that is why there is a dependency relationship between the statistics service and the activity repository.
         :param activity_repository: the collection of uniquely identifiable activities
+        :param working_hours: tuple (first hour, last hour + 1); the hours of a day in which the free time is computed
+            e.g. (8, 20) means from 8:00 to 20:00
+        :param use_numpy_analytics: True if the statistics over all the activities should be computed by the columnar
+            analytics engine, on the columnar index of the repository; ignored if NumPy is not installed
+        :param cache_size: the maximum number of statistics kept in the cache of the service
         """
         self.__activity_repository = activity_repository
+        self.__working_hours = working_hours
+        self.__use_numpy_analytics = use_numpy_analytics and is_numpy_available()
+        self.__cache = LRUCache(cache_size)
+
+    def __get_cached_statistic(self, statistic_name, compute_statistic):
+        """
+        Gets a statistic over all the activities from the cache, computing it if the activities changed since it was
+            last computed.
+        :param statistic_name: the name of the statistic
+        :param compute_statistic: the function (without parameters) that computes the statistic
+        :return: a copy of the statistic (so the cached statistic is never changed by the caller)
+        """
+        cache_key = (statistic_name, self.__activity_repository.get_generation())
+        return copy.copy(self.__cache.get_or_compute(cache_key, compute_statistic))
+
+    def __get_columnar_index(self):
+        """
+        Gets the columnar index of the activities used by the analytics engine, which the repository keeps up to date
+            on every change (so it is never rebuilt by the statistics service).
+        :return: the columnar index of the activities
+        """
+        return self.__activity_repository.get_columnar_index()
+
+    def count_activities_by_hour(self):
+        """
+        Counts all the activities (past and upcoming) starting at each hour of the day.
+        :return: a list of 24 integers, the i-th one being the number of activities starting at hour i
+        """
+        if self.__use_numpy_analytics:
+            return self.__get_cached_statistic("hours", lambda: self.__get_columnar_index().count_by_hour())
+        return self.__get_cached_statistic("hours", self.__compute_activities_by_hour)
+
+    def __compute_activities_by_hour(self):
+        """
+        Counts the activities starting at each hour of the day in pure Python (see count_activities_by_hour).
+        :return: a list of 24 integers
+        """
+        counts = [0] * HOURS_PER_DAY
+        for activity in self.__activity_repository.get_all_activities_list():
+            counts[activity.time] += 1
+        return counts
+
+    def count_activities_by_participant(self):
+        """
+        Counts all the activities (past and upcoming) of each participant.
+        :return: a dictionary from the IDs of the participants to their numbers of activities, sorted by ID
+        """
+        if self.__use_numpy_analytics:
+            return self.__get_cached_statistic("participants",
+                                               lambda: self.__get_columnar_index().count_by_participant())
+        return self.__get_cached_statistic("participants", self.__compute_activities_by_participant)
+
+    def __compute_activities_by_participant(self):
+        """
+        Counts the activities of each participant in pure Python (see count_activities_by_participant).
+        :return: a dictionary from the IDs of the participants to their numbers of activities, sorted by ID
+        """
+        counts = {}
+        for activity in self.__activity_repository.get_all_activities_list():
+            for participant_id in activity.participants_ids:
+                counts[participant_id] = counts.get(participant_id, 0) + 1
+        return dict(sorted(counts.items()))
+
+    def count_activities_by_month(self):
+        """
+        Counts all the activities (past and upcoming) of each month.
+        :return: a dictionary from (year, month) tuples to the numbers of activities, sorted chronologically
+        """
+        if self.__use_numpy_analytics:
+            return self.__get_cached_statistic("months", lambda: self.__get_columnar_index().count_by_month())
+        return self.__get_cached_statistic("months", self.__compute_activities_by_month)
+
+    def __compute_activities_by_month(self):
+        """
+        Counts the activities of each month in pure Python (see count_activities_by_month).
+        :return: a dictionary from (year, month) tuples to the numbers of activities, sorted chronologically
+        """
+        counts = {}
+        for activity in self.__activity_repository.get_all_activities_list():
+            counts[(activity.year, activity.month)] = counts.get((activity.year, activity.month), 0) + 1
+        return dict(sorted(counts.items()))
 
     @staticmethod
-    def check_upcoming_activity(activity):
+    def check_upcoming_activity(activity, current_date=None):
         """
         Checks whether a given activity is upcoming or it passed.
         :param activity: the activity to be checked
+        :param current_date: the current date (datetime.date), or None to use today's date
         :return: True if the activity is upcoming, False otherwise
         """
-        current_date = date.today()
+        if current_date is None:
+            current_date = date.today()
         current_day = current_date.day
         current_month = current_date.month
         current_year = current_date.year
@@ -210,7 +309,7 @@ class StatisticsService:
         return activity.year > current_year or (activity.year == current_year and activity.month > current_month) or (
                 activity.year == current_year and activity.month == current_month and activity.day >= current_day)
 
-    def find_busiest_days(self):
+    def find_busiest_days(self, limit=None, start_date=None, end_date=None):
         """
         Creates a dictionary whose keys are some tuples, representing a calendar date, and whose values are the
         corresponding number of activities for each day.
@@ -221,23 +320,148 @@ class StatisticsService:
             upcoming_date[0][2] = the year of the activities
             upcoming_date[0][1] = the month of the activities
             upcoming_date[0][0] = the day of the activities
+        The statistic is cached until the activities change or the current date changes.
+        Raises ActivityServiceError if the limit is negative.
+        :param limit: the maximum number of days, or None for all the days
+        :param start_date: dictionary; the first calendar date (included), or None to start from today
+        :param end_date: dictionary; the last calendar date (included), or None to include all the upcoming days
         :return: the dictionary sorted in ascending order by the number of activities in each day
         """
-        activities_list = self.__activity_repository.get_all_activities_list()
-        upcoming_activities = [activity for activity in activities_list if self.check_upcoming_activity(activity)]
+        start_date, end_date = self.__get_date_window(start_date, end_date, limit)
+        cache_key = ("busiest days", limit, self.__get_window_key(start_date, end_date),
+                     self.__activity_repository.get_generation())
+        return dict(self.__cache.get_or_compute(cache_key, lambda: self.__compute_busiest_days(limit, start_date,
+                                                                                               end_date)))
+
+    @staticmethod
+    def __get_date_window(start_date, end_date, limit):
+        """
+        Completes the date window of a statistic over the upcoming days and checks its limit.
+        Raises ActivityServiceError if the limit is negative.
+        :param start_date: the first calendar date, or None to start from today
+        :param end_date: the last calendar date, or None
+        :param limit: the maximum number of days, or None
+        :return: the tuple (first calendar date, last calendar date or None)
+        """
+        if limit is not None and limit < 0:
+            raise ActivityServiceError("The number of days cannot be negative!\n")
+        if start_date is None:
+            start_date = Utility.convert_date_to_calendar_date(date.today())
+        return start_date, end_date
+
+    @staticmethod
+    def __get_window_key(start_date, end_date):
+        """
+        Creates the part of a cache key identifying a date window.
+        :param start_date: the first calendar date
+        :param end_date: the last calendar date, or None
+        :return: the tuple (first date key, last date key or None)
+        """
+        return (Utility.convert_calendar_date_to_key(start_date),
+                None if end_date is None else Utility.convert_calendar_date_to_key(end_date))
 
+    def __compute_busiest_days(self, limit, start_date, end_date):
+        """
+        Computes the dictionary of the upcoming dates and their numbers of activities (see find_busiest_days).
+        The repository keeps the number of activities of every day up to date, ordered by (number of activities, date),
+            so the days are read off already sorted, without visiting the activities, and only the first limit days are
+            read.
+        :param limit: the maximum number of days, or None for all the days
+        :param start_date: the first calendar date (included)
+        :param end_date: the last calendar date (included), or None
+        :return: the dictionary sorted in ascending order by the number of activities in each day
+        """
         upcoming_dates_dictionary = {}
-        for activity in upcoming_activities:
-            upcoming_dates_dictionary[(activity.day, activity.month, activity.year)] = 0
-        for activity in upcoming_activities:
-            upcoming_dates_dictionary[(activity.day, activity.month, activity.year)] += 1
+        days = self.__activity_repository.iterate_days_by_number_of_activities(start_date, end_date)
+        for number_of_activities, date_key in itertools.islice(days, limit):
+            calendar_date = Utility.convert_key_to_calendar_date(date_key)
+            upcoming_date = (calendar_date["day"], calendar_date["month"], calendar_date["year"])
+            upcoming_dates_dictionary[upcoming_date] = number_of_activities
+        return upcoming_dates_dictionary
 
-        upcoming_dates = sorted(upcoming_dates_dictionary.items(), key=lambda upcoming_date: (upcoming_date[1],
-                                                                                              upcoming_date[0][2],
-                                                                                              upcoming_date[0][1],
-                                                                                              upcoming_date[0][0]
-                                                                                              ))
-        return dict(upcoming_dates)
+    @staticmethod
+    def compute_free_intervals(occupied_hours, working_hours):
+        """
+        Computes the free intervals of a day, i.e. the maximal intervals of working hours without activities.
+        e.g. activities at 10:00 and 14:00 (occupied_hours = 1 << 10 | 1 << 14), working hours (8, 20)
+            -> [(8, 10), (11, 14), (15, 20)]
+        :param occupied_hours: the mask of the occupied hours of the day (bit h is set if there is an activity at
+            hour h)
+        :param working_hours: tuple (first hour, last hour + 1)
+        :return: the list of the free intervals, as tuples (first hour, last hour + 1), in chronological order
+        """
+        first_working_hour, end_of_working_hours = working_hours
+        free_intervals = []
+        free_interval_start = None
+        for hour in range(first_working_hour, end_of_working_hours):
+            if occupied_hours >> hour & 1 == 0:
+                if free_interval_start is None:
+                    free_interval_start = hour
+            elif free_interval_start is not None:
+                free_intervals.append((free_interval_start, hour))
+                free_interval_start = None
+        if free_interval_start is not None:
+            free_intervals.append((free_interval_start, end_of_working_hours))
+        return free_intervals
+
+    def find_free_time_of_upcoming_days(self, limit=None, start_date=None, end_date=None):
+        """
+        Computes the free time of each upcoming day having activities, i.e. the intervals of working hours in which
+        there is no activity.
+        The days are read from the day schedules of the repository, which keep the occupied hours of every day up to
+        date, so only the upcoming days are visited (and not all the activities).
+        Note that each day is described by a dictionary:
+            e.g. {"date": (10, 12, 2020), "activities": 2, "free_hours": 10, "free_intervals": [(8, 9), (10, 12), ...]}
+            "date" is the calendar date (dd, mm, yyyy), "activities" the number of activities in that day (including
+            the ones outside the working hours), "free_hours" the total length of the free intervals
+        The statistic is cached until the activities change or the current date changes.
+        Raises ActivityServiceError if the limit is negative.
+        :param limit: the maximum number of days, or None for all the days
+        :param start_date: dictionary; the first calendar date (included), or None to start from today
+        :param end_date: dictionary; the last calendar date (included), or None to include all the upcoming days
+        :return: the list of the upcoming days, sorted in descending order of their free time (then by date)
+        """
+        start_date, end_date = self.__get_date_window(start_date, end_date, limit)
+        cache_key = ("free time", limit, self.__get_window_key(start_date, end_date), self.__working_hours,
+                     self.__activity_repository.get_generation())
+        return copy.deepcopy(self.__cache.get_or_compute(
+            cache_key, lambda: self.__compute_free_time_of_upcoming_days(limit, start_date, end_date)))
+
+    def __compute_free_time_of_upcoming_days(self, limit, start_date, end_date):
+        """
+        Computes the free time of the upcoming days (see find_free_time_of_upcoming_days).
+        The free hours of a day are counted directly on its mask of occupied hours, and when there is a limit, the
+            days having the most free hours are selected with a heap of at most limit days (O(n log limit) instead of
+            sorting all the n days); only the free intervals of the selected days are computed.
+        :param limit: the maximum number of days, or None for all the days
+        :param start_date: the first calendar date (included)
+        :param end_date: the last calendar date (included), or None
+        :return: the list of the upcoming days, sorted in descending order of their free time
+        """
+        first_working_hour, end_of_working_hours = self.__working_hours
+        working_hours_mask = (1 << end_of_working_hours) - (1 << first_working_hour)
+        number_of_working_hours = end_of_working_hours - first_working_hour
+        days = ((number_of_working_hours - bin(occupied_hours & working_hours_mask).count("1"), date_key,
+                 occupied_hours, number_of_activities) for date_key, occupied_hours, number_of_activities in
+                self.__activity_repository.iterate_day_schedules(start_date, end_date))
+
+        # the days are visited chronologically and both the sort and the selection are stable, so the days having the
+        # same free time stay sorted by date
+        if limit is None:
+            selected_days = sorted(days, key=lambda day: -day[0])
+        else:
+            selected_days = heapq.nsmallest(limit, days, key=lambda day: -day[0])
+
+        upcoming_days = []
+        for free_hours, date_key, occupied_hours, number_of_activities in selected_days:
+            calendar_date = Utility.convert_key_to_calendar_date(date_key)
+            upcoming_days.append({
+                "date": (calendar_date["day"], calendar_date["month"], calendar_date["year"]),
+                "activities": number_of_activities,
+                "free_hours": free_hours,
+                "free_intervals": self.compute_free_intervals(occupied_hours, self.__working_hours)
+            })
+        return upcoming_days
 
 
 class ActivityService:
@@ -249,19 +473,43 @@ class ActivityService:
     Each service must be injected at its instantiation with one (or more) repositories and also with a validator.
     """
 
-    def __init__(self, activity_validator, activity_repository, person_repository, undo_stack, redo_stack):
+    def __init__(self, activity_validator, activity_repository, person_repository, undo_stack, redo_stack,
+                 cache_size=DEFAULT_CACHE_SIZE):
         """
         The constructor for a new object of type ActivityService.
         :param activity_validator: object used to validate newly created activities
         :param activity_repository: the collection of uniquely identifiable activities, which performs CRUD operations
         :param person_repository: the collection of uniquely identifiable persons, needed because an activity is also
         defined using the persons' IDs, so they must be accessible from the activity service
+        :param cache_size: the maximum number of search results kept in the cache of the service
         """
         self.__activity_validator = activity_validator
         self.__activity_repository = activity_repository
         self.__person_repository = person_repository
         self.__undo_stack = undo_stack
         self.__redo_stack = redo_stack
+        self.__cache = LRUCache(cache_size)
+
+    def __get_cached_result(self, query, compute_result):
+        """
+        Gets the result of a search from the cache, computing it if the search was not made since the last change of
+            the activities or of the persons.
+        :param query: a tuple identifying the search (its name and its arguments)
+        :param compute_result: the function (without parameters) that computes the list of found activities
+        :return: a copy of the list of found activities (so the cached result is never changed by the caller)
+        """
+        return list(self.__get_cached_tuple(query, compute_result))
+
+    def __get_cached_tuple(self, query, compute_result):
+        """
+        Gets the result of a search from the cache as it is kept there (a tuple, so it cannot be changed), without
+            copying it. Used for the pages of the results, so that only the activities of a page are copied.
+        :param query: a tuple identifying the search (its name and its arguments)
+        :param compute_result: the function (without parameters) that computes the list of found activities
+        :return: the tuple of found activities
+        """
+        cache_key = (query, self.__activity_repository.get_generation(), self.__person_repository.get_generation())
+        return self.__cache.get_or_compute(cache_key, lambda: tuple(compute_result()))
 
     def service_add_activity(self, activity_id, participants_ids, activity_date, time, description):
         """
@@ -269,6 +517,10 @@ class ActivityService:
         repository method which adds the newly created activity to the repository.
         Raises ActivityServiceError if the newly created activity is performed with someone's whose ID is not in the
         agenda.
+        Raises ActivityRepositoryError if the new activity conflicts with another activity, according to the conflict
+        mode of the repository: in the planner mode, if there is any other activity at the same time; in the participant
+        mode, if one of the participants already takes part in another activity at that time (which is checked on the
+        schedules of the participants, in O(number of participants)).
         Adds the operation on the undo stack.
         Clears the redo stack.
         :param activity_id: positive integer; the ID of the activity
@@ -282,10 +534,8 @@ class ActivityService:
         self.__activity_validator.validate_activity(new_activity)
 
         # now check whether the persons that participate in the new activity exist in the agenda
-        existing_persons_list = self.__person_repository.get_all_persons_list()
-        existing_persons_ids = [person.id for person in existing_persons_list]
         for id_checker in participants_ids:
-            if id_checker not in existing_persons_ids:
+            if self.__person_repository.check_person_existence(id_checker) is False:
                 raise ActivityServiceError(
                     "You are trying to perform an activity together with someone that is not in the agenda!\n")
 
@@ -307,6 +557,15 @@ class ActivityService:
         return activities_list
         # return sorted(activities_list, key=lambda activity: (activity.year, activity.month, activity.day, activity.time))
 
+    def iterate_activities(self, offset=0, limit=None):
+        """
+        Lazily gets a page of the list of activities.
+        :param offset: the number of activities to skip
+        :param limit: the maximum number of activities, or None for all the activities after the offset
+        :return: a generator of the activities of the page
+        """
+        return Utility.paginate(self.__activity_repository.get_all_activities_list(), offset, limit)
+
     def service_remove_activity(self, remove_activity_id):
         """
         Receives an ID and removes the activity having that ID from the repository.
@@ -334,6 +593,8 @@ class ActivityService:
         them, validates it and then calls the corresponding repository method that replaces the old activity with
         the updated one.
         Raises ActivityServiceError if the updated list of participants includes someone who is not in the agenda.
+        Raises ActivityRepositoryError if the updated activity conflicts with another activity, according to the
+        conflict mode of the repository (see service_add_activity); the old version of the activity is ignored.
         Adds the operation on the undo stack.
         Clears the redo stack.
         :param activity_id: integer, must be positive in order to be valid
@@ -347,10 +608,8 @@ class ActivityService:
         self.__activity_validator.validate_activity(updated_activity)
 
         # now check whether the persons that participate in the new activity exist in the agenda
-        existing_persons_list = self.__person_repository.get_all_persons_list()
-        existing_persons_ids = [person.id for person in existing_persons_list]
         for id_checker in participants_ids:
-            if id_checker not in existing_persons_ids:
+            if self.__person_repository.check_person_existence(id_checker) is False:
                 raise ActivityServiceError(
                     "You are trying to perform an activity together with someone that is not in the agenda!\n")
 
@@ -374,9 +633,72 @@ class ActivityService:
         """
         given_date = {"year": year, "month": month, "day": day}
         self.__activity_validator.validate_calendar_date(given_date)
-        activities_list = self.__activity_repository.get_all_activities_list()
-        searched_activities = [activity for activity in activities_list if activity.date == given_date]
-        return sorted(searched_activities, key=lambda activity: activity.time)
+        return self.__get_cached_result(("date", year, month, day),
+                                        lambda: self.__activity_repository.find_activities_by_date(given_date))
+
+    def find_activities_between(self, start_date, end_date):
+        """
+        Receives two calendar dates and finds all the activities that take place between them.
+        Raises DateValidatorError if any of the calendar dates is invalid.
+        :param start_date: dictionary; the first calendar date (included)
+        :param end_date: dictionary; the last calendar date (included)
+        :return: a list containing the activities that take place between the given dates, sorted by date and time
+        """
+        for calendar_date in (start_date, end_date):
+            self.__activity_validator.validate_calendar_date(calendar_date)
+        query = ("between", Utility.convert_calendar_date_to_key(start_date),
+                 Utility.convert_calendar_date_to_key(end_date))
+        return self.__get_cached_result(query, lambda: list(self.iterate_activities_chronologically(start_date,
+                                                                                                     end_date)))
+
+    def iterate_activities_chronologically(self, start_date=None, end_date=None, offset=0, limit=None):
+        """
+        Iterates over the activities in chronological order, optionally only between two calendar dates.
+        Raises DateValidatorError if any of the given calendar dates is invalid.
+        :param start_date: dictionary; the first calendar date (included), or None to start from the first activity
+        :param end_date: dictionary; the last calendar date (included), or None to continue until the last activity
+        :param offset: the number of activities to skip
+        :param limit: the maximum number of activities, or None for all the activities after the offset
+        :return: a generator of activities, sorted by date and time
+        """
+        for calendar_date in (start_date, end_date):
+            if calendar_date is not None:
+                self.__activity_validator.validate_calendar_date(calendar_date)
+        return Utility.paginate(self.__activity_repository.iterate_activities_chronologically(start_date, end_date),
+                                offset, limit)
+
+    def query(self, start_date=None, end_date=None, participant_id=None, searched_description=None, start_hour=None,
+              end_hour=None, offset=0, limit=None):
+        """
+        Finds the activities matching any combination of criteria (each criterion is ignored if it is None).
+        The repository drives the query from its most selective index and filters the activities by the other
+            criteria lazily, so only the activities of the requested page are produced.
+        Raises DateValidatorError if any of the calendar dates is invalid.
+        Raises ActivityServiceError if the participant ID is negative or if the hours are not in [0, 23].
+        :param start_date: dictionary; the first calendar date (included)
+        :param end_date: dictionary; the last calendar date (included)
+        :param participant_id: the ID of a person who must take part in the activities
+        :param searched_description: a text the descriptions must contain (works case insensitive)
+        :param start_hour: integer in [0, 23]; the first hour (included)
+        :param end_hour: integer in [0, 23]; the last hour (included)
+        :param offset: the number of found activities to skip
+        :param limit: the maximum number of activities, or None for all the found activities after the offset
+        :return: a generator of the found activities, sorted by date and time
+        """
+        for calendar_date in (start_date, end_date):
+            if calendar_date is not None:
+                self.__activity_validator.validate_calendar_date(calendar_date)
+        if participant_id is not None and participant_id < 0:
+            raise ActivityServiceError("The ID of the searched person cannot be negative!\n")
+        for hour in (start_hour, end_hour):
+            if hour is not None and not (0 <= hour <= 23):
+                raise ActivityServiceError("The hours must be integers in [0, 23]!\n")
+        if searched_description is not None:
+            searched_description = searched_description.strip().lower()
+
+        found_activities = self.__activity_repository.query_activities(start_date, end_date, participant_id,
+                                                                       searched_description, start_hour, end_hour)
+        return Utility.paginate(found_activities, offset, limit)
 
     def find_activities_by_description(self, searched_description):
         """
@@ -385,14 +707,94 @@ class ActivityService:
         :param searched_description: the searched description
         :return: a list containing the activities whose descriptions contain the received description
         """
-        activities_list = self.__activity_repository.get_all_activities_list()
-        searched_activities = [activity for activity in activities_list if
-                               searched_description in activity.description.lower()]
+        return list(self.__get_cached_activities_by_description(searched_description))
+
+    def __get_cached_activities_by_description(self, searched_description):
+        """
+        Gets the cached activities whose descriptions contain the received description, without copying them.
+        :param searched_description: the searched description
+        :return: a tuple containing the found activities, sorted by date and time
+        """
+        return self.__get_cached_tuple(("description", searched_description),
+                                       lambda: self.__search_activities_by_description(searched_description))
+
+    def __search_activities_by_description(self, searched_description):
+        """
+        Searches the activities by description using the index of the repository (see find_activities_by_description).
+        :param searched_description: the searched description
+        :return: a list containing the found activities, sorted by date and time
+        """
+        searched_activities = self.__activity_repository.find_activities_by_description(searched_description)
         return sorted(searched_activities, key=lambda activity: (activity.year,
                                                                  activity.month,
                                                                  activity.day,
                                                                  activity.time))
 
+    def iterate_activities_by_description(self, searched_description, offset=0, limit=None):
+        """
+        Lazily gets a page of the activities whose descriptions contain the received description.
+        :param searched_description: the searched description
+        :param offset: the number of found activities to skip
+        :param limit: the maximum number of activities, or None for all the found activities after the offset
+        :return: an iterator of the activities of the page, sorted by date and time
+        """
+        return Utility.paginate(self.__get_cached_activities_by_description(searched_description), offset, limit)
+
+    def find_common_free_slots(self, persons_ids, date_range, number_of_slots, hours=WHOLE_DAY):
+        """
+        Finds the first hours between two dates in which there is no activity in the agenda and none of the given persons
+        is busy, i.e. the hours in which an activity with all of them could be added.
+        For every day, the hours in which the agenda and each of the persons are busy are kept as masks (bit h is set
+        if hour h is busy), so the free hours of a day are found by combining the masks with a few bitwise operations:
+            free hours = ~(agenda's busy hours | busy hours of person 1 | busy hours of person 2 | ...) & hours
+        When the repository only rejects the activities having a common participant (the participant conflict mode),
+        the other activities of the agenda do not matter, so only the busy hours of the persons are combined.
+        Raises DateValidatorError if any of the calendar dates is invalid.
+        Raises ActivityServiceError if there is no person having one of the given IDs, if the number of slots is
+        negative, or if a calendar date does not exist (e.g. 31.02).
+        :param persons_ids: list of integers; the IDs of the persons who should take part in the activity
+        :param date_range: tuple (first calendar date, last calendar date); both dates are dictionaries and are included
+        :param number_of_slots: the maximum number of free hours to be found
+        :param hours: tuple (first hour, last hour + 1); only the hours in this interval are considered
+        :return: a list of (calendar date, hour) tuples, in chronological order
+        """
+        start_date, end_date = date_range
+        for calendar_date in (start_date, end_date):
+            self.__activity_validator.validate_calendar_date(calendar_date)
+        if number_of_slots < 0:
+            raise ActivityServiceError("The number of free hours cannot be negative!\n")
+        for person_id in persons_ids:
+            if self.__person_repository.check_person_existence(person_id) is False:
+                raise ActivityServiceError(f"There is no person having the ID {person_id} in the agenda!\n")
+        try:
+            current_day = date(start_date["year"], start_date["month"], start_date["day"])
+            last_day = date(end_date["year"], end_date["month"], end_date["day"])
+        except ValueError:
+            raise ActivityServiceError("The free hours can only be searched between two existing calendar dates!\n")
+
+        busy_hours_by_date_key = {}
+        if self.__activity_repository.conflict_mode == PLANNER_CONFLICTS:
+            for date_key, occupied_hours, _ in self.__activity_repository.iterate_day_schedules(start_date, end_date):
+                busy_hours_by_date_key[date_key] = occupied_hours
+        for person_id in persons_ids:
+            person_schedule = self.__activity_repository.get_participant_schedule(person_id, start_date, end_date)
+            for date_key, occupied_hours in person_schedule.items():
+                busy_hours_by_date_key[date_key] = busy_hours_by_date_key.get(date_key, 0) | occupied_hours
+
+        first_hour, end_hour = hours
+        hours_mask = (1 << end_hour) - (1 << first_hour)
+        free_slots = []
+        while current_day <= last_day and len(free_slots) < number_of_slots:
+            calendar_date = Utility.convert_date_to_calendar_date(current_day)
+            busy_hours = busy_hours_by_date_key.get(Utility.convert_calendar_date_to_key(calendar_date), 0)
+            free_hours = ~busy_hours & hours_mask
+            while free_hours != 0 and len(free_slots) < number_of_slots:
+                lowest_free_hour_bit = free_hours & -free_hours
+                free_slots.append((dict(calendar_date), lowest_free_hour_bit.bit_length() - 1))
+                free_hours ^= lowest_free_hour_bit
+            current_day += timedelta(days=1)
+        return free_slots
+
     def find_activities_by_participant(self, searched_participant_id):
         """
         Receives a person ID and finds all the activities that are performed together with the person having that ID.
@@ -402,12 +804,10 @@ class ActivityService:
         """
         if searched_participant_id < 0:
             raise ActivityServiceError("The ID of the searched person cannot be negative!\n")
-        existing_persons_list = self.__person_repository.get_all_persons_list()
-        existing_persons_ids = [person.id for person in existing_persons_list]
-        if searched_participant_id not in existing_persons_ids:
+        if self.__person_repository.check_person_existence(searched_participant_id) is False:
             raise ActivityServiceError(f"There is no person having the ID {searched_participant_id} in the agenda!\n")
-        activities_list = self.__activity_repository.get_all_activities_list()
-        return [activity for activity in activities_list if searched_participant_id in activity.participants_ids]
+        return self.__get_cached_result(("participant", searched_participant_id), lambda: (
+            self.__activity_repository.find_activities_by_participant(searched_participant_id)))
 
 
 class PersonService:
@@ -419,16 +819,39 @@ class PersonService:
     Each service must be injected at its instantiation with one (or more) repositories and also with a validator.
     """
 
-    def __init__(self, person_validator, person_repository, undo_stack, redo_stack):
+    def __init__(self, person_validator, person_repository, undo_stack, redo_stack, cache_size=DEFAULT_CACHE_SIZE):
         """
         The constructor for a new object of type PersonService.
         :param person_validator: object used to validate newly created persons
         :param person_repository: the collection of uniquely identifiable persons
+        :param cache_size: the maximum number of search results kept in the cache of the service
         """
         self.__person_validator = person_validator
         self.__person_repository = person_repository
         self.__undo_stack = undo_stack
         self.__redo_stack = redo_stack
+        self.__cache = LRUCache(cache_size)
+
+    def __get_cached_result(self, query, compute_result):
+        """
+        Gets the result of a search from the cache, computing it if the search was not made since the last change of
+            the persons.
+        :param query: a tuple identifying the search (its name and its arguments)
+        :param compute_result: the function (without parameters) that computes the list of found persons
+        :return: a copy of the list of found persons (so the cached result is never changed by the caller)
+        """
+        return list(self.__get_cached_tuple(query, compute_result))
+
+    def __get_cached_tuple(self, query, compute_result):
+        """
+        Gets the result of a search from the cache as it is kept there (a tuple, so it cannot be changed), without
+            copying it. Used for the pages of the results, so that only the persons of a page are copied.
+        :param query: a tuple identifying the search (its name and its arguments)
+        :param compute_result: the function (without parameters) that computes the list of found persons
+        :return: the tuple of found persons
+        """
+        cache_key = (query, self.__person_repository.get_generation())
+        return self.__cache.get_or_compute(cache_key, lambda: tuple(compute_result()))
 
     def service_add_person(self, person_id, person_name, person_phone_number):
         """
@@ -502,6 +925,22 @@ class PersonService:
         """
         return self.__person_repository.get_all_persons_list()
 
+    def service_get_number_of_persons(self):
+        """
+        Gets the number of persons by calling the corresponding repository method.
+        :return: the number of persons in the agenda
+        """
+        return self.__person_repository.get_number_of_persons()
+
+    def iterate_persons(self, offset=0, limit=None):
+        """
+        Lazily gets a page of the list of persons.
+        :param offset: the number of persons to skip
+        :param limit: the maximum number of persons, or None for all the persons after the offset
+        :return: a generator of the persons of the page
+        """
+        return Utility.paginate(self.__person_repository.get_all_persons_list(), offset, limit)
+
     def get_existing_persons_ids(self):
         """
         Creates a list containing the IDs of all the persons that exist in the list.
@@ -518,8 +957,41 @@ class PersonService:
         :return: a list containing objects of type Person, having the property that each person's name is the same
         with the received name or it contains the received name
         """
-        persons_list = self.__person_repository.get_all_persons_list()
-        return [person for person in persons_list if searched_name in person.name.lower()]
+        return list(self.__get_cached_persons_by_name(searched_name))
+
+    def __get_cached_persons_by_name(self, searched_name):
+        """
+        Gets the cached persons whose names contain the received name, without copying them.
+        :param searched_name: the received name
+        :return: a tuple containing the found persons
+        """
+        return self.__get_cached_tuple(("name", searched_name),
+                                       lambda: self.__person_repository.find_persons_by_name(searched_name))
+
+    def find_persons_by_fuzzy_name(self, searched_name, maximum_distance=DEFAULT_MAXIMUM_EDIT_DISTANCE):
+        """
+        Receives a name and finds all the persons whose names (or one of the words of their names) differ from the
+        received name by at most a given number of edits (inserted, removed or replaced characters), so that names
+        typed with typos are still found (works case insensitive).
+        Raises PersonServiceError if the maximum number of edits is negative.
+        :param searched_name: the received name
+        :param maximum_distance: the maximum number of edits
+        :return: a list containing objects of type Person, the closest names first
+        """
+        if maximum_distance < 0:
+            raise PersonServiceError("The maximum number of typos cannot be negative!\n")
+        return self.__get_cached_result(("fuzzy name", searched_name, maximum_distance), lambda: (
+            self.__person_repository.find_persons_by_fuzzy_name(searched_name, maximum_distance)))
+
+    def iterate_persons_by_name(self, searched_name, offset=0, limit=None):
+        """
+        Lazily gets a page of the persons whose names contain the received name.
+        :param searched_name: the received name
+        :param offset: the number of found persons to skip
+        :param limit: the maximum number of persons, or None for all the found persons after the offset
+        :return: an iterator of the persons of the page
+        """
+        return Utility.paginate(self.__get_cached_persons_by_name(searched_name), offset, limit)
 
     def find_persons_by_phone_number(self, searched_phone_number):
         """
@@ -528,5 +1000,5 @@ class PersonService:
         :return: a list containing objects of type Person, having the property that each person's phone number is
         the same with the received phone number or it contains the received phone number
         """
-        persons_list = self.__person_repository.get_all_persons_list()
-        return [person for person in persons_list if searched_phone_number in person.phone_number]
+        return self.__get_cached_result(("phone number", searched_phone_number), lambda: (
+            self.__person_repository.find_persons_by_phone_number(searched_phone_number)))
@@ -1,6 +1,9 @@
 import pickle
 
-from INFRASTRUCTURE.inmemory_repositories import PersonRepository, ActivityRepository
+from INFRASTRUCTURE.group_commit import GroupCommit, DEFAULT_BATCH_SIZE
+from INFRASTRUCTURE.indexes import DEFAULT_MAXIMUM_EDIT_DISTANCE
+from INFRASTRUCTURE.inmemory_repositories import PersonRepository, ActivityRepository, PLANNER_CONFLICTS
+from UTILITY.utils import Utility
 
 """
     Binary files:
@@ -38,29 +41,51 @@ class BinaryFilePersonRepository(PersonRepository):
     Inherits from the base class PersonRepository.
     """
 
-    def __init__(self, filename):
+    def __init__(self, filename, batch_size=DEFAULT_BATCH_SIZE, time_window=None):
         """
         The constructor of a person repository based on a binary file, which calls the __init__ method of the base class,
         but in addition receives the name of the binary file from which data is loaded and into which data is saved.
         :param filename: the name of the binary file
+        :param batch_size: the number of changes after which the file is rewritten (1 rewrites it after every change)
+        :param time_window: the number of seconds after which the pending changes are written, or None
         """
         super().__init__()
         self.__filename = filename
+        self.__file_signature = None
+        self.__group_commit = GroupCommit(self.__save_persons_from_memory_to_file, batch_size, time_window)
 
     def __save_persons_from_memory_to_file(self):
         """
         Dumps the list of persons from the memory into the binary file.
         """
-        with open(self.__filename, mode="wb") as persons_binary_file:
-            pickle.dump(self._person_list, persons_binary_file)
+        Utility.write_file_atomically(self.__filename, pickle.dumps(self._person_list))
+        self.__file_signature = Utility.get_file_signature(self.__filename)
 
     def __load_persons_from_file_into_memory(self):
         """
         Takes the list of persons from the binary file and loads it into memory.
+        The file is unpickled only if its signature (modification time, size and inode) changed since it was last
+            loaded or saved, otherwise the list of persons from memory is already up to date.
+        The file is not loaded while there are pending changes, since the list of persons from memory is newer.
         """
+        if self.__group_commit.pending_changes > 0:
+            return
+
+        file_signature = Utility.get_file_signature(self.__filename)
+        if file_signature is not None and file_signature == self.__file_signature:
+            return
+
         with open(self.__filename, mode="rb") as persons_binary_file:
             super().clear_repository()
             self._person_list = pickle.load(persons_binary_file)
+            self._rebuild_indexes()
+        self.__file_signature = file_signature
+
+    def flush(self):
+        """
+        Writes the pending changes (if any) into the file.
+        """
+        self.__group_commit.flush()
 
     @property
     def person_list(self):
@@ -80,8 +105,10 @@ class BinaryFilePersonRepository(PersonRepository):
         :param new_persons_list: the new list of persons
         Saves all the persons from the list of persons into the file.
         """
-        self._person_list = new_persons_list
-        self.__save_persons_from_memory_to_file()
+        with self.__group_commit.lock:
+            self._person_list = new_persons_list
+            self._rebuild_indexes()
+            self.__group_commit.register_change()
 
     def save_person(self, new_person):
         """
@@ -91,9 +118,10 @@ class BinaryFilePersonRepository(PersonRepository):
         :param new_person: the new person that is wanted to be added to the repository
         Saves all the persons from the list of persons into the file.
         """
-        self.__load_persons_from_file_into_memory()
-        super().save_person(new_person)
-        self.__save_persons_from_memory_to_file()
+        with self.__group_commit.lock:
+            self.__load_persons_from_file_into_memory()
+            super().save_person(new_person)
+            self.__group_commit.register_change()
 
     def remove_person(self, remove_person_id):
         """
@@ -103,9 +131,10 @@ class BinaryFilePersonRepository(PersonRepository):
         :param remove_person_id: the ID of the person to be removed
         Saves all the persons from the list of persons into the file.
         """
-        self.__load_persons_from_file_into_memory()
-        super().remove_person(remove_person_id)
-        self.__save_persons_from_memory_to_file()
+        with self.__group_commit.lock:
+            self.__load_persons_from_file_into_memory()
+            super().remove_person(remove_person_id)
+            self.__group_commit.register_change()
 
     def update_person(self, person_to_update_id, updated_person):
         """
@@ -117,9 +146,10 @@ class BinaryFilePersonRepository(PersonRepository):
         :param updated_person: the updated person
         Saves all the persons from the list of persons into the file.
         """
-        self.__load_persons_from_file_into_memory()
-        super().update_person(person_to_update_id, updated_person)
-        self.__save_persons_from_memory_to_file()
+        with self.__group_commit.lock:
+            self.__load_persons_from_file_into_memory()
+            super().update_person(person_to_update_id, updated_person)
+            self.__group_commit.register_change()
 
     def find_person(self, searched_person_id):
         """
@@ -149,6 +179,45 @@ class BinaryFilePersonRepository(PersonRepository):
         self.__load_persons_from_file_into_memory()
         return super().get_number_of_persons()
 
+    def find_persons_by_name(self, searched_name):
+        """
+        Loads all the persons from file into the list of persons.
+        Finds all the persons whose lowercased names contain a text, using the name index.
+        :param searched_name: the searched text (lowercase)
+        :return: a list containing the found persons, in the order of the list of persons
+        """
+        self.__load_persons_from_file_into_memory()
+        return super().find_persons_by_name(searched_name)
+
+    def find_persons_by_fuzzy_name(self, searched_name, maximum_distance=DEFAULT_MAXIMUM_EDIT_DISTANCE):
+        """
+        Loads all the persons from file into the list of persons.
+        Finds all the persons whose names are at most a given edit distance away from a text, using the BK-tree.
+        :param searched_name: the searched text
+        :param maximum_distance: the maximum edit distance
+        :return: a list containing the found persons, ranked by their edit distance
+        """
+        self.__load_persons_from_file_into_memory()
+        return super().find_persons_by_fuzzy_name(searched_name, maximum_distance)
+
+    def find_persons_by_phone_number(self, searched_phone_number):
+        """
+        Loads all the persons from file into the list of persons.
+        Finds all the persons whose phone numbers contain a text, using the phone number index.
+        :param searched_phone_number: the searched (part of the) phone number
+        :return: a list containing the found persons, in the order of the list of persons
+        """
+        self.__load_persons_from_file_into_memory()
+        return super().find_persons_by_phone_number(searched_phone_number)
+
+    def get_generation(self):
+        """
+        Loads all the persons from file into the list of persons.
+        Returns the generation of the repository, which is increased by every change of the persons.
+        """
+        self.__load_persons_from_file_into_memory()
+        return super().get_generation()
+
     def get_all_persons_list(self):
         """
         Loads all the persons from file into the list of persons.
@@ -172,29 +241,52 @@ class BinaryFileActivityRepository(ActivityRepository):
     Inherits from the base class ActivityRepository.
     """
 
-    def __init__(self, filename):
+    def __init__(self, filename, batch_size=DEFAULT_BATCH_SIZE, time_window=None, conflict_mode=PLANNER_CONFLICTS):
         """
         The constructor of an activity repository based on a binary file, which calls the __init__ method of the base class,
         but in addition receives the name of the binary file from which data is loaded and into which data is saved.
         :param filename: the name of the binary file
+        :param batch_size: the number of changes after which the file is rewritten (1 rewrites it after every change)
+        :param time_window: the number of seconds after which the pending changes are written, or None
+        :param conflict_mode: the conflict mode of the repository (see ActivityRepository)
         """
-        super().__init__()
+        super().__init__(conflict_mode)
         self.__filename = filename
+        self.__file_signature = None
+        self.__group_commit = GroupCommit(self.__save_activities_from_memory_to_file, batch_size, time_window)
 
     def __save_activities_from_memory_to_file(self):
         """
         Dumps the list of activities from the memory into the binary file.
         """
-        with open(self.__filename, mode="wb") as activities_binary_file:
-            pickle.dump(self._activities_list, activities_binary_file)
+        Utility.write_file_atomically(self.__filename, pickle.dumps(self._activities_list))
+        self.__file_signature = Utility.get_file_signature(self.__filename)
 
     def __load_activities_from_file_into_memory(self):
         """
         Takes the list of activities from the binary file and loads it into memory.
+        The file is unpickled only if its signature (modification time, size and inode) changed since it was last
+            loaded or saved, otherwise the list of activities from memory is already up to date.
+        The file is not loaded while there are pending changes, since the list of activities from memory is newer.
         """
+        if self.__group_commit.pending_changes > 0:
+            return
+
+        file_signature = Utility.get_file_signature(self.__filename)
+        if file_signature is not None and file_signature == self.__file_signature:
+            return
+
         with open(self.__filename, mode="rb") as activities_binary_file:
             super().clear_repository()
             self._activities_list = pickle.load(activities_binary_file)
+            self._rebuild_indexes()
+        self.__file_signature = file_signature
+
+    def flush(self):
+        """
+        Writes the pending changes (if any) into the file.
+        """
+        self.__group_commit.flush()
 
     @property
     def activities_list(self):
@@ -214,8 +306,10 @@ class BinaryFileActivityRepository(ActivityRepository):
         :param new_activities_list: the new list of activities
         Saves all the activities from the list of activities into the file.
         """
-        self._activities_list = new_activities_list
-        self.__save_activities_from_memory_to_file()
+        with self.__group_commit.lock:
+            self._activities_list = new_activities_list
+            self._rebuild_indexes()
+            self.__group_commit.register_change()
 
     def save_activity(self, new_activity):
         """
@@ -225,9 +319,10 @@ class BinaryFileActivityRepository(ActivityRepository):
             if there is another activity in the repository that takes place in the same time time as the new activ
         Saves all the activities from the list of activities into the file.
         """
-        self.__load_activities_from_file_into_memory()
-        super().save_activity(new_activity)
-        self.__save_activities_from_memory_to_file()
+        with self.__group_commit.lock:
+            self.__load_activities_from_file_into_memory()
+            super().save_activity(new_activity)
+            self.__group_commit.register_change()
 
     def remove_activity(self, remove_activity_id):
         """
@@ -237,9 +332,10 @@ class BinaryFileActivityRepository(ActivityRepository):
         :param remove_activity_id: the ID of the activity that needs to be removed
         Saves all the activities from the list of activities into the file.
         """
-        self.__load_activities_from_file_into_memory()
-        super().remove_activity(remove_activity_id)
-        self.__save_activities_from_memory_to_file()
+        with self.__group_commit.lock:
+            self.__load_activities_from_file_into_memory()
+            super().remove_activity(remove_activity_id)
+            self.__group_commit.register_change()
 
     def update_activity(self, to_update_activity_id, updated_activity):
         """
@@ -252,9 +348,10 @@ class BinaryFileActivityRepository(ActivityRepository):
         :param updated_activity: the updated version of the searched activity
         Saves all the activities from the list of activities into the file.
         """
-        self.__load_activities_from_file_into_memory()
-        super().update_activity(to_update_activity_id, updated_activity)
-        self.__save_activities_from_memory_to_file()
+        with self.__group_commit.lock:
+            self.__load_activities_from_file_into_memory()
+            super().update_activity(to_update_activity_id, updated_activity)
+            self.__group_commit.register_change()
 
     def find_activity(self, searched_activity_id):
         """
@@ -276,6 +373,100 @@ class BinaryFileActivityRepository(ActivityRepository):
         self.__load_activities_from_file_into_memory()
         return super().check_activity_existence(searched_activity_id)
 
+    def find_activities_by_participant(self, participant_id):
+        """
+        Loads all the activities from the file into the list of activities.
+        Finds all the activities in which a person takes part, using the participant index.
+        :param participant_id: the ID of the person
+        :return: a list containing the activities of the person, in the order of the list of activities
+        """
+        self.__load_activities_from_file_into_memory()
+        return super().find_activities_by_participant(participant_id)
+
+    def find_activities_by_date(self, calendar_date):
+        """
+        Loads all the activities from the file into the list of activities.
+        Finds all the activities taking place in a day, using the day schedules.
+        :param calendar_date: the calendar date, as a dictionary
+        :return: a list containing the activities of the day, sorted by time
+        """
+        self.__load_activities_from_file_into_memory()
+        return super().find_activities_by_date(calendar_date)
+
+    def iterate_day_schedules(self, start_date=None, end_date=None):
+        """
+        Loads all the activities from the file into the list of activities.
+        Iterates over the days having activities, in chronological order, using the day schedules.
+        :param start_date: the first calendar date (included), as a dictionary, or None to start from the first day
+        :param end_date: the last calendar date (included), as a dictionary, or None to continue until the last day
+        :return: a generator of (date key, mask of the occupied hours, number of activities) triples
+        """
+        self.__load_activities_from_file_into_memory()
+        return super().iterate_day_schedules(start_date, end_date)
+
+    def get_participant_schedule(self, participant_id, start_date, end_date):
+        """
+        Loads all the activities from the file into the list of activities.
+        Computes the occupied hours of a person in every day between two dates.
+        :param participant_id: the ID of the person
+        :param start_date: the first calendar date (included), as a dictionary
+        :param end_date: the last calendar date (included), as a dictionary
+        :return: a dictionary from date keys to the masks of the hours in which the person is busy
+        """
+        self.__load_activities_from_file_into_memory()
+        return super().get_participant_schedule(participant_id, start_date, end_date)
+
+    def iterate_days_by_number_of_activities(self, start_date=None, end_date=None):
+        """
+        Loads all the activities from the file into the list of activities.
+        Iterates over the days having activities in ascending order of their number of activities, then of their date.
+        :param start_date: the first calendar date (included), as a dictionary, or None to start from the first day
+        :param end_date: the last calendar date (included), as a dictionary, or None to continue until the last day
+        :return: a generator of (number of activities, date key) pairs
+        """
+        self.__load_activities_from_file_into_memory()
+        return super().iterate_days_by_number_of_activities(start_date, end_date)
+
+    def find_activities_by_description(self, searched_description):
+        """
+        Loads all the activities from the file into the list of activities.
+        Finds all the activities whose lowercased descriptions contain a text, using the description index.
+        :param searched_description: the searched text (lowercase)
+        :return: a list containing the found activities, in the order of the list of activities
+        """
+        self.__load_activities_from_file_into_memory()
+        return super().find_activities_by_description(searched_description)
+
+    def iterate_activities_chronologically(self, start_date=None, end_date=None):
+        """
+        Loads all the activities from the file into the list of activities.
+        Iterates over the activities in chronological order (by date, then by hour), using the timeline.
+        :param start_date: the first calendar date (included), as a dictionary, or None to start from the first activity
+        :param end_date: the last calendar date (included), as a dictionary, or None to continue until the last activity
+        :return: a generator of activities
+        """
+        self.__load_activities_from_file_into_memory()
+        return super().iterate_activities_chronologically(start_date, end_date)
+
+    def query_activities(self, start_date=None, end_date=None, participant_id=None, searched_description=None,
+                         start_hour=None, end_hour=None):
+        """
+        Loads all the activities from the file into the list of activities.
+        Iterates over the activities matching any combination of criteria, in chronological order.
+        :return: a generator of the matching activities
+        """
+        self.__load_activities_from_file_into_memory()
+        return super().query_activities(start_date, end_date, participant_id, searched_description, start_hour,
+                                        end_hour)
+
+    def get_generation(self):
+        """
+        Loads all the activities from the file into the list of activities.
+        Returns the generation of the repository, which is increased by every change of the activities.
+        """
+        self.__load_activities_from_file_into_memory()
+        return super().get_generation()
+
     def get_all_activities_list(self):
         """
         Loads all the activities from the file into the list of activities.
@@ -284,6 +475,14 @@ class BinaryFileActivityRepository(ActivityRepository):
         self.__load_activities_from_file_into_memory()
         return super().get_all_activities_list()
 
+    def get_columnar_index(self):
+        """
+        Loads all the activities from the file into the list of activities.
+        Returns the columnar index of the activities, used by the analytics engine of the statistics service.
+        """
+        self.__load_activities_from_file_into_memory()
+        return super().get_columnar_index()
+
     def get_number_of_activities(self):
         """
         Loads all the activities from the file into the list of activities.
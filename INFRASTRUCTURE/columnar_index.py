@@ -0,0 +1,173 @@
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+from INFRASTRUCTURE.indexes import HOURS_PER_DAY
+
+"""
+Optional columnar index of the activities, used by the analytics engine of the statistics service for the statistics
+over all the activities (not only the upcoming ones) when NumPy is installed:
+    pip install numpy
+Without NumPy, the statistics service computes the same statistics in pure Python.
+
+The activities are kept in columns (one NumPy array per attribute) instead of objects:
+    ids            = [1000, 1001, 1002]
+    date_keys      = [20201130, 20201130, 20201201]      (yyyymmdd, see Utility.convert_calendar_date_to_key)
+    hours          = [19, 20, 9]
+The participants are kept in a second table, with one row for every (activity, participant) pair:
+    activities_ids = [1000, 1000, 1001, 1002]
+    persons_ids    = [204, 159, 204, 733]
+Both tables are growable arrays (their capacity is doubled when they are full) and a row is removed by moving the last
+row in its place, so adding or removing an activity takes constant time (per participant), not a rebuild of the arrays.
+"""
+
+MINIMUM_CAPACITY = 64
+
+
+def is_numpy_available():
+    """
+    Checks whether NumPy is installed, i.e. whether the columnar index (and the analytics engine) can be used.
+    :return: True if NumPy can be imported, False otherwise
+    """
+    return numpy is not None
+
+
+class ColumnarIndex:
+    """
+    Class used to instantiate columnar indexes of the activities, which answer the statistics over all the activities
+        with vectorized NumPy operations instead of walking the activities one by one.
+    Like the other indexes, a columnar index is maintained incrementally by the activity repository.
+    """
+
+    def __init__(self):
+        """
+        The constructor of an empty columnar index.
+        Raises ImportError if NumPy is not installed.
+        """
+        if numpy is None:
+            raise ImportError("The columnar analytics engine needs NumPy!")
+        self.__ids = numpy.zeros(MINIMUM_CAPACITY, dtype=numpy.int64)
+        self.__date_keys = numpy.zeros(MINIMUM_CAPACITY, dtype=numpy.int64)
+        self.__hours = numpy.zeros(MINIMUM_CAPACITY, dtype=numpy.int64)
+        self.__number_of_rows = 0
+        self.__rows_by_id = {}
+        self.__participations_activities_ids = numpy.zeros(MINIMUM_CAPACITY, dtype=numpy.int64)
+        self.__participations_persons_ids = numpy.zeros(MINIMUM_CAPACITY, dtype=numpy.int64)
+        self.__number_of_participations = 0
+        self.__participations_by_activity_id = {}
+
+    @staticmethod
+    def __grow(column, needed_length):
+        """
+        Makes room in a column for a given number of rows, doubling its capacity if it is full.
+        :param column: the NumPy array
+        :param needed_length: the number of rows the column must be able to hold
+        :return: the column itself if it is large enough, or a larger copy of it otherwise
+        """
+        if needed_length <= len(column):
+            return column
+        grown_column = numpy.zeros(max(needed_length, 2 * len(column)), dtype=column.dtype)
+        grown_column[:len(column)] = column
+        return grown_column
+
+    def add(self, activity_id, date_key, hour, participants_ids):
+        """
+        Adds an activity to the index, as the last row of the activities table.
+        :param activity_id: the ID of the activity
+        :param date_key: the date key of the activity
+        :param hour: the hour of the activity
+        :param participants_ids: the IDs of the participants of the activity
+        """
+        row = self.__number_of_rows
+        self.__ids = self.__grow(self.__ids, row + 1)
+        self.__date_keys = self.__grow(self.__date_keys, row + 1)
+        self.__hours = self.__grow(self.__hours, row + 1)
+        self.__ids[row] = activity_id
+        self.__date_keys[row] = date_key
+        self.__hours[row] = hour
+        self.__rows_by_id[activity_id] = row
+        self.__number_of_rows += 1
+
+        participations = []
+        for participant_id in participants_ids:
+            participation = self.__number_of_participations
+            self.__participations_activities_ids = self.__grow(self.__participations_activities_ids,
+                                                               participation + 1)
+            self.__participations_persons_ids = self.__grow(self.__participations_persons_ids, participation + 1)
+            self.__participations_activities_ids[participation] = activity_id
+            self.__participations_persons_ids[participation] = participant_id
+            participations.append(participation)
+            self.__number_of_participations += 1
+        self.__participations_by_activity_id[activity_id] = participations
+
+    def __remove_participation(self, participation):
+        """
+        Removes a row of the participants table, by moving the last row in its place.
+        :param participation: the index of the row
+        """
+        last_participation = self.__number_of_participations - 1
+        if participation != last_participation:
+            moved_activity_id = int(self.__participations_activities_ids[last_participation])
+            self.__participations_activities_ids[participation] = moved_activity_id
+            self.__participations_persons_ids[participation] = self.__participations_persons_ids[last_participation]
+            moved_participations = self.__participations_by_activity_id[moved_activity_id]
+            moved_participations[moved_participations.index(last_participation)] = participation
+        self.__number_of_participations = last_participation
+
+    def remove(self, activity_id):
+        """
+        Removes an activity from the index (the activity must be in the index), by moving the last row of the
+            activities table in its place.
+        :param activity_id: the ID of the activity
+        """
+        row = self.__rows_by_id.pop(activity_id)
+        last_row = self.__number_of_rows - 1
+        if row != last_row:
+            moved_activity_id = int(self.__ids[last_row])
+            self.__ids[row] = moved_activity_id
+            self.__date_keys[row] = self.__date_keys[last_row]
+            self.__hours[row] = self.__hours[last_row]
+            self.__rows_by_id[moved_activity_id] = row
+        self.__number_of_rows = last_row
+
+        # from the last row to the first one, so that the last row of the table never belongs to the removed activity
+        for participation in sorted(self.__participations_by_activity_id.pop(activity_id), reverse=True):
+            self.__remove_participation(participation)
+
+    def clear(self):
+        """ Removes all the activities from the index (the capacity of the arrays is kept) """
+        self.__number_of_rows = 0
+        self.__rows_by_id.clear()
+        self.__number_of_participations = 0
+        self.__participations_by_activity_id.clear()
+
+    def __len__(self):
+        """ The number of activities in the index """
+        return self.__number_of_rows
+
+    def count_by_hour(self):
+        """
+        Counts the activities starting at each hour of the day.
+        :return: a list of 24 integers, the i-th one being the number of activities starting at hour i
+        """
+        hours = self.__hours[:self.__number_of_rows]
+        return [int(count) for count in numpy.bincount(hours, minlength=HOURS_PER_DAY)]
+
+    def count_by_participant(self):
+        """
+        Counts the activities of each participant.
+        :return: a dictionary from the IDs of the participants to their numbers of activities, sorted by ID
+        """
+        persons_ids = self.__participations_persons_ids[:self.__number_of_participations]
+        participants_ids, counts = numpy.unique(persons_ids, return_counts=True)
+        return {int(participant_id): int(count) for participant_id, count in zip(participants_ids, counts)}
+
+    def count_by_month(self):
+        """
+        Counts the activities of each month.
+        :return: a dictionary from (year, month) tuples to the numbers of activities, sorted chronologically
+        """
+        month_keys, counts = numpy.unique(self.__date_keys[:self.__number_of_rows] // 100, return_counts=True)
+        return {(int(month_key // 100), int(month_key % 100)): int(count)
+                for month_key, count in zip(month_keys, counts)}
@@ -0,0 +1,70 @@
+import threading
+
+DEFAULT_BATCH_SIZE = 1
+
+
+class GroupCommit:
+    """
+    Class used to instantiate group commits, i.e. objects that coalesce the changes of a file repository, so that the
+        file is rewritten once per batch of changes instead of once per change.
+    The pending changes are written:
+        - when their number reaches the batch size;
+        - when the time window (in seconds) has passed since the oldest pending change, by a timer armed at that
+            change, so that an idle application does not keep its changes in memory longer than the time window;
+        - when flush() is called (e.g. when the application stops).
+    With the default batch size (1), every change is written immediately.
+    Since the timer writes the data from another thread, the repositories make their changes while holding the lock of
+        the group commit, so the data is never written in the middle of a change.
+    """
+
+    def __init__(self, write_function, batch_size=DEFAULT_BATCH_SIZE, time_window=None):
+        """
+        The constructor of a group commit.
+        :param write_function: the function (without parameters) that writes the data from memory into the file
+        :param batch_size: the number of changes after which the data is written
+        :param time_window: the number of seconds after which the pending changes are written, or None if the
+            changes are written only by batch size or by flush()
+        """
+        self.__write_function = write_function
+        self.__batch_size = max(1, batch_size)
+        self.__time_window = time_window
+        self.__pending_changes = 0
+        self.__timer = None
+        self.__lock = threading.RLock()
+
+    @property
+    def pending_changes(self):
+        """ The number of changes that have not been written yet """
+        return self.__pending_changes
+
+    @property
+    def lock(self):
+        """ The (reentrant) lock which must be held while the data from memory is changed """
+        return self.__lock
+
+    def register_change(self):
+        """
+        Registers a change of the data from memory, writing the data if the batch is full, or arming the timer of the
+            time window if this is the first pending change.
+        """
+        with self.__lock:
+            self.__pending_changes += 1
+            if self.__pending_changes >= self.__batch_size:
+                self.flush()
+            elif self.__time_window is not None and self.__timer is None:
+                self.__timer = threading.Timer(self.__time_window, self.flush)
+                self.__timer.daemon = True
+                self.__timer.start()
+
+    def flush(self):
+        """
+        Writes the data from memory, if there are pending changes, and disarms the timer of the time window.
+        """
+        with self.__lock:
+            if self.__timer is not None:
+                self.__timer.cancel()
+                self.__timer = None
+            if self.__pending_changes == 0:
+                return
+            self.__write_function()
+            self.__pending_changes = 0
@@ -0,0 +1,791 @@
+import bisect
+import math
+
+"""
+Indexes used by the repositories in order to answer searches without scanning all the entities.
+Each index is maintained incrementally: the repositories add an entity to their indexes when it is saved (or after
+it is updated) and remove it when it is removed (or before it is updated).
+"""
+
+TRIGRAM_LENGTH = 3
+MAXIMUM_SORTED_INSERTIONS = 64
+DEFAULT_MAXIMUM_EDIT_DISTANCE = 2
+MINIMUM_EMPTY_NODES = 64
+HOURS_PER_DAY = 24
+
+
+class TrigramIndex:
+    """
+    Class used to instantiate trigram indexes, i.e. inverted indexes from the trigrams (substrings of length 3) of some
+        lowercased texts to the keys (IDs) of the texts, used for case insensitive substring search.
+    A text can contain a searched substring only if it contains all the trigrams of the substring, so the candidates
+        are found by intersecting the posting lists (sets of keys) of those trigrams, and only the candidates are then
+        checked. Substrings shorter than a trigram are checked against all the lowercased texts.
+        e.g. "shopping" -> {"sho", "hop", "opp", "ppi", "pin", "ing"}
+    """
+
+    def __init__(self):
+        """
+        The constructor of an empty trigram index.
+        """
+        self.__texts = {}
+        self.__postings = {}
+
+    @staticmethod
+    def __get_trigrams(text):
+        """
+        Computes the set of trigrams of a text.
+        :param text: the text
+        :return: the set of all the substrings of length 3 of the text (empty if the text is shorter)
+        """
+        return {text[position:position + TRIGRAM_LENGTH] for position in range(len(text) - TRIGRAM_LENGTH + 1)}
+
+    def add(self, key, text):
+        """
+        Indexes a text.
+        :param key: the key of the text (e.g. the ID of the person whose name is indexed)
+        :param text: the text to be indexed; it is lowercased before being indexed
+        """
+        lowercased_text = text.lower()
+        self.__texts[key] = lowercased_text
+        for trigram in self.__get_trigrams(lowercased_text):
+            self.__postings.setdefault(trigram, set()).add(key)
+
+    def remove(self, key):
+        """
+        Removes the text having the given key from the index (nothing happens if there is no such text).
+        :param key: the key of the text
+        """
+        lowercased_text = self.__texts.pop(key, None)
+        if lowercased_text is None:
+            return
+        for trigram in self.__get_trigrams(lowercased_text):
+            posting = self.__postings[trigram]
+            posting.discard(key)
+            if len(posting) == 0:
+                del self.__postings[trigram]
+
+    def clear(self):
+        """ Removes all the texts from the index """
+        self.__texts.clear()
+        self.__postings.clear()
+
+    def search(self, substring):
+        """
+        Finds the keys of the texts that contain a substring.
+        The substring is not lowercased, so (just like "substring in text.lower()") it must be lowercase in order to
+            match anything.
+        :param substring: the searched substring
+        :return: the list of the keys of the lowercased texts containing the substring (in no particular order)
+        """
+        trigrams = self.__get_trigrams(substring)
+        if len(trigrams) == 0:
+            candidates = self.__texts.keys()
+        else:
+            postings = sorted((self.__postings.get(trigram, set()) for trigram in trigrams), key=len)
+            candidates = postings[0].intersection(*postings[1:])
+        return [key for key in candidates if substring in self.__texts[key]]
+
+    def estimate_matches(self, substring):
+        """
+        Estimates the number of texts containing a substring without searching them, i.e. returns an upper bound of
+            their number: the size of the smallest posting list of the trigrams of the substring (or the number of all
+            the texts, for substrings shorter than a trigram).
+        :param substring: the searched substring
+        :return: the estimated number of texts containing the substring
+        """
+        trigrams = self.__get_trigrams(substring)
+        if len(trigrams) == 0:
+            return len(self.__texts)
+        return min(len(self.__postings.get(trigram, ())) for trigram in trigrams)
+
+
+class BufferedSortedList:
+    """
+    Class used to instantiate sorted lists whose insertions are buffered.
+    The added items are merged into the sorted list only when the list is read or an item is removed: a few items are
+        inserted at their sorted positions (found by binary search), while many items (e.g. after loading a repository)
+        are appended and the whole list is sorted once, so that loading n items does not cost n sorted insertions.
+    The removed items are deleted at their sorted positions, unless they are still buffered, in which case they are
+        simply dropped from the buffer (so an item added and removed soon after never reaches the sorted list).
+    The items must be hashable.
+    """
+
+    def __init__(self):
+        """
+        The constructor of an empty sorted list.
+        """
+        self.__items = []
+        self.__pending_items = {}
+        self.__pending_items_count = 0
+
+    def __merge_pending_items(self):
+        """
+        Merges the buffered items into the sorted list.
+        """
+        if self.__pending_items_count == 0:
+            return
+        if self.__pending_items_count > MAXIMUM_SORTED_INSERTIONS:
+            for item, occurrences in self.__pending_items.items():
+                self.__items.extend([item] * occurrences)
+            self.__items.sort()
+        else:
+            for item, occurrences in self.__pending_items.items():
+                for _ in range(occurrences):
+                    bisect.insort(self.__items, item)
+        self.__pending_items = {}
+        self.__pending_items_count = 0
+
+    def add(self, item):
+        """
+        Adds an item to the list.
+        :param item: the item to be added
+        """
+        self.__pending_items[item] = self.__pending_items.get(item, 0) + 1
+        self.__pending_items_count += 1
+
+    def remove(self, item):
+        """
+        Removes an item from the list (the item must be in the list).
+        :param item: the item to be removed
+        """
+        occurrences = self.__pending_items.get(item, 0)
+        if occurrences > 0:
+            if occurrences == 1:
+                del self.__pending_items[item]
+            else:
+                self.__pending_items[item] = occurrences - 1
+            self.__pending_items_count -= 1
+            return
+        self.__merge_pending_items()
+        del self.__items[bisect.bisect_left(self.__items, item)]
+
+    def clear(self):
+        """ Removes all the items from the list """
+        self.__items.clear()
+        self.__pending_items.clear()
+        self.__pending_items_count = 0
+
+    def iterate_from(self, lowest_item):
+        """
+        Iterates over the items of the list in ascending order, starting from the first item not lower than a given one.
+        The list must not be changed while it is iterated.
+        :param lowest_item: the item from which the iteration starts (it does not have to be in the list)
+        :return: a generator of the items greater than or equal to lowest_item
+        """
+        self.__merge_pending_items()
+        position = bisect.bisect_left(self.__items, lowest_item)
+        items = self.__items
+        while position < len(items):
+            yield items[position]
+            position += 1
+
+    def count_between(self, lowest_item, highest_item):
+        """
+        Counts the items of the list between two items, in logarithmic time.
+        :param lowest_item: the lower bound (included)
+        :param highest_item: the upper bound (excluded)
+        :return: the number of items that are greater than or equal to lowest_item and lower than highest_item
+        """
+        self.__merge_pending_items()
+        return bisect.bisect_left(self.__items, highest_item) - bisect.bisect_left(self.__items, lowest_item)
+
+    def __len__(self):
+        """ The length of the list, including the buffered items """
+        return len(self.__items) + self.__pending_items_count
+
+
+class SuffixArrayIndex:
+    """
+    Class used to instantiate suffix array indexes, used for substring search over short texts (e.g. phone numbers).
+    The index keeps all the suffixes of all the texts in a sorted list of (suffix, key) pairs. A text contains a
+        searched substring if and only if one of its suffixes starts with the substring, and all these suffixes are
+        adjacent in the sorted list, so they are found by a binary search followed by a walk over the matches.
+        e.g. "0745" -> ("0745", key), ("745", key), ("45", key), ("5", key)
+    """
+
+    def __init__(self):
+        """
+        The constructor of an empty suffix array index.
+        """
+        self.__texts = {}
+        self.__suffixes = BufferedSortedList()
+
+    def add(self, key, text):
+        """
+        Indexes a text.
+        :param key: the key of the text (e.g. the ID of the person whose phone number is indexed)
+        :param text: the text to be indexed
+        """
+        self.__texts[key] = text
+        for position in range(len(text)):
+            self.__suffixes.add((text[position:], key))
+
+    def remove(self, key):
+        """
+        Removes the text having the given key from the index (nothing happens if there is no such text).
+        :param key: the key of the text
+        """
+        text = self.__texts.pop(key, None)
+        if text is None:
+            return
+        for position in range(len(text)):
+            self.__suffixes.remove((text[position:], key))
+
+    def clear(self):
+        """ Removes all the texts from the index """
+        self.__texts.clear()
+        self.__suffixes.clear()
+
+    def search(self, substring):
+        """
+        Finds the keys of the texts that contain a substring.
+        :param substring: the searched substring
+        :return: the list of the keys of the texts containing the substring (in no particular order)
+        """
+        if substring == "":
+            return list(self.__texts.keys())
+
+        found_keys = set()
+        for suffix, key in self.__suffixes.iterate_from((substring,)):
+            if suffix.startswith(substring) is False:
+                break
+            found_keys.add(key)
+        return list(found_keys)
+
+
+class TimelineIndex:
+    """
+    Class used to instantiate timeline indexes, i.e. sorted lists of (date key, hour, activity ID) entries, used to
+        iterate over the activities in chronological order and to answer date range queries with a binary search
+        followed by a walk over the k found entries (O(log n + k)).
+    The date key of a calendar date is the integer yyyymmdd (see Utility.convert_calendar_date_to_key), which has the
+        same order as the dates.
+    """
+
+    def __init__(self):
+        """
+        The constructor of an empty timeline index.
+        """
+        self.__entries = BufferedSortedList()
+
+    def add(self, activity_id, date_key, hour):
+        """
+        Adds an activity to the timeline.
+        :param activity_id: the ID of the activity
+        :param date_key: the date key of the activity
+        :param hour: the hour of the activity
+        """
+        self.__entries.add((date_key, hour, activity_id))
+
+    def remove(self, activity_id, date_key, hour):
+        """
+        Removes an activity from the timeline (the activity must be in the timeline, having the same date and hour).
+        :param activity_id: the ID of the activity
+        :param date_key: the date key of the activity
+        :param hour: the hour of the activity
+        """
+        self.__entries.remove((date_key, hour, activity_id))
+
+    def clear(self):
+        """ Removes all the activities from the timeline """
+        self.__entries.clear()
+
+    def iterate_between(self, start_date_key=None, end_date_key=None):
+        """
+        Iterates over the activities taking place between two dates, in chronological order.
+        :param start_date_key: the date key of the first date (included), or None to start from the first activity
+        :param end_date_key: the date key of the last date (included), or None to continue until the last activity
+        :return: a generator of (date key, hour, activity ID) entries
+        """
+        lowest_entry = () if start_date_key is None else (start_date_key,)
+        for entry in self.__entries.iterate_from(lowest_entry):
+            if end_date_key is not None and entry[0] > end_date_key:
+                return
+            yield entry
+
+    def count_between(self, start_date_key=None, end_date_key=None):
+        """
+        Counts the activities taking place between two dates (both included), in logarithmic time.
+        :param start_date_key: the date key of the first date, or None to count from the first activity
+        :param end_date_key: the date key of the last date, or None to count until the last activity
+        :return: the number of activities
+        """
+        lowest_entry = () if start_date_key is None else (start_date_key,)
+        highest_entry = (math.inf,) if end_date_key is None else (end_date_key + 1,)
+        return self.__entries.count_between(lowest_entry, highest_entry)
+
+    def __len__(self):
+        """ The number of activities in the timeline """
+        return len(self.__entries)
+
+
+def compute_edit_distance(first_text, second_text):
+    """
+    Computes the edit (Levenshtein) distance between two texts, i.e. the minimum number of inserted, removed or
+        replaced characters needed to turn one text into the other.
+        e.g. compute_edit_distance("jsoh", "john") -> 2
+    :param first_text: the first text
+    :param second_text: the second text
+    :return: the edit distance
+    """
+    if len(first_text) < len(second_text):
+        first_text, second_text = second_text, first_text
+    previous_row = list(range(len(second_text) + 1))
+    for first_position, first_character in enumerate(first_text, start=1):
+        current_row = [first_position]
+        for second_position, second_character in enumerate(second_text, start=1):
+            current_row.append(min(previous_row[second_position] + 1,
+                                   current_row[second_position - 1] + 1,
+                                   previous_row[second_position - 1] + (first_character != second_character)))
+        previous_row = current_row
+    return previous_row[-1]
+
+
+class BKTreeIndex:
+    """
+    Class used to instantiate BK-tree indexes, used for fuzzy search, i.e. finding the texts which are at most a given
+        edit distance away from a searched text.
+    The indexed terms of a text are its normalized form (lowercased, with single spaces between words) and each of its
+        words, so that "Jsoh" also finds "John Smith". Each node of the tree is a term, and its children are kept by
+        their edit distance to it. Since the edit distance is a metric, a search for the terms at most k edits away
+        from a text being d edits away from a node only has to visit the children at distances in [d - k, d + k].
+    The nodes of the removed terms stay in the tree (with no keys), because the other nodes are placed relative to
+        them; the tree is rebuilt when there are more empty nodes than used ones.
+    """
+
+    def __init__(self):
+        """
+        The constructor of an empty BK-tree index.
+        """
+        self.__root = None
+        self.__nodes_by_term = {}
+        self.__terms_by_key = {}
+        self.__empty_nodes = 0
+
+    @staticmethod
+    def normalize(text):
+        """
+        Normalizes a text: lowercases it and replaces all its white spaces by single spaces.
+        :param text: the text
+        :return: the normalized text
+        """
+        return " ".join(text.lower().split())
+
+    def __get_terms(self, text):
+        """
+        Computes the terms under which a text is indexed.
+        :param text: the text
+        :return: the set containing the normalized text and its words
+        """
+        normalized_text = self.normalize(text)
+        return {normalized_text} | set(normalized_text.split())
+
+    def __insert_term(self, term):
+        """
+        Finds the node of a term, inserting a new node in the tree if the term does not have one.
+        A node is a list [term, set of keys, dictionary of children by edit distance].
+        :param term: the term
+        :return: the node of the term
+        """
+        node = self.__nodes_by_term.get(term)
+        if node is not None:
+            return node
+        new_node = [term, set(), {}]
+        self.__nodes_by_term[term] = new_node
+        if self.__root is None:
+            self.__root = new_node
+            return new_node
+        node = self.__root
+        while True:
+            distance = compute_edit_distance(term, node[0])
+            child = node[2].get(distance)
+            if child is None:
+                node[2][distance] = new_node
+                return new_node
+            node = child
+
+    def add(self, key, text):
+        """
+        Indexes a text.
+        :param key: the key of the text (e.g. the ID of the person whose name is indexed)
+        :param text: the text to be indexed
+        """
+        terms = self.__get_terms(text)
+        self.__terms_by_key[key] = terms
+        for term in terms:
+            is_new_term = term not in self.__nodes_by_term
+            node = self.__insert_term(term)
+            if len(node[1]) == 0 and is_new_term is False:
+                self.__empty_nodes -= 1
+            node[1].add(key)
+
+    def remove(self, key):
+        """
+        Removes the text having the given key from the index (nothing happens if there is no such text).
+        :param key: the key of the text
+        """
+        terms = self.__terms_by_key.pop(key, None)
+        if terms is None:
+            return
+        for term in terms:
+            node = self.__nodes_by_term[term]
+            node[1].discard(key)
+            if len(node[1]) == 0:
+                self.__empty_nodes += 1
+        if self.__empty_nodes > max(MINIMUM_EMPTY_NODES, len(self.__nodes_by_term) - self.__empty_nodes):
+            self.__rebuild()
+
+    def __rebuild(self):
+        """
+        Rebuilds the tree using only the nodes that still have keys.
+        """
+        used_nodes = [node for node in self.__nodes_by_term.values() if len(node[1]) > 0]
+        self.__root = None
+        self.__nodes_by_term = {}
+        self.__empty_nodes = 0
+        for used_node in used_nodes:
+            self.__insert_term(used_node[0])[1].update(used_node[1])
+
+    def clear(self):
+        """ Removes all the texts from the index """
+        self.__root = None
+        self.__nodes_by_term.clear()
+        self.__terms_by_key.clear()
+        self.__empty_nodes = 0
+
+    def search(self, text, maximum_distance=DEFAULT_MAXIMUM_EDIT_DISTANCE):
+        """
+        Finds the keys of the texts having a term at most a given edit distance away from the normalized searched text.
+        :param text: the searched text
+        :param maximum_distance: the maximum edit distance
+        :return: a dictionary from the keys of the found texts to their smallest edit distance to the searched text
+        """
+        searched_term = self.normalize(text)
+        distances_by_key = {}
+        nodes_to_visit = [] if self.__root is None else [self.__root]
+        while len(nodes_to_visit) > 0:
+            term, keys, children = nodes_to_visit.pop()
+            distance = compute_edit_distance(searched_term, term)
+            if distance <= maximum_distance:
+                for key in keys:
+                    if distance < distances_by_key.get(key, distance + 1):
+                        distances_by_key[key] = distance
+            for child_distance in range(distance - maximum_distance, distance + maximum_distance + 1):
+                child = children.get(child_distance)
+                if child is not None:
+                    nodes_to_visit.append(child)
+        return distances_by_key
+
+
+class DayScheduleIndex:
+    """
+    Class used to instantiate day schedule indexes, i.e. dictionaries from date keys to the schedules of the days.
+    Since every activity occupies one hour of a day, the schedule of a day is a 24 bit mask of the occupied hours (bit h
+        is set if there is an activity at hour h) together with a table of 24 slots holding the activities:
+        e.g. activities at 9:00 and 19:00 -> mask 0b10000000000001000000000, slots [None, ..., [a9], ..., [a19], ...]
+    A slot usually holds a single activity, but it holds several ones when the repository lets the activities of
+        different persons take place at the same time.
+    Checking whether an hour is occupied is a single bit test, and the activities of a day are found in chronological
+        order by walking the set bits of the mask, without any sort. The days without activities are not kept, and the
+        date keys of the kept days are also sorted, so the days from a given date on are found with a binary search.
+    """
+
+    def __init__(self):
+        """
+        The constructor of an empty day schedule index.
+        """
+        self.__schedules = {}
+        self.__date_keys = BufferedSortedList()
+
+    def add(self, date_key, hour, value):
+        """
+        Places a value (e.g. an activity) in an hour slot of a day, after the values already placed there, if any.
+        :param date_key: the date key of the day
+        :param hour: the hour, in [0, 23]
+        :param value: the value
+        """
+        schedule = self.__schedules.get(date_key)
+        if schedule is None:
+            schedule = [0, [None] * HOURS_PER_DAY, 0]
+            self.__schedules[date_key] = schedule
+            self.__date_keys.add(date_key)
+        slots = schedule[1]
+        if slots[hour] is None:
+            slots[hour] = [value]
+            schedule[0] |= 1 << hour
+        else:
+            slots[hour].append(value)
+        schedule[2] += 1
+
+    def remove(self, date_key, hour, value):
+        """
+        Removes a value from an hour slot of a day, if the slot holds it (nothing happens otherwise).
+        :param date_key: the date key of the day
+        :param hour: the hour, in [0, 23]
+        :param value: the value expected in the slot
+        """
+        schedule = self.__schedules.get(date_key)
+        if schedule is None or schedule[1][hour] is None:
+            return
+        slot = schedule[1][hour]
+        for position, slot_value in enumerate(slot):
+            if slot_value is value:
+                del slot[position]
+                break
+        else:
+            return
+        schedule[2] -= 1
+        if len(slot) == 0:
+            schedule[0] &= ~(1 << hour)
+            schedule[1][hour] = None
+            if schedule[0] == 0:
+                del self.__schedules[date_key]
+                self.__date_keys.remove(date_key)
+
+    def clear(self):
+        """ Removes all the days from the index """
+        self.__schedules.clear()
+        self.__date_keys.clear()
+
+    def get_occupied_hours(self, date_key):
+        """
+        Gets the mask of the occupied hours of a day.
+        :param date_key: the date key of the day
+        :return: the mask having bit h set if hour h is occupied (0 for a day without activities)
+        """
+        schedule = self.__schedules.get(date_key)
+        return 0 if schedule is None else schedule[0]
+
+    def is_occupied(self, date_key, hour):
+        """
+        Checks whether an hour of a day is occupied, with a single bit test.
+        :param date_key: the date key of the day
+        :param hour: the hour, in [0, 23]
+        :return: True if there is a value in the slot, False otherwise
+        """
+        return self.get_occupied_hours(date_key) >> hour & 1 == 1
+
+    def get(self, date_key, hour):
+        """
+        Gets the values placed in an hour slot of a day.
+        :param date_key: the date key of the day
+        :param hour: the hour, in [0, 23]
+        :return: a tuple containing the values, in the order in which they were placed (empty if the slot is free)
+        """
+        schedule = self.__schedules.get(date_key)
+        if schedule is None or schedule[1][hour] is None:
+            return ()
+        return tuple(schedule[1][hour])
+
+    def iterate_day(self, date_key):
+        """
+        Iterates over the values placed in the slots of a day, in the order of the hours.
+        :param date_key: the date key of the day
+        :return: a generator of the values
+        """
+        schedule = self.__schedules.get(date_key)
+        if schedule is None:
+            return
+        occupied_hours, slots, _ = schedule
+        while occupied_hours != 0:
+            lowest_hour_bit = occupied_hours & -occupied_hours
+            yield from slots[lowest_hour_bit.bit_length() - 1]
+            occupied_hours ^= lowest_hour_bit
+
+    def iterate_days(self, start_date_key=None, end_date_key=None):
+        """
+        Iterates over the days having activities, in chronological order, optionally only between two dates.
+        The index must not be changed while it is iterated.
+        :param start_date_key: the date key of the first date (included), or None to start from the first day
+        :param end_date_key: the date key of the last date (included), or None to continue until the last day
+        :return: a generator of (date key, mask of the occupied hours, number of values) triples
+        """
+        lowest_date_key = 0 if start_date_key is None else start_date_key
+        for date_key in self.__date_keys.iterate_from(lowest_date_key):
+            if end_date_key is not None and date_key > end_date_key:
+                return
+            occupied_hours, _, number_of_values = self.__schedules[date_key]
+            yield date_key, occupied_hours, number_of_values
+
+
+class PersonScheduleIndex:
+    """
+    Class used to instantiate person schedule indexes, i.e. the busy hours of every person in every day:
+        person ID -> date key -> 24 bit mask of the hours in which the person takes part in an activity
+        e.g. person 204 has activities on 30.11.2020 at 9:00 and 19:00 -> {204: {20201130: 1 << 9 | 1 << 19}}
+    Checking whether a person is busy at an hour is a dictionary lookup and a single bit test, so the conflicts of a
+        new activity are found in O(number of participants), whatever the number of activities.
+    A person can only be booked twice at the same hour when the repository does not check the conflicts of the persons;
+        these double bookings are counted apart, so that the bit of the hour is kept until the last of the activities
+        of the person at that hour is removed.
+    """
+
+    def __init__(self):
+        """
+        The constructor of an empty person schedule index.
+        """
+        self.__schedules = {}
+        self.__double_bookings = {}
+
+    def add(self, person_id, date_key, hour):
+        """
+        Marks a person as busy at an hour of a day.
+        :param person_id: the ID of the person
+        :param date_key: the date key of the day
+        :param hour: the hour, in [0, 23]
+        """
+        person_schedule = self.__schedules.setdefault(person_id, {})
+        occupied_hours = person_schedule.get(date_key, 0)
+        if occupied_hours >> hour & 1 == 1:
+            booking_key = (person_id, date_key, hour)
+            self.__double_bookings[booking_key] = self.__double_bookings.get(booking_key, 0) + 1
+        else:
+            person_schedule[date_key] = occupied_hours | 1 << hour
+
+    def remove(self, person_id, date_key, hour):
+        """
+        Marks a person as not busy anymore at an hour of a day (because one of the activities of the person at that hour
+            was removed).
+        :param person_id: the ID of the person
+        :param date_key: the date key of the day
+        :param hour: the hour, in [0, 23]
+        """
+        booking_key = (person_id, date_key, hour)
+        double_bookings = self.__double_bookings.get(booking_key)
+        if double_bookings is not None:
+            if double_bookings == 1:
+                del self.__double_bookings[booking_key]
+            else:
+                self.__double_bookings[booking_key] = double_bookings - 1
+            return
+        person_schedule = self.__schedules.get(person_id)
+        if person_schedule is None or date_key not in person_schedule:
+            return
+        occupied_hours = person_schedule[date_key] & ~(1 << hour)
+        if occupied_hours != 0:
+            person_schedule[date_key] = occupied_hours
+            return
+        del person_schedule[date_key]
+        if len(person_schedule) == 0:
+            del self.__schedules[person_id]
+
+    def clear(self):
+        """ Removes all the persons from the index """
+        self.__schedules.clear()
+        self.__double_bookings.clear()
+
+    def get_occupied_hours(self, person_id, date_key):
+        """
+        Gets the mask of the busy hours of a person in a day.
+        :param person_id: the ID of the person
+        :param date_key: the date key of the day
+        :return: the mask having bit h set if the person is busy at hour h (0 for a day without activities)
+        """
+        person_schedule = self.__schedules.get(person_id)
+        return 0 if person_schedule is None else person_schedule.get(date_key, 0)
+
+    def is_occupied(self, person_id, date_key, hour):
+        """
+        Checks whether a person is busy at an hour of a day, with a single bit test.
+        :param person_id: the ID of the person
+        :param date_key: the date key of the day
+        :param hour: the hour, in [0, 23]
+        :return: True if the person takes part in an activity at that hour, False otherwise
+        """
+        return self.get_occupied_hours(person_id, date_key) >> hour & 1 == 1
+
+    def get_schedule(self, person_id, start_date_key=None, end_date_key=None):
+        """
+        Gets the busy hours of a person in every day, optionally only between two dates.
+        :param person_id: the ID of the person
+        :param start_date_key: the date key of the first date (included), or None to start from the first day
+        :param end_date_key: the date key of the last date (included), or None to continue until the last day
+        :return: a dictionary from the date keys of the days in which the person is busy to the masks of the busy hours
+        """
+        lowest_date_key = -math.inf if start_date_key is None else start_date_key
+        highest_date_key = math.inf if end_date_key is None else end_date_key
+        return {date_key: occupied_hours
+                for date_key, occupied_hours in self.__schedules.get(person_id, {}).items()
+                if lowest_date_key <= date_key <= highest_date_key}
+
+
+class DayCountIndex:
+    """
+    Class used to instantiate day count indexes, i.e. the number of activities of every day, kept ordered by (number of
+        activities, date) so that the least (or most) busy days are read off directly.
+    The days are grouped in buckets by their number of activities, each bucket keeping its date keys sorted. Adding or
+        removing an activity moves its day to the neighbouring bucket. There are only a few distinct numbers of
+        activities per day (usually at most one activity per hour), so the days from a given date on are found in
+        ascending order of (number of activities, date) with one binary search per bucket.
+    """
+
+    def __init__(self):
+        """
+        The constructor of an empty day count index.
+        """
+        self.__counts = {}
+        self.__date_keys_by_count = {}
+
+    def __move_day(self, date_key, old_count, new_count):
+        """
+        Moves a day from the bucket of its old number of activities to the bucket of the new one.
+        :param date_key: the date key of the day
+        :param old_count: the old number of activities (0 if the day had no activities)
+        :param new_count: the new number of activities (0 if the day has no activities anymore)
+        """
+        if old_count > 0:
+            old_bucket = self.__date_keys_by_count[old_count]
+            old_bucket.remove(date_key)
+            if len(old_bucket) == 0:
+                del self.__date_keys_by_count[old_count]
+        if new_count > 0:
+            self.__date_keys_by_count.setdefault(new_count, BufferedSortedList()).add(date_key)
+            self.__counts[date_key] = new_count
+        else:
+            del self.__counts[date_key]
+
+    def increment(self, date_key):
+        """
+        Counts one more activity in a day.
+        :param date_key: the date key of the day
+        """
+        count = self.__counts.get(date_key, 0)
+        self.__move_day(date_key, count, count + 1)
+
+    def decrement(self, date_key):
+        """
+        Counts one less activity in a day (the day must have activities).
+        :param date_key: the date key of the day
+        """
+        count = self.__counts[date_key]
+        self.__move_day(date_key, count, count - 1)
+
+    def clear(self):
+        """ Removes all the days from the index """
+        self.__counts.clear()
+        self.__date_keys_by_count.clear()
+
+    def get_count(self, date_key):
+        """
+        Gets the number of activities of a day.
+        :param date_key: the date key of the day
+        :return: the number of activities (0 for a day without activities)
+        """
+        return self.__counts.get(date_key, 0)
+
+    def iterate_by_count(self, start_date_key=None, end_date_key=None):
+        """
+        Iterates over the days having activities in ascending order of their number of activities, then of their date,
+            optionally only over the days between two dates.
+        The index must not be changed while it is iterated.
+        :param start_date_key: the date key of the first date (included), or None to start from the first day
+        :param end_date_key: the date key of the last date (included), or None to continue until the last day
+        :return: a generator of (number of activities, date key) pairs
+        """
+        lowest_date_key = 0 if start_date_key is None else start_date_key
+        for count in sorted(self.__date_keys_by_count):
+            for date_key in self.__date_keys_by_count[count].iterate_from(lowest_date_key):
+                if end_date_key is not None and date_key > end_date_key:
+                    break
+                yield count, date_key
@@ -1,5 +1,18 @@
 from DOMAIN.entities import Person, Activity
 from EXCEPTIONS.custom_exceptions import PersonRepositoryError, ActivityRepositoryError
+from INFRASTRUCTURE.columnar_index import ColumnarIndex
+from INFRASTRUCTURE.indexes import TrigramIndex, SuffixArrayIndex, TimelineIndex, BKTreeIndex, DayScheduleIndex, \
+    DayCountIndex, PersonScheduleIndex, DEFAULT_MAXIMUM_EDIT_DISTANCE
+from UTILITY.utils import Utility
+
+"""
+The conflict modes of the activity repositories, i.e. which activities cannot take place at the same time:
+    planner     -> no two activities (the agenda belongs to a single person, who takes part in all the activities)
+    participant -> no two activities having a common participant (i.e. nobody is booked twice at the same hour)
+"""
+PLANNER_CONFLICTS = "planner"
+PARTICIPANT_CONFLICTS = "participant"
+CONFLICT_MODES = (PLANNER_CONFLICTS, PARTICIPANT_CONFLICTS)
 
 
 class ActivityRepository:
@@ -7,14 +20,53 @@ class ActivityRepository:
     Class used to instantiate an activities repository.
     The repository is a collection of uniquely identifiable objects, so there cannot exist two identical activities
         in the repository (i.e. two activities having the same ID).
+    The activities are stored in a dictionary from their IDs to the activities, kept in the order of the list of
+        activities (an updated activity keeps its place), so that lookups, existence checks and removals by ID take
+        constant time; the list of activities is only a view of this dictionary, built again when it is needed after
+        a removal.
+    Besides the activities, the repository keeps some hash indexes which are updated on every change:
+        - the schedules of the days (a mask of the occupied hours and a table of 24 hour slots for each day), used for
+            conflict checks with a single bit test and to find the activities of a day in chronological order;
+        - the schedules of the persons (a mask of the busy hours of every person in every day), used for the conflict
+            checks of the participant conflict mode, with one bit test per participant;
+        - the number of activities of every day, ordered by (number of activities, date), used for the busiest days;
+        - the IDs of the activities indexed by the IDs of their participants (an inverted index), used to find the
+            activities of a person without scanning all the activities;
+        - a trigram index of the descriptions, used for case insensitive substring search;
+        - a timeline, i.e. the activities sorted by date and hour, used for chronological iteration and for date range
+            queries;
+        - only once the statistics service asks for it (and only if NumPy is installed), a columnar index, i.e. the
+            dates, hours and participants of the activities in NumPy arrays, used by the analytics engine.
+    Each activity also receives an insertion number when it is added to the list of activities, so that the results
+        found through the indexes can be returned in the order of the list of activities.
+    The repository also has a generation, i.e. a counter which is increased by every change of the activities, used by
+        the services to know whether a cached result is still valid.
     """
 
-    def __init__(self):
+    def __init__(self, conflict_mode=PLANNER_CONFLICTS):
         """
         The constructor for a new object of type ActivityRepository.
         The repository is represented as a list of activities, so it is initialized with an empty list.
+        The indexes are initialized with empty dictionaries.
+        Raises ActivityRepositoryError if the conflict mode is not one of CONFLICT_MODES.
+        :param conflict_mode: PLANNER_CONFLICTS if no two activities can take place at the same time, or
+            PARTICIPANT_CONFLICTS if only the activities having a common participant cannot take place at the same time
         """
-        self._activities_list = []
+        if conflict_mode not in CONFLICT_MODES:
+            raise ActivityRepositoryError("The conflict mode must be one of: " + ", ".join(CONFLICT_MODES) + "!\n")
+        self._conflict_mode = conflict_mode
+        self._activities_by_id = {}
+        self._activities_list_view = []
+        self._day_schedules = DayScheduleIndex()
+        self._participant_schedules = PersonScheduleIndex()
+        self._day_counts = DayCountIndex()
+        self._activities_ids_by_participant = {}
+        self._description_index = TrigramIndex()
+        self._timeline = TimelineIndex()
+        self._columnar_index = None
+        self._insertion_numbers = {}
+        self._next_insertion_number = 0
+        self._generation = 0
 
     @property
     def activities_list(self):
@@ -37,6 +89,167 @@ class ActivityRepository:
                 raise ActivityRepositoryError("The list does not contain activities!\n")
 
         self._activities_list = new_activities_list
+        self._rebuild_indexes()
+
+    @property
+    def conflict_mode(self):
+        """ Getter for the conflict mode (PLANNER_CONFLICTS or PARTICIPANT_CONFLICTS) """
+        return self._conflict_mode
+
+    @property
+    def _activities_list(self):
+        """
+        The list of activities, i.e. the activities of the dictionary of activities, in their order.
+        The list is kept between the changes and is only built again after a removal (or after the whole list was
+            replaced), so reading it does not copy the activities every time.
+        """
+        if self._activities_list_view is None:
+            self._activities_list_view = list(self._activities_by_id.values())
+        return self._activities_list_view
+
+    @_activities_list.setter
+    def _activities_list(self, new_activities_list):
+        """
+        Replaces the list of activities. The indexes (including the dictionary of activities) must then be rebuilt.
+        :param new_activities_list: the new list of activities
+        """
+        self._activities_list_view = new_activities_list
+
+    @staticmethod
+    def _get_date_key(activity):
+        """
+        Creates the key under which the date of an activity is stored in the timeline.
+        e.g. an activity taking place on 30.11.2020 -> 20201130
+        :param activity: the activity whose date key is needed
+        :return: the integer yyyymmdd
+        """
+        return Utility.convert_calendar_date_to_key(activity.date)
+
+    def _index_activity(self, activity):
+        """
+        Adds an activity to all the indexes of the repository.
+        :param activity: the activity to be indexed
+        """
+        self._generation += 1
+        self._activities_by_id[activity.id] = activity
+        self._day_schedules.add(self._get_date_key(activity), activity.time, activity)
+        self._day_counts.increment(self._get_date_key(activity))
+        for participant_id in activity.participants_ids:
+            self._activities_ids_by_participant.setdefault(participant_id, set()).add(activity.id)
+            self._participant_schedules.add(participant_id, self._get_date_key(activity), activity.time)
+        self._description_index.add(activity.id, activity.description)
+        self._timeline.add(activity.id, self._get_date_key(activity), activity.time)
+        if self._columnar_index is not None:
+            self._columnar_index.add(activity.id, self._get_date_key(activity), activity.time,
+                                     activity.participants_ids)
+        if activity.id not in self._insertion_numbers:
+            self._insertion_numbers[activity.id] = self._next_insertion_number
+            self._next_insertion_number += 1
+
+    def _unindex_activity(self, activity):
+        """
+        Removes an activity from all the indexes of the repository.
+        Must be called before the attributes of the activity are changed, so that its old keys can still be computed.
+        The activity stays in the dictionary of activities and keeps its insertion number, since an updated activity
+            keeps its place in the list.
+        :param activity: the activity to be removed from the indexes
+        """
+        self._generation += 1
+        self._day_schedules.remove(self._get_date_key(activity), activity.time, activity)
+        self._day_counts.decrement(self._get_date_key(activity))
+        for participant_id in activity.participants_ids:
+            self._participant_schedules.remove(participant_id, self._get_date_key(activity), activity.time)
+            participant_activities_ids = self._activities_ids_by_participant.get(participant_id)
+            if participant_activities_ids is not None:
+                participant_activities_ids.discard(activity.id)
+                if len(participant_activities_ids) == 0:
+                    del self._activities_ids_by_participant[participant_id]
+        self._description_index.remove(activity.id)
+        self._timeline.remove(activity.id, self._get_date_key(activity), activity.time)
+        if self._columnar_index is not None:
+            self._columnar_index.remove(activity.id)
+
+    def _sort_by_insertion(self, activities):
+        """
+        Sorts some activities found through the indexes in the order of the list of activities.
+        :param activities: an iterable of activities from the repository
+        :return: the list of the activities, in the order in which they were added to the repository
+        """
+        return sorted(activities, key=lambda activity: self._insertion_numbers[activity.id])
+
+    def _rebuild_indexes(self):
+        """
+        Rebuilds all the indexes from the list of activities.
+        Used whenever the list of activities is replaced as a whole (e.g. by the setter or when loading from a file).
+        """
+        activities = self._activities_list
+        self._activities_by_id = {}
+        self._activities_list_view = None
+        self._day_schedules = DayScheduleIndex()
+        self._participant_schedules = PersonScheduleIndex()
+        self._day_counts = DayCountIndex()
+        self._activities_ids_by_participant = {}
+        self._description_index = TrigramIndex()
+        self._timeline = TimelineIndex()
+        if self._columnar_index is not None:
+            self._columnar_index.clear()
+        self._insertion_numbers = {}
+        for activity in activities:
+            self._index_activity(activity)
+
+    def _check_time_slot(self, activity, conflict_message, replaced_activity=None):
+        """
+        Checks whether an activity can take place at its time, according to the conflict mode of the repository: in the
+            planner mode, the hour must be free in the schedule of the day; in the participant mode, the hour must be
+            free in the schedule of each participant (one bit test per participant, whatever the number of activities).
+        When the activity replaces an activity of the repository (i.e. it is its updated version), the hour taken by the
+            replaced activity does not count: if both take place at the same time, the hour of the day (planner mode)
+            or the hour of each common participant (participant mode) can only be taken by the replaced activity.
+        Raises ActivityRepositoryError if the activity conflicts with another activity of the repository.
+        :param activity: the activity to be checked (it must not be in the indexes)
+        :param conflict_message: the message of the error raised when the hour is not free in the planner mode
+        :param replaced_activity: the activity of the repository replaced by the checked activity, or None
+        """
+        date_key = self._get_date_key(activity)
+        replaces_same_time = replaced_activity is not None and replaced_activity.time == activity.time and \
+            self._get_date_key(replaced_activity) == date_key
+        if self._conflict_mode == PLANNER_CONFLICTS:
+            if replaces_same_time is False and self._day_schedules.is_occupied(date_key, activity.time):
+                raise ActivityRepositoryError(conflict_message)
+            return
+
+        for participant_id in activity.participants_ids:
+            if replaces_same_time and participant_id in replaced_activity.participants_ids:
+                continue
+            if self._participant_schedules.is_occupied(participant_id, date_key, activity.time):
+                raise ActivityRepositoryError(
+                    f"The person having the ID {participant_id} already takes part in another activity at that time!\n")
+
+    def _check_new_activity(self, new_activity):
+        """
+        Checks whether a new activity can be added to the repository.
+        Raises ActivityRepositoryError if there already exists an activity having the same ID as the new activity or
+            if the new activity conflicts with another activity in the repository (see _check_time_slot).
+        :param new_activity: the activity to be checked
+        """
+        if new_activity.id in self._activities_by_id:
+            raise ActivityRepositoryError("An activity with this ID already exists in your agenda!\n")
+
+        self._check_time_slot(new_activity, "Two different activities cannot be performed in the same time!\n")
+
+    def _bulk_load_activities(self, activities):
+        """
+        Replaces the content of the repository with the received activities, building the list of activities and its
+            indexes in a single pass. Used when loading the activities from a file.
+        Raises ActivityRepositoryError (with the same messages as save_activity) if two activities have the same ID or
+            conflict with each other.
+        :param activities: an iterable of activities (e.g. a generator parsing the lines of a file)
+        """
+        ActivityRepository.clear_repository(self)
+        for activity in activities:
+            self._check_new_activity(activity)
+            self._activities_list_view.append(activity)
+            self._index_activity(activity)
 
     def save_activity(self, new_activity):
         """
@@ -45,14 +258,10 @@ class ActivityRepository:
             if there is another activity in the repository that takes place in the same time time as the new activity.
         :param new_activity: the new activity that is wanted to be introduced in the repository
         """
-        if new_activity in self._activities_list:
-            raise ActivityRepositoryError("An activity with this ID already exists in your agenda!\n")
-
-        for activity in self._activities_list:
-            if activity.date == new_activity.date and activity.time == new_activity.time:
-                raise ActivityRepositoryError("Two different activities cannot be performed in the same time!\n")
-
-        self._activities_list.append(new_activity)
+        self._check_new_activity(new_activity)
+        if self._activities_list_view is not None:
+            self._activities_list_view.append(new_activity)
+        self._index_activity(new_activity)
 
     def find_activity(self, searched_activity_id):
         """
@@ -60,10 +269,7 @@ class ActivityRepository:
         :param searched_activity_id: the ID of the searched activity
         :return: the activity having the received ID, or None if there is no activity having that ID
         """
-        for activity in self._activities_list:
-            if activity.id == searched_activity_id:
-                return activity
-        return None
+        return self._activities_by_id.get(searched_activity_id)
 
     def check_activity_existence(self, searched_activity_id):
         """
@@ -71,8 +277,7 @@ class ActivityRepository:
         :param searched_activity_id: the ID to check
         :return: True if there is an activity having the received ID, False otherwise
         """
-        activities_ids_list = [activity.id for activity in self._activities_list]
-        return searched_activity_id in activities_ids_list
+        return searched_activity_id in self._activities_by_id
 
     def remove_activity(self, remove_activity_id):
         """
@@ -83,49 +288,238 @@ class ActivityRepository:
         if self.check_activity_existence(remove_activity_id) is False:
             raise ActivityRepositoryError("The activity you want to remove was not found in the list!\n")
 
-        for remove_candidate in self._activities_list:
-            if remove_candidate.id == remove_activity_id:
-                self._activities_list.remove(remove_candidate)
+        remove_candidate = self._activities_by_id[remove_activity_id]
+        self._unindex_activity(remove_candidate)
+        del self._insertion_numbers[remove_activity_id]
+        del self._activities_by_id[remove_activity_id]
+        self._activities_list_view = None
 
     def update_activity(self, to_update_activity_id, updated_activity):
         """
         Receives an activity ID and an updated version of that activity, and replaces the attributes of the old activity
             with the updated attributes.
         Raises ActivityRepositoryError if there is no activity in the repository having the given ID or if the new
-            activity takes place in the same time with another activity already existing in the repository.
+            activity conflicts with another activity already existing in the repository (see _check_time_slot).
         :param to_update_activity_id: the ID of the activity that needs to be updated
         :param updated_activity: the updated version of the searched activity
         """
         if self.check_activity_existence(to_update_activity_id) is False:
             raise ActivityRepositoryError("The activity you are trying to update was not found in the agenda!\n")
 
-        for activity in self._activities_list:
-            if activity.date == updated_activity.date and activity.time == updated_activity.time and activity.id != updated_activity.id:
-                raise ActivityRepositoryError("There is already an activity taking place at that time!\n")
-        for activity in self._activities_list:
-            if activity.id == to_update_activity_id:
-                activity.participants_ids = updated_activity.participants_ids
-                activity.day = updated_activity.day
-                activity.month = updated_activity.month
-                activity.year = updated_activity.year
-                activity.time = updated_activity.time
-                activity.description = updated_activity.description
+        # the update is checked before the indexes are touched, so a rejected update does not change the generation
+        # (and does not invalidate the cached results of the services)
+        activity = self._activities_by_id[to_update_activity_id]
+        self._check_time_slot(updated_activity, "There is already an activity taking place at that time!\n", activity)
+        self._unindex_activity(activity)
+        activity.participants_ids = updated_activity.participants_ids
+        activity.day = updated_activity.day
+        activity.month = updated_activity.month
+        activity.year = updated_activity.year
+        activity.time = updated_activity.time
+        activity.description = updated_activity.description
+        self._index_activity(activity)
+
+    def find_activities_by_participant(self, participant_id):
+        """
+        Finds all the activities in which a person takes part, using the participant index.
+        :param participant_id: the ID of the person
+        :return: a list containing the activities of the person, in the order of the list of activities
+        """
+        participant_activities_ids = self._activities_ids_by_participant.get(participant_id, ())
+        return self._sort_by_insertion(self._activities_by_id[activity_id]
+                                       for activity_id in participant_activities_ids)
+
+    def find_activities_by_date(self, calendar_date):
+        """
+        Finds all the activities taking place in a day, by walking the hour slots of the day schedule (so the activities
+            are already in chronological order).
+        :param calendar_date: the calendar date, as a dictionary
+        :return: a list containing the activities of the day, sorted by time
+        """
+        return list(self._day_schedules.iterate_day(Utility.convert_calendar_date_to_key(calendar_date)))
+
+    def iterate_day_schedules(self, start_date=None, end_date=None):
+        """
+        Iterates over the days having activities, in chronological order, using the day schedules (so only the days
+            between the two dates are visited).
+        The repository must not be changed while it is iterated.
+        :param start_date: the first calendar date (included), as a dictionary, or None to start from the first day
+        :param end_date: the last calendar date (included), as a dictionary, or None to continue until the last day
+        :return: a generator of (date key, mask of the occupied hours, number of activities) triples; bit h of the mask
+            is set if there is an activity at hour h
+        """
+        start_date_key = None if start_date is None else Utility.convert_calendar_date_to_key(start_date)
+        end_date_key = None if end_date is None else Utility.convert_calendar_date_to_key(end_date)
+        return self._day_schedules.iterate_days(start_date_key, end_date_key)
+
+    def get_participant_schedule(self, participant_id, start_date, end_date):
+        """
+        Gets the occupied hours of a person in every day between two dates, from the schedules of the persons.
+        :param participant_id: the ID of the person
+        :param start_date: the first calendar date (included), as a dictionary
+        :param end_date: the last calendar date (included), as a dictionary
+        :return: a dictionary from the date keys of the days in which the person has activities to the masks of the
+            hours in which the person is busy (bit h is set if the person has an activity at hour h)
+        """
+        return self._participant_schedules.get_schedule(participant_id,
+                                                        Utility.convert_calendar_date_to_key(start_date),
+                                                        Utility.convert_calendar_date_to_key(end_date))
+
+    def iterate_days_by_number_of_activities(self, start_date=None, end_date=None):
+        """
+        Iterates over the days having activities in ascending order of their number of activities, then of their date,
+            using the day counts (so the days are read off in order, without counting or sorting anything).
+        The repository must not be changed while it is iterated.
+        :param start_date: the first calendar date (included), as a dictionary, or None to start from the first day
+        :param end_date: the last calendar date (included), as a dictionary, or None to continue until the last day
+        :return: a generator of (number of activities, date key) pairs
+        """
+        start_date_key = None if start_date is None else Utility.convert_calendar_date_to_key(start_date)
+        end_date_key = None if end_date is None else Utility.convert_calendar_date_to_key(end_date)
+        return self._day_counts.iterate_by_count(start_date_key, end_date_key)
+
+    def find_activities_by_description(self, searched_description):
+        """
+        Finds all the activities whose lowercased descriptions contain a text, using the description index.
+        :param searched_description: the searched text (lowercase)
+        :return: a list containing the found activities, in the order of the list of activities
+        """
+        found_activities_ids = self._description_index.search(searched_description)
+        return self._sort_by_insertion(self._activities_by_id[activity_id] for activity_id in found_activities_ids)
+
+    def iterate_activities_chronologically(self, start_date=None, end_date=None):
+        """
+        Iterates over the activities in chronological order (by date, then by hour), using the timeline.
+        The repository must not be changed while it is iterated.
+        :param start_date: the first calendar date (included), as a dictionary, or None to start from the first activity
+        :param end_date: the last calendar date (included), as a dictionary, or None to continue until the last activity
+        :return: a generator of activities
+        """
+        start_date_key = None if start_date is None else Utility.convert_calendar_date_to_key(start_date)
+        end_date_key = None if end_date is None else Utility.convert_calendar_date_to_key(end_date)
+        for _, _, activity_id in self._timeline.iterate_between(start_date_key, end_date_key):
+            yield self._activities_by_id[activity_id]
+
+    def _estimate_query_drivers(self, start_date_key, end_date_key, participant_id, searched_description):
+        """
+        Estimates, using the sizes kept by the indexes, how many activities each index would produce for a query.
+        The timeline can always drive a query (without date bounds, it produces all the activities).
+        :param start_date_key: the date key of the first date, or None
+        :param end_date_key: the date key of the last date, or None
+        :param participant_id: the ID of the searched participant, or None
+        :param searched_description: the searched text (lowercase), or None
+        :return: a list of (estimated number of activities, index name) pairs
+        """
+        estimates = [(self._timeline.count_between(start_date_key, end_date_key), "timeline")]
+        if participant_id is not None:
+            estimates.append((len(self._activities_ids_by_participant.get(participant_id, ())), "participant"))
+        if searched_description is not None:
+            estimates.append((self._description_index.estimate_matches(searched_description), "description"))
+        return estimates
+
+    def query_activities(self, start_date=None, end_date=None, participant_id=None, searched_description=None,
+                         start_hour=None, end_hour=None):
+        """
+        Iterates over the activities matching any combination of criteria, in chronological order.
+        The query is driven by the most selective index (the one estimated to produce the fewest activities): the
+            timeline for the date range, the participant index or the description index. The activities produced by
+            that index are then filtered lazily by the other criteria. There is no index for the hours, so the hour
+            range is only used as a filter.
+        The repository must not be changed while it is iterated.
+        :param start_date: the first calendar date (included), as a dictionary, or None
+        :param end_date: the last calendar date (included), as a dictionary, or None
+        :param participant_id: the ID of a person who must take part in the activities, or None
+        :param searched_description: a text (lowercase) the lowercased descriptions must contain, or None
+        :param start_hour: the first hour (included), or None
+        :param end_hour: the last hour (included), or None
+        :return: a generator of the matching activities
+        """
+        start_date_key = None if start_date is None else Utility.convert_calendar_date_to_key(start_date)
+        end_date_key = None if end_date is None else Utility.convert_calendar_date_to_key(end_date)
+        # on equal estimates the timeline is preferred, since its activities are already in chronological order
+        _, driver = min(self._estimate_query_drivers(start_date_key, end_date_key, participant_id,
+                                                     searched_description), key=lambda estimate: estimate[0])
+
+        if driver == "timeline":
+            candidates = (self._activities_by_id[activity_id] for _, _, activity_id in
+                          self._timeline.iterate_between(start_date_key, end_date_key))
+        else:
+            if driver == "participant":
+                candidates_ids = self._activities_ids_by_participant.get(participant_id, ())
+            else:
+                candidates_ids = self._description_index.search(searched_description)
+            candidates = sorted((self._activities_by_id[activity_id] for activity_id in candidates_ids),
+                                key=lambda activity: (self._get_date_key(activity), activity.time, activity.id))
+
+        for activity in candidates:
+            date_key = self._get_date_key(activity)
+            if start_date_key is not None and date_key < start_date_key:
+                continue
+            if end_date_key is not None and date_key > end_date_key:
+                continue
+            if start_hour is not None and activity.time < start_hour:
+                continue
+            if end_hour is not None and activity.time > end_hour:
+                continue
+            if participant_id is not None and participant_id not in activity.participants_ids:
+                continue
+            if searched_description is not None and searched_description not in activity.description.lower():
+                continue
+            yield activity
+
+    def get_generation(self):
+        """
+        Returns the generation of the repository, which is increased by every change of the activities (including the
+            changes made by undo and redo, and the replacement of the whole list).
+        """
+        return self._generation
 
     def get_all_activities_list(self):
         """ Returns the complete list of activities """
         return self._activities_list
 
+    def get_columnar_index(self):
+        """
+        Returns the columnar index of the activities, used by the analytics engine of the statistics service.
+        The index is built when it is first needed, so that the repositories whose statistics are computed in pure
+            Python do not maintain it; from then on it is updated on every change, like the other indexes.
+        Raises ImportError if NumPy is not installed.
+        :return: the columnar index (INFRASTRUCTURE.columnar_index.ColumnarIndex)
+        """
+        if self._columnar_index is None:
+            columnar_index = ColumnarIndex()
+            for activity in self._activities_by_id.values():
+                columnar_index.add(activity.id, self._get_date_key(activity), activity.time,
+                                   activity.participants_ids)
+            self._columnar_index = columnar_index
+        return self._columnar_index
+
     def get_number_of_activities(self):
         """ Returns the number of activities in the repository """
-        return len(self._activities_list)
+        return len(self._activities_by_id)
 
     def __len__(self):
         """ Overwritten len() method. The length of the repository is actually the length of the list of activities """
-        return len(self._activities_list)
+        return len(self._activities_by_id)
+
+    def flush(self):
+        """ Writes the pending changes into the storage. The in-memory repository does not have a storage """
+        pass
 
     def clear_repository(self):
-        """ Clears the list of activities """
-        self._activities_list.clear()
+        """ Clears the list of activities and its indexes """
+        self._generation += 1
+        self._activities_by_id.clear()
+        self._activities_list_view = []
+        self._day_schedules.clear()
+        self._participant_schedules.clear()
+        self._day_counts.clear()
+        self._activities_ids_by_participant.clear()
+        self._description_index.clear()
+        self._timeline.clear()
+        if self._columnar_index is not None:
+            self._columnar_index.clear()
+        self._insertion_numbers.clear()
 
     def populate_repository(self):
         """ Populates the list of activities """
@@ -136,6 +530,7 @@ class ActivityRepository:
             Activity(1500, [350], {"year": 2020, "month": 12, "day": 31}, 6, "New Year's party"),
             Activity(5000, [100, 200, 750], {"year": 2020, "month": 12, "day": 25}, 19, "Christmas dinner")
         ]
+        self._rebuild_indexes()
 
 
 class PersonRepository:
@@ -143,14 +538,33 @@ class PersonRepository:
     Class used to instantiate a persons repository.
     The repository is a collection of uniquely identifiable objects, so there cannot exist two identical persons
         in the repository (i.e. two persons having the same ID).
+    The persons are stored in a dictionary from their IDs to the persons, kept in the order of the list of persons (an
+        updated person keeps its place), so that lookups, existence checks and removals by ID take constant time; the
+        list of persons is only a view of this dictionary, built again when it is needed after a removal.
+    Besides the persons, the repository keeps some indexes which are updated on every change:
+        - a trigram index of the names, used for case insensitive substring search;
+        - a BK-tree of the names, used for fuzzy (typo tolerant) search;
+        - a suffix array of the phone numbers, used for partial phone number search.
+    Each person also receives an insertion number when it is added to the list of persons, so that the results found
+        through the indexes can be returned in the order of the list of persons.
+    The repository also has a generation, i.e. a counter which is increased by every change of the persons, used by the
+        services to know whether a cached result is still valid.
     """
 
     def __init__(self):
         """
         The constructor for a new object of type PersonRepository.
         The repository is represented as a list of persons, so it is initialized with an empty list.
+        The indexes are initialized empty.
         """
-        self._person_list = []
+        self._persons_by_id = {}
+        self._person_list_view = []
+        self._name_index = TrigramIndex()
+        self._fuzzy_name_index = BKTreeIndex()
+        self._phone_number_index = SuffixArrayIndex()
+        self._insertion_numbers = {}
+        self._next_insertion_number = 0
+        self._generation = 0
 
     @property
     def person_list(self):
@@ -173,6 +587,98 @@ class PersonRepository:
                 raise PersonRepositoryError("The list does not contain persons!\n")
 
         self._person_list = new_persons_list
+        self._rebuild_indexes()
+
+    @property
+    def _person_list(self):
+        """
+        The list of persons, i.e. the persons of the dictionary of persons, in their order.
+        The list is kept between the changes and is only built again after a removal (or after the whole list was
+            replaced), so reading it does not copy the persons every time.
+        """
+        if self._person_list_view is None:
+            self._person_list_view = list(self._persons_by_id.values())
+        return self._person_list_view
+
+    @_person_list.setter
+    def _person_list(self, new_persons_list):
+        """
+        Replaces the list of persons. The indexes (including the dictionary of persons) must then be rebuilt.
+        :param new_persons_list: the new list of persons
+        """
+        self._person_list_view = new_persons_list
+
+    def _index_person(self, person):
+        """
+        Adds a person to all the indexes of the repository.
+        :param person: the person to be indexed
+        """
+        self._generation += 1
+        self._persons_by_id[person.id] = person
+        self._name_index.add(person.id, person.name)
+        self._fuzzy_name_index.add(person.id, person.name)
+        self._phone_number_index.add(person.id, person.phone_number)
+        if person.id not in self._insertion_numbers:
+            self._insertion_numbers[person.id] = self._next_insertion_number
+            self._next_insertion_number += 1
+
+    def _unindex_person(self, person):
+        """
+        Removes a person from all the indexes of the repository.
+        Must be called before the attributes of the person are changed, so that its old keys can still be computed.
+        The person stays in the dictionary of persons and keeps its insertion number, since an updated person keeps its
+            place in the list.
+        :param person: the person to be removed from the indexes
+        """
+        self._generation += 1
+        self._name_index.remove(person.id)
+        self._fuzzy_name_index.remove(person.id)
+        self._phone_number_index.remove(person.id)
+
+    def _sort_by_insertion(self, persons):
+        """
+        Sorts some persons found through the indexes in the order of the list of persons.
+        :param persons: an iterable of persons from the repository
+        :return: the list of the persons, in the order in which they were added to the repository
+        """
+        return sorted(persons, key=lambda person: self._insertion_numbers[person.id])
+
+    def _rebuild_indexes(self):
+        """
+        Rebuilds all the indexes from the list of persons.
+        Used whenever the list of persons is replaced as a whole (e.g. by the setter or when loading from a file).
+        """
+        persons = self._person_list
+        self._persons_by_id = {}
+        self._person_list_view = None
+        self._name_index = TrigramIndex()
+        self._fuzzy_name_index = BKTreeIndex()
+        self._phone_number_index = SuffixArrayIndex()
+        self._insertion_numbers = {}
+        for person in persons:
+            self._index_person(person)
+
+    def _check_new_person(self, new_person):
+        """
+        Checks whether a new person can be added to the repository.
+        Raises PersonRepositoryError if there already exists a person having the same ID with the new person.
+        :param new_person: the person to be checked
+        """
+        if new_person.id in self._persons_by_id:
+            raise PersonRepositoryError("A person with this ID already exists in your agenda!\n")
+
+    def _bulk_load_persons(self, persons):
+        """
+        Replaces the content of the repository with the received persons, building the list of persons and its
+            indexes in a single pass. Used when loading the persons from a file.
+        Raises PersonRepositoryError (with the same message as save_person) if two persons have the same ID.
+        :param persons: an iterable of persons (e.g. a generator parsing the lines of a file)
+        """
+        PersonRepository.clear_repository(self)
+        for person in persons:
+            self._check_new_person(person)
+            self._person_list_view.append(person)
+            self._index_person(person)
 
     def save_person(self, new_person):
         """
@@ -180,9 +686,10 @@ class PersonRepository:
         Raises PersonRepositoryError if there already exists a person having the same ID with the new person.
         :param new_person: the new person that is wanted to be added to the repository
         """
-        if new_person in self._person_list:
-            raise PersonRepositoryError("A person with this ID already exists in your agenda!\n")
-        self._person_list.append(new_person)
+        self._check_new_person(new_person)
+        if self._person_list_view is not None:
+            self._person_list_view.append(new_person)
+        self._index_person(new_person)
 
     def check_person_existence(self, searched_person_id):
         """
@@ -190,8 +697,7 @@ class PersonRepository:
         :param searched_person_id: the ID of the searched person
         :return: True if it exists a person having the given ID, False otherwise
         """
-        ids_list = [person.id for person in self._person_list]
-        return searched_person_id in ids_list
+        return searched_person_id in self._persons_by_id
 
     def find_person(self, searched_person_id):
         """
@@ -199,12 +705,7 @@ class PersonRepository:
         :param searched_person_id: the ID of the searched person
         :return: the person having the given ID if the person is found in the repository, None otherwise
         """
-        if self.check_person_existence(searched_person_id) is False:
-            return None
-
-        for person in self._person_list:
-            if person.id == searched_person_id:
-                return person
+        return self._persons_by_id.get(searched_person_id)
 
     def remove_person(self, remove_person_id):
         """
@@ -215,9 +716,11 @@ class PersonRepository:
         if self.check_person_existence(remove_person_id) is False:
             raise PersonRepositoryError("The person you want to remove was not found in the list!\n")
 
-        for remove_candidate in self._person_list:
-            if remove_candidate.id == remove_person_id:
-                self._person_list.remove(remove_candidate)
+        remove_candidate = self._persons_by_id[remove_person_id]
+        self._unindex_person(remove_candidate)
+        del self._insertion_numbers[remove_person_id]
+        del self._persons_by_id[remove_person_id]
+        self._person_list_view = None
 
     def update_person(self, person_to_update_id, updated_person):
         """
@@ -233,10 +736,51 @@ class PersonRepository:
         if person_to_update_id != updated_person.id:
             raise PersonRepositoryError("The updated person's ID does not match the old person's ID!\n")
 
-        for person in self._person_list:
-            if person.id == person_to_update_id:
-                person.name = updated_person.name
-                person.phone_number = updated_person.phone_number
+        person = self._persons_by_id[person_to_update_id]
+        self._unindex_person(person)
+        try:
+            person.name = updated_person.name
+            person.phone_number = updated_person.phone_number
+        finally:
+            self._index_person(person)
+
+    def find_persons_by_name(self, searched_name):
+        """
+        Finds all the persons whose lowercased names contain a text, using the name index.
+        :param searched_name: the searched text (lowercase)
+        :return: a list containing the found persons, in the order of the list of persons
+        """
+        return self._sort_by_insertion(self._persons_by_id[person_id]
+                                       for person_id in self._name_index.search(searched_name))
+
+    def find_persons_by_fuzzy_name(self, searched_name, maximum_distance=DEFAULT_MAXIMUM_EDIT_DISTANCE):
+        """
+        Finds all the persons whose names (or one of whose words) are at most a given edit distance away from a text,
+            using the BK-tree of the names. The names and the text are compared case insensitive.
+        :param searched_name: the searched text
+        :param maximum_distance: the maximum edit distance
+        :return: a list containing the found persons, ranked by their edit distance, then in the order of the list of
+            persons
+        """
+        distances_by_person_id = self._fuzzy_name_index.search(searched_name, maximum_distance)
+        return sorted((self._persons_by_id[person_id] for person_id in distances_by_person_id),
+                      key=lambda person: (distances_by_person_id[person.id], self._insertion_numbers[person.id]))
+
+    def find_persons_by_phone_number(self, searched_phone_number):
+        """
+        Finds all the persons whose phone numbers contain a text, using the phone number index.
+        :param searched_phone_number: the searched (part of the) phone number
+        :return: a list containing the found persons, in the order of the list of persons
+        """
+        return self._sort_by_insertion(self._persons_by_id[person_id]
+                                       for person_id in self._phone_number_index.search(searched_phone_number))
+
+    def get_generation(self):
+        """
+        Returns the generation of the repository, which is increased by every change of the persons (including the
+            changes made by undo and redo, and the replacement of the whole list).
+        """
+        return self._generation
 
     def get_all_persons_list(self):
         """ Returns the list persons in the repository """
@@ -244,18 +788,28 @@ class PersonRepository:
 
     def get_number_of_persons(self):
         """ Returns the number of persons in the repository """
-        return len(self._person_list)
+        return len(self._persons_by_id)
 
     def __len__(self):
         """
         Overwritten len() method. We assume that the length of the repository is equal to the number of persons
         in the repository.
         """
-        return len(self._person_list)
+        return len(self._persons_by_id)
+
+    def flush(self):
+        """ Writes the pending changes into the storage. The in-memory repository does not have a storage """
+        pass
 
     def clear_repository(self):
-        """ Clears the list of persons """
-        self._person_list.clear()
+        """ Clears the list of persons and its indexes """
+        self._generation += 1
+        self._persons_by_id.clear()
+        self._person_list_view = []
+        self._name_index.clear()
+        self._fuzzy_name_index.clear()
+        self._phone_number_index.clear()
+        self._insertion_numbers.clear()
 
     def populate_repository(self):
         """ Populates the list of persons """
@@ -267,3 +821,4 @@ class PersonRepository:
             Person(500, "Evie Rogers", "59825723"),
             Person(700, "John Turner", "548824995")
         ]
+        self._rebuild_indexes()
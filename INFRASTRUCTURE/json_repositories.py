@@ -1,7 +1,10 @@
 import json
 
 from DOMAIN.entities import Person, Activity
-from INFRASTRUCTURE.inmemory_repositories import PersonRepository, ActivityRepository
+from INFRASTRUCTURE.group_commit import GroupCommit, DEFAULT_BATCH_SIZE
+from INFRASTRUCTURE.indexes import DEFAULT_MAXIMUM_EDIT_DISTANCE
+from INFRASTRUCTURE.inmemory_repositories import PersonRepository, ActivityRepository, PLANNER_CONFLICTS
+from UTILITY.utils import Utility
 
 """
 Loading data from a JSON file into memory:
@@ -20,38 +23,58 @@ Saving data from memory into a JSON file (pretty printing):
 
 
 class JsonFileActivityRepository(ActivityRepository):
-    def __init__(self, filename):
-        super().__init__()
+    def __init__(self, filename, batch_size=DEFAULT_BATCH_SIZE, time_window=None, conflict_mode=PLANNER_CONFLICTS):
+        super().__init__(conflict_mode)
         self.__filename = filename
+        self.__file_signature = None
+        self.__group_commit = GroupCommit(self.__save_activities_from_memory_to_file, batch_size, time_window)
+
+    @staticmethod
+    def __convert_dictionary_to_activity(activity_dictionary):
+        activity_id = int(activity_dictionary["id"])
+        participants_ids = activity_dictionary["participants_ids"]
+        activity_date = activity_dictionary["date"]
+        activity_time = activity_dictionary["time"]
+        description = activity_dictionary["description"]
+        return Activity(activity_id, participants_ids, activity_date, activity_time, description)
 
     def __load_activities_from_file_into_memory(self):
+        # the file is parsed only if it changed (modification time, size or inode) since it was last loaded or saved,
+        # and never while there are pending changes (the data from memory is newer than the file)
+        if self.__group_commit.pending_changes > 0:
+            return
+
+        file_signature = Utility.get_file_signature(self.__filename)
+        if file_signature is not None and file_signature == self.__file_signature:
+            return
+
         with open(self.__filename, mode="r") as activities_json_file:
-            super().clear_repository()
             json_activities_dictionary = json.load(activities_json_file)
-            for activity_dictionary in json_activities_dictionary["activities"]:
-                activity_id = int(activity_dictionary["id"])
-                participants_ids = activity_dictionary["participants_ids"]
-                activity_date = activity_dictionary["date"]
-                activity_time = activity_dictionary["time"]
-                description = activity_dictionary["description"]
-                activity = Activity(activity_id, participants_ids, activity_date, activity_time, description)
-                super().save_activity(activity)
+        self._bulk_load_activities(self.__convert_dictionary_to_activity(activity_dictionary)
+                                   for activity_dictionary in json_activities_dictionary["activities"])
+        self.__file_signature = file_signature
 
     def __save_activities_from_memory_to_file(self):
-        with open(self.__filename, mode="w") as activities_json_file:
-            activities_list_as_dictionary = {}
-            activities_list_as_dictionary["activities"] = []
-            for activity in self._activities_list:
-                activity_dictionary = {
-                    "id": activity.id,
-                    "participants_ids": activity.participants_ids,
-                    "date": activity.date,
-                    "time": activity.time,
-                    "description": activity.description
-                }
-                activities_list_as_dictionary["activities"].append(activity_dictionary)
-            pretty_printed_activities_dictionary = json.dumps(activities_list_as_dictionary, indent=4)
-            activities_json_file.write(pretty_printed_activities_dictionary)
+        activities_list_as_dictionary = {}
+        activities_list_as_dictionary["activities"] = []
+        for activity in self._activities_list:
+            activity_dictionary = {
+                "id": activity.id,
+                "participants_ids": activity.participants_ids,
+                "date": activity.date,
+                "time": activity.time,
+                "description": activity.description
+            }
+            activities_list_as_dictionary["activities"].append(activity_dictionary)
+        pretty_printed_activities_dictionary = json.dumps(activities_list_as_dictionary, indent=4)
+        Utility.write_file_atomically(self.__filename, pretty_printed_activities_dictionary)
+        self.__file_signature = Utility.get_file_signature(self.__filename)
+
+    def flush(self):
+        """
+        Writes the pending changes (if any) into the file.
+        """
+        self.__group_commit.flush()
 
     @property
     def activities_list(self):
@@ -71,8 +94,10 @@ class JsonFileActivityRepository(ActivityRepository):
         :param new_activities_list: the new list of activities
         Saves all the activities from the list of activities into the file.
         """
-        self._activities_list = new_activities_list
-        self.__save_activities_from_memory_to_file()
+        with self.__group_commit.lock:
+            self._activities_list = new_activities_list
+            self._rebuild_indexes()
+            self.__group_commit.register_change()
 
     def save_activity(self, new_activity):
         """
@@ -82,9 +107,10 @@ class JsonFileActivityRepository(ActivityRepository):
             if there is another activity in the repository that takes place in the same time time as the new activ
         Saves all the activities from the list of activities into the file.
         """
-        self.__load_activities_from_file_into_memory()
-        super().save_activity(new_activity)
-        self.__save_activities_from_memory_to_file()
+        with self.__group_commit.lock:
+            self.__load_activities_from_file_into_memory()
+            super().save_activity(new_activity)
+            self.__group_commit.register_change()
 
     def remove_activity(self, remove_activity_id):
         """
@@ -94,9 +120,10 @@ class JsonFileActivityRepository(ActivityRepository):
         :param remove_activity_id: the ID of the activity that needs to be removed
         Saves all the activities from the list of activities into the file.
         """
-        self.__load_activities_from_file_into_memory()
-        super().remove_activity(remove_activity_id)
-        self.__save_activities_from_memory_to_file()
+        with self.__group_commit.lock:
+            self.__load_activities_from_file_into_memory()
+            super().remove_activity(remove_activity_id)
+            self.__group_commit.register_change()
 
     def update_activity(self, to_update_activity_id, updated_activity):
         """
@@ -109,9 +136,10 @@ class JsonFileActivityRepository(ActivityRepository):
         :param updated_activity: the updated version of the searched activity
         Saves all the activities from the list of activities into the file.
         """
-        self.__load_activities_from_file_into_memory()
-        super().update_activity(to_update_activity_id, updated_activity)
-        self.__save_activities_from_memory_to_file()
+        with self.__group_commit.lock:
+            self.__load_activities_from_file_into_memory()
+            super().update_activity(to_update_activity_id, updated_activity)
+            self.__group_commit.register_change()
 
     def find_activity(self, searched_activity_id):
         """
@@ -133,6 +161,100 @@ class JsonFileActivityRepository(ActivityRepository):
         self.__load_activities_from_file_into_memory()
         return super().check_activity_existence(searched_activity_id)
 
+    def find_activities_by_participant(self, participant_id):
+        """
+        Loads all the activities from the file into the list of activities.
+        Finds all the activities in which a person takes part, using the participant index.
+        :param participant_id: the ID of the person
+        :return: a list containing the activities of the person, in the order of the list of activities
+        """
+        self.__load_activities_from_file_into_memory()
+        return super().find_activities_by_participant(participant_id)
+
+    def find_activities_by_date(self, calendar_date):
+        """
+        Loads all the activities from the file into the list of activities.
+        Finds all the activities taking place in a day, using the day schedules.
+        :param calendar_date: the calendar date, as a dictionary
+        :return: a list containing the activities of the day, sorted by time
+        """
+        self.__load_activities_from_file_into_memory()
+        return super().find_activities_by_date(calendar_date)
+
+    def iterate_day_schedules(self, start_date=None, end_date=None):
+        """
+        Loads all the activities from the file into the list of activities.
+        Iterates over the days having activities, in chronological order, using the day schedules.
+        :param start_date: the first calendar date (included), as a dictionary, or None to start from the first day
+        :param end_date: the last calendar date (included), as a dictionary, or None to continue until the last day
+        :return: a generator of (date key, mask of the occupied hours, number of activities) triples
+        """
+        self.__load_activities_from_file_into_memory()
+        return super().iterate_day_schedules(start_date, end_date)
+
+    def get_participant_schedule(self, participant_id, start_date, end_date):
+        """
+        Loads all the activities from the file into the list of activities.
+        Computes the occupied hours of a person in every day between two dates.
+        :param participant_id: the ID of the person
+        :param start_date: the first calendar date (included), as a dictionary
+        :param end_date: the last calendar date (included), as a dictionary
+        :return: a dictionary from date keys to the masks of the hours in which the person is busy
+        """
+        self.__load_activities_from_file_into_memory()
+        return super().get_participant_schedule(participant_id, start_date, end_date)
+
+    def iterate_days_by_number_of_activities(self, start_date=None, end_date=None):
+        """
+        Loads all the activities from the file into the list of activities.
+        Iterates over the days having activities in ascending order of their number of activities, then of their date.
+        :param start_date: the first calendar date (included), as a dictionary, or None to start from the first day
+        :param end_date: the last calendar date (included), as a dictionary, or None to continue until the last day
+        :return: a generator of (number of activities, date key) pairs
+        """
+        self.__load_activities_from_file_into_memory()
+        return super().iterate_days_by_number_of_activities(start_date, end_date)
+
+    def find_activities_by_description(self, searched_description):
+        """
+        Loads all the activities from the file into the list of activities.
+        Finds all the activities whose lowercased descriptions contain a text, using the description index.
+        :param searched_description: the searched text (lowercase)
+        :return: a list containing the found activities, in the order of the list of activities
+        """
+        self.__load_activities_from_file_into_memory()
+        return super().find_activities_by_description(searched_description)
+
+    def iterate_activities_chronologically(self, start_date=None, end_date=None):
+        """
+        Loads all the activities from the file into the list of activities.
+        Iterates over the activities in chronological order (by date, then by hour), using the timeline.
+        :param start_date: the first calendar date (included), as a dictionary, or None to start from the first activity
+        :param end_date: the last calendar date (included), as a dictionary, or None to continue until the last activity
+        :return: a generator of activities
+        """
+        self.__load_activities_from_file_into_memory()
+        return super().iterate_activities_chronologically(start_date, end_date)
+
+    def query_activities(self, start_date=None, end_date=None, participant_id=None, searched_description=None,
+                         start_hour=None, end_hour=None):
+        """
+        Loads all the activities from the file into the list of activities.
+        Iterates over the activities matching any combination of criteria, in chronological order.
+        :return: a generator of the matching activities
+        """
+        self.__load_activities_from_file_into_memory()
+        return super().query_activities(start_date, end_date, participant_id, searched_description, start_hour,
+                                        end_hour)
+
+    def get_generation(self):
+        """
+        Loads all the activities from the file into the list of activities.
+        Returns the generation of the repository, which is increased by every change of the activities.
+        """
+        self.__load_activities_from_file_into_memory()
+        return super().get_generation()
+
     def get_all_activities_list(self):
         """
         Loads all the activities from the file into the list of activities.
@@ -141,6 +263,14 @@ class JsonFileActivityRepository(ActivityRepository):
         self.__load_activities_from_file_into_memory()
         return super().get_all_activities_list()
 
+    def get_columnar_index(self):
+        """
+        Loads all the activities from the file into the list of activities.
+        Returns the columnar index of the activities, used by the analytics engine of the statistics service.
+        """
+        self.__load_activities_from_file_into_memory()
+        return super().get_columnar_index()
+
     def get_number_of_activities(self):
         """
         Loads all the activities from the file into the list of activities.
@@ -159,34 +289,54 @@ class JsonFileActivityRepository(ActivityRepository):
 
 
 class JsonFilePersonRepository(PersonRepository):
-    def __init__(self, filename):
+    def __init__(self, filename, batch_size=DEFAULT_BATCH_SIZE, time_window=None):
         super().__init__()
         self.__filename = filename
+        self.__file_signature = None
+        self.__group_commit = GroupCommit(self.__save_persons_from_memory_to_file, batch_size, time_window)
+
+    @staticmethod
+    def __convert_dictionary_to_person(person_dictionary):
+        person_id = int(person_dictionary["id"])
+        person_name = person_dictionary["name"]
+        person_phone_number = person_dictionary["phone_number"]
+        return Person(person_id, person_name, person_phone_number)
 
     def __load_persons_from_file_into_memory(self):
+        # the file is parsed only if it changed (modification time, size or inode) since it was last loaded or saved,
+        # and never while there are pending changes (the data from memory is newer than the file)
+        if self.__group_commit.pending_changes > 0:
+            return
+
+        file_signature = Utility.get_file_signature(self.__filename)
+        if file_signature is not None and file_signature == self.__file_signature:
+            return
+
         with open(self.__filename, mode="r") as persons_json_file:
-            super().clear_repository()
             json_persons_dictionary = json.load(persons_json_file)
-            for person_dictionary in json_persons_dictionary["persons"]:
-                person_id = int(person_dictionary["id"])
-                person_name = person_dictionary["name"]
-                person_phone_number = person_dictionary["phone_number"]
-                person = Person(person_id, person_name, person_phone_number)
-                super().save_person(person)
+        self._bulk_load_persons(self.__convert_dictionary_to_person(person_dictionary)
+                                for person_dictionary in json_persons_dictionary["persons"])
+        self.__file_signature = file_signature
 
     def __save_persons_from_memory_to_file(self):
-        with open(self.__filename, mode="w") as persons_json_file:
-            persons_list_as_dictionary = {}
-            persons_list_as_dictionary["persons"] = []
-            for person in self._person_list:
-                person_dictionary = {
-                    "id": person.id,
-                    "name": person.name,
-                    "phone_number": person.phone_number
-                }
-                persons_list_as_dictionary["persons"].append(person_dictionary)
-                pretty_printed_persons_dictionary = json.dumps(persons_list_as_dictionary, indent=4)
-            persons_json_file.write(pretty_printed_persons_dictionary)
+        persons_list_as_dictionary = {}
+        persons_list_as_dictionary["persons"] = []
+        for person in self._person_list:
+            person_dictionary = {
+                "id": person.id,
+                "name": person.name,
+                "phone_number": person.phone_number
+            }
+            persons_list_as_dictionary["persons"].append(person_dictionary)
+        pretty_printed_persons_dictionary = json.dumps(persons_list_as_dictionary, indent=4)
+        Utility.write_file_atomically(self.__filename, pretty_printed_persons_dictionary)
+        self.__file_signature = Utility.get_file_signature(self.__filename)
+
+    def flush(self):
+        """
+        Writes the pending changes (if any) into the file.
+        """
+        self.__group_commit.flush()
 
     @property
     def person_list(self):
@@ -206,8 +356,10 @@ class JsonFilePersonRepository(PersonRepository):
         :param new_persons_list: the new list of persons
         Saves all the persons from the list of persons into the file.
         """
-        self._person_list = new_persons_list
-        self.__save_persons_from_memory_to_file()
+        with self.__group_commit.lock:
+            self._person_list = new_persons_list
+            self._rebuild_indexes()
+            self.__group_commit.register_change()
 
     def save_person(self, new_person):
         """
@@ -217,9 +369,10 @@ class JsonFilePersonRepository(PersonRepository):
         :param new_person: the new person that is wanted to be added to the repository
         Saves all the persons from the list of persons into the file.
         """
-        self.__load_persons_from_file_into_memory()
-        super().save_person(new_person)
-        self.__save_persons_from_memory_to_file()
+        with self.__group_commit.lock:
+            self.__load_persons_from_file_into_memory()
+            super().save_person(new_person)
+            self.__group_commit.register_change()
 
     def remove_person(self, remove_person_id):
         """
@@ -229,9 +382,10 @@ class JsonFilePersonRepository(PersonRepository):
         :param remove_person_id: the ID of the person to be removed
         Saves all the persons from the list of persons into the file.
         """
-        self.__load_persons_from_file_into_memory()
-        super().remove_person(remove_person_id)
-        self.__save_persons_from_memory_to_file()
+        with self.__group_commit.lock:
+            self.__load_persons_from_file_into_memory()
+            super().remove_person(remove_person_id)
+            self.__group_commit.register_change()
 
     def update_person(self, person_to_update_id, updated_person):
         """
@@ -243,9 +397,10 @@ class JsonFilePersonRepository(PersonRepository):
         :param updated_person: the updated person
         Saves all the persons from the list of persons into the file.
         """
-        self.__load_persons_from_file_into_memory()
-        super().update_person(person_to_update_id, updated_person)
-        self.__save_persons_from_memory_to_file()
+        with self.__group_commit.lock:
+            self.__load_persons_from_file_into_memory()
+            super().update_person(person_to_update_id, updated_person)
+            self.__group_commit.register_change()
 
     def find_person(self, searched_person_id):
         """
@@ -275,6 +430,45 @@ class JsonFilePersonRepository(PersonRepository):
         self.__load_persons_from_file_into_memory()
         return super().get_number_of_persons()
 
+    def find_persons_by_name(self, searched_name):
+        """
+        Loads all the persons from file into the list of persons.
+        Finds all the persons whose lowercased names contain a text, using the name index.
+        :param searched_name: the searched text (lowercase)
+        :return: a list containing the found persons, in the order of the list of persons
+        """
+        self.__load_persons_from_file_into_memory()
+        return super().find_persons_by_name(searched_name)
+
+    def find_persons_by_fuzzy_name(self, searched_name, maximum_distance=DEFAULT_MAXIMUM_EDIT_DISTANCE):
+        """
+        Loads all the persons from file into the list of persons.
+        Finds all the persons whose names are at most a given edit distance away from a text, using the BK-tree.
+        :param searched_name: the searched text
+        :param maximum_distance: the maximum edit distance
+        :return: a list containing the found persons, ranked by their edit distance
+        """
+        self.__load_persons_from_file_into_memory()
+        return super().find_persons_by_fuzzy_name(searched_name, maximum_distance)
+
+    def find_persons_by_phone_number(self, searched_phone_number):
+        """
+        Loads all the persons from file into the list of persons.
+        Finds all the persons whose phone numbers contain a text, using the phone number index.
+        :param searched_phone_number: the searched (part of the) phone number
+        :return: a list containing the found persons, in the order of the list of persons
+        """
+        self.__load_persons_from_file_into_memory()
+        return super().find_persons_by_phone_number(searched_phone_number)
+
+    def get_generation(self):
+        """
+        Loads all the persons from file into the list of persons.
+        Returns the generation of the repository, which is increased by every change of the persons.
+        """
+        self.__load_persons_from_file_into_memory()
+        return super().get_generation()
+
     def get_all_persons_list(self):
         """
         Loads all the persons from file into the list of persons.
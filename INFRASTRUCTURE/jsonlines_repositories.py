@@ -0,0 +1,309 @@
+import json
+import os
+
+from DOMAIN.entities import Person, Activity
+from INFRASTRUCTURE.inmemory_repositories import PersonRepository, ActivityRepository, PLANNER_CONFLICTS
+from UTILITY.utils import Utility
+
+"""
+JSON Lines files:
+    Each line of the file is a compact JSON object (i.e. no indentation, no new lines inside the object):
+        {"id":1000,"participants_ids":[204,159],"date":{"year":2020,"month":11,"day":30},"time":19,"description":"dinner"}
+
+Reading a JSON Lines file line by line (only one line is kept in memory at a time):
+    with open("a.jsonl", mode="r") as jsonl_file:
+        for line in jsonl_file:
+            data_in_memory = json.loads(line)
+
+Appending an object to a JSON Lines file:
+    with open("a.jsonl", mode="a") as jsonl_file:
+        jsonl_file.write(json.dumps(my_data, separators=(",", ":")) + "\n")
+"""
+
+COMPACT_SEPARATORS = (",", ":")
+MINIMUM_STALE_RECORDS = 1024
+
+
+class JsonLinesActivityRepository(ActivityRepository):
+    """
+    Class used to instantiate activities repositories based on JSON Lines files.
+    Inherits from the base class ActivityRepository.
+    The file is read line by line only once, at the instantiation of the repository. Afterwards, every change is
+        appended to the file as a single line:
+            - an added or updated activity is written as a whole, replacing the previous line having the same ID;
+            - a removed activity is written as {"id": ..., "removed": true}.
+    The lines replaced by later lines are stale. When there are more stale lines than activities (and at least
+        MINIMUM_STALE_RECORDS of them), the file is compacted, i.e. rewritten using only the activities from memory.
+    """
+
+    def __init__(self, filename, minimum_stale_records=MINIMUM_STALE_RECORDS, conflict_mode=PLANNER_CONFLICTS):
+        """
+        The constructor of an activity repository based on a JSON Lines file, which calls the __init__ method of the
+        base class, but in addition receives the name of the file from which data is loaded and into which data is
+        saved. The file is created if it does not exist.
+        :param filename: the name of the JSON Lines file
+        :param minimum_stale_records: the number of stale lines the file must have before being compacted
+        :param conflict_mode: the conflict mode of the repository (see ActivityRepository)
+        """
+        super().__init__(conflict_mode)
+        self.__filename = filename
+        self.__minimum_stale_records = minimum_stale_records
+        self.__stale_records = 0
+        self.__load_activities_from_file_into_memory()
+
+    @staticmethod
+    def __convert_dictionary_to_activity(activity_dictionary):
+        """
+        Converts a dictionary read from a line of the file into an activity.
+        :param activity_dictionary: the dictionary representing the activity
+        :return: the activity
+        """
+        return Activity(int(activity_dictionary["id"]), activity_dictionary["participants_ids"],
+                        activity_dictionary["date"], activity_dictionary["time"], activity_dictionary["description"])
+
+    @staticmethod
+    def __convert_activity_to_line(activity):
+        """
+        Converts an activity into a line of the file (including the new line character).
+        :param activity: the activity to be converted
+        :return: the compact JSON representation of the activity
+        """
+        activity_dictionary = {
+            "id": activity.id,
+            "participants_ids": activity.participants_ids,
+            "date": activity.date,
+            "time": activity.time,
+            "description": activity.description
+        }
+        return json.dumps(activity_dictionary, separators=COMPACT_SEPARATORS) + "\n"
+
+    def __load_activities_from_file_into_memory(self):
+        """
+        Reads the file line by line and transfers its contents into memory (i.e. the list of activities).
+        The lines are replayed into an ordered dictionary (activity ID -> activity), so that only the final state of
+            the activities is checked for duplicates and overlaps.
+        """
+        if os.path.exists(self.__filename) is False:
+            open(self.__filename, mode="w").close()
+
+        activities_by_id = {}
+        records_count = 0
+        with open(self.__filename, mode="r") as activities_file:
+            for activity_line in activities_file:
+                if activity_line.strip() == "":
+                    continue
+                records_count += 1
+                activity_dictionary = json.loads(activity_line)
+                if activity_dictionary.get("removed", False):
+                    activities_by_id.pop(int(activity_dictionary["id"]), None)
+                else:
+                    activity = self.__convert_dictionary_to_activity(activity_dictionary)
+                    activities_by_id[activity.id] = activity
+        self._bulk_load_activities(activities_by_id.values())
+        self.__stale_records = records_count - len(activities_by_id)
+
+    def __append_line(self, line, new_stale_lines):
+        """
+        Appends a line to the file and compacts the file if it has too many stale lines.
+        :param line: the line to be appended
+        :param new_stale_lines: the number of lines that become stale (0 for an add, 1 for an update, 2 for a remove,
+            since both the removed line and the removal itself become stale)
+        """
+        with open(self.__filename, mode="a") as activities_file:
+            activities_file.write(line)
+        self.__stale_records += new_stale_lines
+        if self.__stale_records >= max(self.__minimum_stale_records, len(self._activities_by_id)):
+            self.compact()
+
+    def compact(self):
+        """
+        Rewrites the file using only the activities from memory (atomically, so it is never left half-written).
+        """
+        activities_lines = [self.__convert_activity_to_line(activity) for activity in self._activities_list]
+        Utility.write_file_atomically(self.__filename, "".join(activities_lines))
+        self.__stale_records = 0
+
+    @property
+    def activities_list(self):
+        """ Getter for the list of activities (i.e. all the activities that are in the repository) """
+        return self._activities_list
+
+    @activities_list.setter
+    def activities_list(self, new_activities_list):
+        """
+        Setter for the list of activities.
+        Raises ActivityRepositoryError if the supposed new list of activities is actually not a list, or if it does not
+            contain activities.
+        :param new_activities_list: the new list of activities
+        Rewrites the file using the activities from the new list.
+        """
+        ActivityRepository.activities_list.fset(self, new_activities_list)
+        self.compact()
+
+    def save_activity(self, new_activity):
+        """
+        Method that adds a new activity in the repository of activities.
+        Raises ActivityRepositoryError if there already exists an activity having the same ID as the new activity or
+            if there is another activity in the repository that takes place in the same time time as the new activity.
+        :param new_activity: the new activity that is wanted to be introduced in the repository
+        Appends the new activity to the file.
+        """
+        super().save_activity(new_activity)
+        self.__append_line(self.__convert_activity_to_line(new_activity), 0)
+
+    def remove_activity(self, remove_activity_id):
+        """
+        Removes an activity from the repository by its ID.
+        Raises ActivityRepositoryError if there is no activity having the received ID.
+        :param remove_activity_id: the ID of the activity that needs to be removed
+        Appends a removal line to the file.
+        """
+        super().remove_activity(remove_activity_id)
+        removal_dictionary = {"id": remove_activity_id, "removed": True}
+        self.__append_line(json.dumps(removal_dictionary, separators=COMPACT_SEPARATORS) + "\n", 2)
+
+    def update_activity(self, to_update_activity_id, updated_activity):
+        """
+        Receives an activity ID and an updated version of that activity, and replaces the attributes of the old activity
+            with the updated attributes.
+        Raises ActivityRepositoryError if there is no activity in the repository having the given ID or if the new
+            activity takes place in the same time with another activity already existing in the repository.
+        :param to_update_activity_id: the ID of the activity that needs to be updated
+        :param updated_activity: the updated version of the searched activity
+        Appends the updated activity to the file.
+        """
+        super().update_activity(to_update_activity_id, updated_activity)
+        self.__append_line(self.__convert_activity_to_line(super().find_activity(to_update_activity_id)), 1)
+
+
+class JsonLinesPersonRepository(PersonRepository):
+    """
+    Class used to instantiate persons repositories based on JSON Lines files.
+    Inherits from the base class PersonRepository.
+    Just like the JSON Lines activity repository, the file is read only once and every change is appended to it as
+        a single line ({"id": ..., "removed": true} for a removed person), the file being compacted when it has more
+        stale lines than persons.
+    """
+
+    def __init__(self, filename, minimum_stale_records=MINIMUM_STALE_RECORDS):
+        """
+        The constructor of a person repository based on a JSON Lines file, which calls the __init__ method of the base
+        class, but in addition receives the name of the file from which data is loaded and into which data is saved.
+        The file is created if it does not exist.
+        :param filename: the name of the JSON Lines file
+        :param minimum_stale_records: the number of stale lines the file must have before being compacted
+        """
+        super().__init__()
+        self.__filename = filename
+        self.__minimum_stale_records = minimum_stale_records
+        self.__stale_records = 0
+        self.__load_persons_from_file_into_memory()
+
+    @staticmethod
+    def __convert_person_to_line(person):
+        """
+        Converts a person into a line of the file (including the new line character).
+        :param person: the person to be converted
+        :return: the compact JSON representation of the person
+        """
+        person_dictionary = {
+            "id": person.id,
+            "name": person.name,
+            "phone_number": person.phone_number
+        }
+        return json.dumps(person_dictionary, separators=COMPACT_SEPARATORS) + "\n"
+
+    def __load_persons_from_file_into_memory(self):
+        """
+        Reads the file line by line and transfers its contents into memory (i.e. the list of persons).
+        """
+        if os.path.exists(self.__filename) is False:
+            open(self.__filename, mode="w").close()
+
+        persons_by_id = {}
+        records_count = 0
+        with open(self.__filename, mode="r") as persons_file:
+            for person_line in persons_file:
+                if person_line.strip() == "":
+                    continue
+                records_count += 1
+                person_dictionary = json.loads(person_line)
+                person_id = int(person_dictionary["id"])
+                if person_dictionary.get("removed", False):
+                    persons_by_id.pop(person_id, None)
+                else:
+                    persons_by_id[person_id] = Person(person_id, person_dictionary["name"],
+                                                      person_dictionary["phone_number"])
+        self._bulk_load_persons(persons_by_id.values())
+        self.__stale_records = records_count - len(persons_by_id)
+
+    def __append_line(self, line, new_stale_lines):
+        """
+        Appends a line to the file and compacts the file if it has too many stale lines.
+        :param line: the line to be appended
+        :param new_stale_lines: the number of lines that become stale (0 for an add, 1 for an update, 2 for a remove,
+            since both the removed line and the removal itself become stale)
+        """
+        with open(self.__filename, mode="a") as persons_file:
+            persons_file.write(line)
+        self.__stale_records += new_stale_lines
+        if self.__stale_records >= max(self.__minimum_stale_records, len(self._persons_by_id)):
+            self.compact()
+
+    def compact(self):
+        """
+        Rewrites the file using only the persons from memory (atomically, so it is never left half-written).
+        """
+        persons_lines = [self.__convert_person_to_line(person) for person in self._person_list]
+        Utility.write_file_atomically(self.__filename, "".join(persons_lines))
+        self.__stale_records = 0
+
+    @property
+    def person_list(self):
+        """ Getter for the list of persons in the repository """
+        return self._person_list
+
+    @person_list.setter
+    def person_list(self, new_persons_list):
+        """
+        Setter for the list of persons.
+        Raises PersonRepositoryError if the new value of the list of persons is actually not a list or if the list
+            does not contain objects of type Person.
+        :param new_persons_list: the new list of persons
+        Rewrites the file using the persons from the new list.
+        """
+        PersonRepository.person_list.fset(self, new_persons_list)
+        self.compact()
+
+    def save_person(self, new_person):
+        """
+        Adds a new person to the repository.
+        Raises PersonRepositoryError if there already exists a person having the same ID with the new person.
+        :param new_person: the new person that is wanted to be added to the repository
+        Appends the new person to the file.
+        """
+        super().save_person(new_person)
+        self.__append_line(self.__convert_person_to_line(new_person), 0)
+
+    def remove_person(self, remove_person_id):
+        """
+        Removes a person from the repository by a given ID.
+        Raises PersonRepositoryError if there is no person having the given ID in the repository.
+        :param remove_person_id: the ID of the person to be removed
+        Appends a removal line to the file.
+        """
+        super().remove_person(remove_person_id)
+        removal_dictionary = {"id": remove_person_id, "removed": True}
+        self.__append_line(json.dumps(removal_dictionary, separators=COMPACT_SEPARATORS) + "\n", 2)
+
+    def update_person(self, person_to_update_id, updated_person):
+        """
+        Receives the ID of the person to be updated, and also the updated object (i.e. person) replacing the old
+            object from the repository with the new one.
+        Raises PersonRepositoryError if there is no person having the given ID.
+        :param person_to_update_id: positive integer, the ID of the person to be updated
+        :param updated_person: the updated person
+        Appends the updated person to the file.
+        """
+        super().update_person(person_to_update_id, updated_person)
+        self.__append_line(self.__convert_person_to_line(super().find_person(person_to_update_id)), 1)
@@ -0,0 +1,562 @@
+import mmap
+import os
+import struct
+
+from DOMAIN.entities import Person, Activity
+from EXCEPTIONS.custom_exceptions import PersonRepositoryError, ActivityRepositoryError
+from INFRASTRUCTURE.inmemory_repositories import PersonRepository, ActivityRepository, PLANNER_CONFLICTS
+
+"""
+Record files:
+    The data is stored in two binary files:
+        - the record file ("activities.dat"), made of a header followed by fixed-width records;
+        - the heap file ("activities.dat.heap"), in which the variable-length data (strings, lists of IDs) is appended.
+    Each record keeps the offset and the length of its variable-length data inside the heap file.
+
+    Because all the records have the same width, the n-th record starts at HEADER_SIZE + n * record_size, so a record
+    can be rewritten in place (e.g. when an activity is updated) and deleted by overwriting only its first byte
+    (the flags byte becomes 0, i.e. the record is a tombstone).
+
+    The tombstones and the heap data of the deleted and rewritten records are stale. When there are at least as many
+    stale records as live ones (and at least MINIMUM_STALE_RECORDS of them), or at least as many stale heap bytes as
+    live ones (and at least MINIMUM_STALE_HEAP_BYTES of them), the files are compacted, i.e. rewritten using only the
+    live data from memory, so they are never more than about twice as large as their live data.
+
+    A compaction never changes the files in place: the new files are written next to the old ones and renamed over
+    them (see RecordFile.replace_records), so a crash or a full disk during a compaction does not lose the data.
+
+struct:
+    struct.Struct("<Bqi") -> little-endian: 1 byte unsigned, 8 bytes signed, 4 bytes signed
+    record_struct.pack(values...) -> bytes
+    record_struct.unpack(bytes) -> tuple of values
+
+mmap:
+    mapped_file = mmap.mmap(file.fileno(), 0) -> the whole file is accessed as a bytearray, only the accessed pages
+        are read from / written to the disk
+    mapped_file[start:end] = new_bytes -> writes in place
+"""
+
+RECORD_FILE_MAGIC = b"APRF"
+HEADER_STRUCT = struct.Struct("<4sIQ")
+HEAP_EXTENSION = ".heap"
+TEMPORARY_EXTENSION = ".tmp"
+COMPACTED_EXTENSION = ".compacted"
+LIVE_RECORD = 1
+DELETED_RECORD = 0
+MINIMUM_STALE_RECORDS = 1024
+MINIMUM_STALE_HEAP_BYTES = 65536
+
+# flags, id, date key (yyyymmdd), hour, participants offset, participants count, description offset, description length
+ACTIVITY_RECORD_STRUCT = struct.Struct("<BqiBqIqI")
+# flags, id, name offset, name length, phone number offset, phone number length
+PERSON_RECORD_STRUCT = struct.Struct("<BqqIqI")
+
+
+def get_activity_heap_length(record):
+    """ Returns the number of heap bytes used by an activity record (its participants and its description) """
+    return record[5] * 8 + record[7]
+
+
+def get_person_heap_length(record):
+    """ Returns the number of heap bytes used by a person record (its name and its phone number) """
+    return record[3] + record[5]
+
+
+def append_to_heap(heap, data):
+    """
+    Appends some variable-length data to a heap built in memory (e.g. the new heap of a compaction).
+    :param heap: the bytearray holding the heap
+    :param data: the bytes to be appended
+    :return: the offset of the data inside the heap
+    """
+    offset = len(heap)
+    heap += data
+    return offset
+
+
+class RecordFile:
+    """
+    Class used to instantiate record files, i.e. memory-mapped files of fixed-width records, together with the heap
+    file that stores their variable-length data.
+    """
+
+    def __init__(self, filename, record_struct, get_heap_length):
+        """
+        The constructor of a record file. The files are created if they do not exist, and a compaction interrupted by
+            a crash is finished (or discarded) first.
+        Raises ValueError if the file exists, but it is not a record file having the expected record size.
+        :param filename: the name of the record file
+        :param record_struct: the struct.Struct describing one record; its first field must be the flags byte
+        :param get_heap_length: the function returning the number of heap bytes used by a record
+        """
+        self.__filename = filename
+        self.__record_struct = record_struct
+        self.__get_heap_length = get_heap_length
+        self.__heap_filename = filename + HEAP_EXTENSION
+        self.__temporary_filename = filename + TEMPORARY_EXTENSION
+        self.__temporary_heap_filename = self.__heap_filename + TEMPORARY_EXTENSION
+        self.__compacted_filename = filename + COMPACTED_EXTENSION
+        self.__record_file = None
+        self.__mapped_records = None
+        self.__heap_file = None
+
+        self.__finish_interrupted_compaction()
+        if os.path.exists(filename) is False or os.path.getsize(filename) == 0:
+            with open(filename, mode="wb") as record_file:
+                record_file.write(HEADER_STRUCT.pack(RECORD_FILE_MAGIC, record_struct.size, 0))
+        if os.path.exists(self.__heap_filename) is False:
+            open(self.__heap_filename, mode="wb").close()
+        self.__open_files()
+
+        # the data left stale by the previous sessions is counted once, so that it is compacted as well
+        self.__stale_records = 0
+        live_heap_bytes = 0
+        for slot in range(self.__records_count):
+            record = self.__read_record(slot)
+            if record[0] == LIVE_RECORD:
+                live_heap_bytes += self.__get_heap_length(record)
+            else:
+                self.__stale_records += 1
+        self.__stale_heap_bytes = self.__heap_size - live_heap_bytes
+
+    def __open_files(self):
+        """
+        Opens the record file (mapped in memory) and the heap file.
+        Raises ValueError if the record file is not a record file having the expected record size.
+        """
+        self.__record_file = open(self.__filename, mode="r+b")
+        self.__mapped_records = mmap.mmap(self.__record_file.fileno(), 0)
+        magic, record_size, self.__records_count = HEADER_STRUCT.unpack_from(self.__mapped_records, 0)
+        if magic != RECORD_FILE_MAGIC or record_size != self.__record_struct.size:
+            self.close()
+            raise ValueError(f"{self.__filename} is not a valid record file!")
+        self.__heap_file = open(self.__heap_filename, mode="ab")
+        self.__heap_size = self.__heap_file.tell()
+
+    def __finish_interrupted_compaction(self):
+        """
+        Finishes a compaction that was interrupted after its new record file was committed (see replace_records), or
+            removes the temporary files of a compaction that was interrupted before, keeping the old files.
+        """
+        if os.path.exists(self.__compacted_filename):
+            if os.path.exists(self.__temporary_heap_filename):
+                os.replace(self.__temporary_heap_filename, self.__heap_filename)
+            os.replace(self.__compacted_filename, self.__filename)
+        for temporary_filename in [self.__temporary_filename, self.__temporary_heap_filename]:
+            if os.path.exists(temporary_filename):
+                os.remove(temporary_filename)
+
+    @staticmethod
+    def __write_synced_file(filename, contents):
+        """
+        Writes a new file and flushes it to the disk.
+        :param filename: the name of the file
+        :param contents: the contents of the file, as bytes
+        """
+        with open(filename, mode="wb") as new_file:
+            new_file.write(contents)
+            new_file.flush()
+            os.fsync(new_file.fileno())
+
+    def __get_record_offset(self, slot):
+        """ Returns the position in the file of the record having the given slot (i.e. index) """
+        return HEADER_STRUCT.size + slot * self.__record_struct.size
+
+    def __read_record(self, slot):
+        """ Returns the values of the record having the given slot """
+        return self.__record_struct.unpack_from(self.__mapped_records, self.__get_record_offset(slot))
+
+    def read_live_records(self):
+        """
+        Reads all the records that are not deleted, in the order of their slots, together with the heap file.
+        :return: a tuple (list of (slot, record values), heap contents as bytes)
+        """
+        live_records = []
+        for slot in range(self.__records_count):
+            record = self.__read_record(slot)
+            if record[0] == LIVE_RECORD:
+                live_records.append((slot, record))
+
+        with open(self.__heap_filename, mode="rb") as heap_file:
+            heap = heap_file.read()
+        return live_records, heap
+
+    def write_heap(self, data):
+        """
+        Appends variable-length data to the heap file.
+        :param data: the bytes to be appended
+        :return: the offset of the data inside the heap file
+        """
+        offset = self.__heap_size
+        self.__heap_file.write(data)
+        self.__heap_size += len(data)
+        return offset
+
+    def append_record(self, record):
+        """
+        Appends a record at the end of the record file, growing the file (and its mapping) if needed.
+        :param record: the values of the record, the first one being the flags byte
+        :return: the slot of the new record
+        """
+        self.__heap_file.flush()
+        slot = self.__records_count
+        end_offset = self.__get_record_offset(slot + 1)
+        if end_offset > len(self.__mapped_records):
+            # the file grows geometrically, so that appending n records remaps the file only O(log n) times
+            mapped_size = len(self.__mapped_records)
+            self.__mapped_records.close()
+            self.__record_file.truncate(max(end_offset, 2 * mapped_size))
+            self.__mapped_records = mmap.mmap(self.__record_file.fileno(), 0)
+        self.__record_struct.pack_into(self.__mapped_records, self.__get_record_offset(slot), *record)
+        self.__records_count += 1
+        HEADER_STRUCT.pack_into(self.__mapped_records, 0, RECORD_FILE_MAGIC, self.__record_struct.size,
+                                self.__records_count)
+        return slot
+
+    def write_record(self, slot, record):
+        """
+        Rewrites a record in place. The heap data of the old version of the record becomes stale.
+        :param slot: the slot of the record
+        :param record: the new values of the record
+        """
+        self.__heap_file.flush()
+        self.__stale_heap_bytes += self.__get_heap_length(self.__read_record(slot))
+        self.__record_struct.pack_into(self.__mapped_records, self.__get_record_offset(slot), *record)
+
+    def delete_record(self, slot):
+        """
+        Marks a record as deleted by overwriting its flags byte. The record and its heap data become stale.
+        :param slot: the slot of the record
+        """
+        self.__stale_records += 1
+        self.__stale_heap_bytes += self.__get_heap_length(self.__read_record(slot))
+        self.__mapped_records[self.__get_record_offset(slot)] = DELETED_RECORD
+
+    def needs_compaction(self, minimum_stale_records=MINIMUM_STALE_RECORDS):
+        """
+        Checks whether the files have enough stale data to be compacted.
+        :param minimum_stale_records: the number of stale records the file must have before being compacted
+        :return: True if there are at least as many stale records as live ones (and at least minimum_stale_records), or
+            at least as many stale heap bytes as live ones (and at least MINIMUM_STALE_HEAP_BYTES), False otherwise
+        """
+        live_records = self.__records_count - self.__stale_records
+        live_heap_bytes = self.__heap_size - self.__stale_heap_bytes
+        return (self.__stale_records >= max(minimum_stale_records, live_records) or
+                self.__stale_heap_bytes >= max(MINIMUM_STALE_HEAP_BYTES, live_heap_bytes))
+
+    def replace_records(self, records, heap):
+        """
+        Replaces all the records and the heap (e.g. in order to compact the files), without changing the files in place:
+            1. the new record file and the new heap file are written as temporary files and flushed to the disk;
+            2. the new record file is renamed to "<filename>.compacted", which commits the replacement;
+            3. the new heap file is renamed over the heap file, then the new record file over the record file.
+        A crash before step 2 keeps the old files, and a crash after it is finished when the files are opened again.
+        :param records: the values of the new records, in the order of their slots
+        :param heap: the contents of the new heap file, as bytes (the records keep their offsets inside it)
+        """
+        record_file_contents = bytearray(HEADER_STRUCT.pack(RECORD_FILE_MAGIC, self.__record_struct.size, len(records)))
+        for record in records:
+            record_file_contents += self.__record_struct.pack(*record)
+        self.__write_synced_file(self.__temporary_heap_filename, heap)
+        self.__write_synced_file(self.__temporary_filename, bytes(record_file_contents))
+
+        self.close()
+        os.replace(self.__temporary_filename, self.__compacted_filename)
+        self.__finish_interrupted_compaction()
+        self.__open_files()
+        self.__stale_records = 0
+        self.__stale_heap_bytes = 0
+
+    def flush(self):
+        """ Writes the modified pages of the record file and the buffered heap data to the disk """
+        self.__heap_file.flush()
+        self.__mapped_records.flush()
+
+    def close(self):
+        """ Flushes and closes the files """
+        if self.__mapped_records is not None and self.__mapped_records.closed is False:
+            self.__mapped_records.flush()
+            self.__mapped_records.close()
+        if self.__record_file is not None:
+            self.__record_file.close()
+        if self.__heap_file is not None:
+            self.__heap_file.close()
+
+
+class RecordFileActivityRepository(ActivityRepository):
+    """
+    Class used to instantiate activities repositories based on record files.
+    Inherits from the base class ActivityRepository.
+    Each activity is a fixed-width record (ID, date, hour, and the positions of its participants and of its description
+        inside the heap file). The records are read once, at the instantiation of the repository. Afterwards, adding
+        an activity appends one record, updating an activity rewrites its record in place and removing an activity
+        overwrites a single byte. The files are compacted when they have too much stale data (see RecordFile).
+    """
+
+    def __init__(self, filename, minimum_stale_records=MINIMUM_STALE_RECORDS, conflict_mode=PLANNER_CONFLICTS):
+        """
+        The constructor of an activity repository based on a record file, which calls the __init__ method of the base
+        class, but in addition receives the name of the record file from which data is loaded and into which data is
+        saved.
+        Raises ActivityRepositoryError if the file is not a valid record file of activities.
+        :param filename: the name of the record file
+        :param minimum_stale_records: the number of stale records the file must have before being compacted
+        :param conflict_mode: the conflict mode of the repository (see ActivityRepository)
+        """
+        super().__init__(conflict_mode)
+        try:
+            self.__record_file = RecordFile(filename, ACTIVITY_RECORD_STRUCT, get_activity_heap_length)
+        except ValueError as ve:
+            raise ActivityRepositoryError(str(ve) + "\n")
+        self.__minimum_stale_records = minimum_stale_records
+        self.__slots_by_id = {}
+        self.__load_activities_from_file_into_memory()
+        self.__compact_if_needed()
+
+    def __load_activities_from_file_into_memory(self):
+        """
+        Decodes all the live records of the file into the list of activities.
+        """
+        live_records, heap = self.__record_file.read_live_records()
+        activities = []
+        for slot, record in live_records:
+            _, activity_id, date_key, hour, participants_offset, participants_count, description_offset, \
+                description_length = record
+            participants_ids = list(struct.unpack_from(f"<{participants_count}q", heap, participants_offset))
+            description = heap[description_offset:description_offset + description_length].decode()
+            calendar_date = {"year": date_key // 10000, "month": date_key // 100 % 100, "day": date_key % 100}
+            activities.append(Activity(activity_id, participants_ids, calendar_date, hour, description))
+            self.__slots_by_id[activity_id] = slot
+        self._bulk_load_activities(activities)
+
+    @staticmethod
+    def __encode_activity(activity, write_heap):
+        """
+        Appends the variable-length data of an activity to a heap and creates its fixed-width record.
+        :param activity: the activity to be encoded
+        :param write_heap: the function appending some bytes to the heap and returning their offset
+        :return: the values of the record
+        """
+        participants_offset = write_heap(struct.pack(f"<{len(activity.participants_ids)}q", *activity.participants_ids))
+        encoded_description = activity.description.encode()
+        description_offset = write_heap(encoded_description)
+        date_key = activity.year * 10000 + activity.month * 100 + activity.day
+        return (LIVE_RECORD, activity.id, date_key, activity.time, participants_offset,
+                len(activity.participants_ids), description_offset, len(encoded_description))
+
+    def __write_all_activities(self):
+        """
+        Replaces all the records of the file with the activities from memory, in the order of the list of activities.
+        """
+        heap = bytearray()
+        records = [self.__encode_activity(activity, lambda data: append_to_heap(heap, data))
+                   for activity in self._activities_list]
+        self.__record_file.replace_records(records, bytes(heap))
+        self.__slots_by_id = {activity.id: slot for slot, activity in enumerate(self._activities_list)}
+
+    def __compact_if_needed(self):
+        """
+        Compacts the file (i.e. rewrites only the live activities) if it has too much stale data.
+        """
+        if self.__record_file.needs_compaction(self.__minimum_stale_records):
+            self.__write_all_activities()
+
+    @property
+    def activities_list(self):
+        """ Getter for the list of activities (i.e. all the activities that are in the repository) """
+        return self._activities_list
+
+    @activities_list.setter
+    def activities_list(self, new_activities_list):
+        """
+        Setter for the list of activities.
+        Raises ActivityRepositoryError if the supposed new list of activities is actually not a list, or if it does not
+            contain activities.
+        :param new_activities_list: the new list of activities
+        Replaces all the records of the file with the activities from the new list.
+        """
+        ActivityRepository.activities_list.fset(self, new_activities_list)
+        self.__write_all_activities()
+
+    def save_activity(self, new_activity):
+        """
+        Method that adds a new activity in the repository of activities.
+        Raises ActivityRepositoryError if there already exists an activity having the same ID as the new activity or
+            if there is another activity in the repository that takes place in the same time time as the new activity.
+        :param new_activity: the new activity that is wanted to be introduced in the repository
+        Appends the record of the new activity to the file.
+        """
+        super().save_activity(new_activity)
+        record = self.__encode_activity(new_activity, self.__record_file.write_heap)
+        self.__slots_by_id[new_activity.id] = self.__record_file.append_record(record)
+
+    def remove_activity(self, remove_activity_id):
+        """
+        Removes an activity from the repository by its ID.
+        Raises ActivityRepositoryError if there is no activity having the received ID.
+        :param remove_activity_id: the ID of the activity that needs to be removed
+        Marks the record of the activity as deleted, compacting the file if needed.
+        """
+        super().remove_activity(remove_activity_id)
+        self.__record_file.delete_record(self.__slots_by_id.pop(remove_activity_id))
+        self.__compact_if_needed()
+
+    def update_activity(self, to_update_activity_id, updated_activity):
+        """
+        Receives an activity ID and an updated version of that activity, and replaces the attributes of the old activity
+            with the updated attributes.
+        Raises ActivityRepositoryError if there is no activity in the repository having the given ID or if the new
+            activity takes place in the same time with another activity already existing in the repository.
+        :param to_update_activity_id: the ID of the activity that needs to be updated
+        :param updated_activity: the updated version of the searched activity
+        Rewrites the record of the activity in place, compacting the file if needed.
+        """
+        super().update_activity(to_update_activity_id, updated_activity)
+        activity = super().find_activity(to_update_activity_id)
+        record = self.__encode_activity(activity, self.__record_file.write_heap)
+        self.__record_file.write_record(self.__slots_by_id[to_update_activity_id], record)
+        self.__compact_if_needed()
+
+    def flush(self):
+        """ Writes the pending changes of the record file to the disk """
+        self.__record_file.flush()
+
+    def close(self):
+        """ Closes the record file """
+        self.__record_file.close()
+
+
+class RecordFilePersonRepository(PersonRepository):
+    """
+    Class used to instantiate persons repositories based on record files.
+    Inherits from the base class PersonRepository.
+    Each person is a fixed-width record (ID and the positions of the name and of the phone number inside the heap file),
+        which is appended when the person is added, rewritten in place when the person is updated and marked as
+        deleted when the person is removed. The files are compacted when they have too much stale data (see RecordFile).
+    """
+
+    def __init__(self, filename, minimum_stale_records=MINIMUM_STALE_RECORDS):
+        """
+        The constructor of a person repository based on a record file, which calls the __init__ method of the base
+        class, but in addition receives the name of the record file from which data is loaded and into which data is
+        saved.
+        Raises PersonRepositoryError if the file is not a valid record file of persons.
+        :param filename: the name of the record file
+        :param minimum_stale_records: the number of stale records the file must have before being compacted
+        """
+        super().__init__()
+        try:
+            self.__record_file = RecordFile(filename, PERSON_RECORD_STRUCT, get_person_heap_length)
+        except ValueError as ve:
+            raise PersonRepositoryError(str(ve) + "\n")
+        self.__minimum_stale_records = minimum_stale_records
+        self.__slots_by_id = {}
+        self.__load_persons_from_file_into_memory()
+        self.__compact_if_needed()
+
+    def __load_persons_from_file_into_memory(self):
+        """
+        Decodes all the live records of the file into the list of persons.
+        """
+        live_records, heap = self.__record_file.read_live_records()
+        persons = []
+        for slot, record in live_records:
+            _, person_id, name_offset, name_length, phone_number_offset, phone_number_length = record
+            name = heap[name_offset:name_offset + name_length].decode()
+            phone_number = heap[phone_number_offset:phone_number_offset + phone_number_length].decode()
+            persons.append(Person(person_id, name, phone_number))
+            self.__slots_by_id[person_id] = slot
+        self._bulk_load_persons(persons)
+
+    @staticmethod
+    def __encode_person(person, write_heap):
+        """
+        Appends the variable-length data of a person to a heap and creates its fixed-width record.
+        :param person: the person to be encoded
+        :param write_heap: the function appending some bytes to the heap and returning their offset
+        :return: the values of the record
+        """
+        encoded_name = person.name.encode()
+        encoded_phone_number = person.phone_number.encode()
+        name_offset = write_heap(encoded_name)
+        phone_number_offset = write_heap(encoded_phone_number)
+        return LIVE_RECORD, person.id, name_offset, len(encoded_name), phone_number_offset, len(encoded_phone_number)
+
+    def __write_all_persons(self):
+        """
+        Replaces all the records of the file with the persons from memory, in the order of the list of persons.
+        """
+        heap = bytearray()
+        records = [self.__encode_person(person, lambda data: append_to_heap(heap, data))
+                   for person in self._person_list]
+        self.__record_file.replace_records(records, bytes(heap))
+        self.__slots_by_id = {person.id: slot for slot, person in enumerate(self._person_list)}
+
+    def __compact_if_needed(self):
+        """
+        Compacts the file (i.e. rewrites only the live persons) if it has too much stale data.
+        """
+        if self.__record_file.needs_compaction(self.__minimum_stale_records):
+            self.__write_all_persons()
+
+    @property
+    def person_list(self):
+        """ Getter for the list of persons in the repository """
+        return self._person_list
+
+    @person_list.setter
+    def person_list(self, new_persons_list):
+        """
+        Setter for the list of persons.
+        Raises PersonRepositoryError if the new value of the list of persons is actually not a list or if the list
+            does not contain objects of type Person.
+        :param new_persons_list: the new list of persons
+        Replaces all the records of the file with the persons from the new list.
+        """
+        PersonRepository.person_list.fset(self, new_persons_list)
+        self.__write_all_persons()
+
+    def save_person(self, new_person):
+        """
+        Adds a new person to the repository.
+        Raises PersonRepositoryError if there already exists a person having the same ID with the new person.
+        :param new_person: the new person that is wanted to be added to the repository
+        Appends the record of the new person to the file.
+        """
+        super().save_person(new_person)
+        record = self.__encode_person(new_person, self.__record_file.write_heap)
+        self.__slots_by_id[new_person.id] = self.__record_file.append_record(record)
+
+    def remove_person(self, remove_person_id):
+        """
+        Removes a person from the repository by a given ID.
+        Raises PersonRepositoryError if there is no person having the given ID in the repository.
+        :param remove_person_id: the ID of the person to be removed
+        Marks the record of the person as deleted, compacting the file if needed.
+        """
+        super().remove_person(remove_person_id)
+        self.__record_file.delete_record(self.__slots_by_id.pop(remove_person_id))
+        self.__compact_if_needed()
+
+    def update_person(self, person_to_update_id, updated_person):
+        """
+        Receives the ID of the person to be updated, and also the updated object (i.e. person) replacing the old
+            object from the repository with the new one.
+        Raises PersonRepositoryError if there is no person having the given ID.
+        :param person_to_update_id: positive integer, the ID of the person to be updated
+        :param updated_person: the updated person
+        Rewrites the record of the person in place, compacting the file if needed.
+        """
+        super().update_person(person_to_update_id, updated_person)
+        person = super().find_person(person_to_update_id)
+        record = self.__encode_person(person, self.__record_file.write_heap)
+        self.__record_file.write_record(self.__slots_by_id[person_to_update_id], record)
+        self.__compact_if_needed()
+
+    def flush(self):
+        """ Writes the pending changes of the record file to the disk """
+        self.__record_file.flush()
+
+    def close(self):
+        """ Closes the record file """
+        self.__record_file.close()
@@ -0,0 +1,264 @@
+import sqlite3
+
+from DOMAIN.entities import Person, Activity
+from INFRASTRUCTURE.inmemory_repositories import PersonRepository, ActivityRepository, PLANNER_CONFLICTS
+
+"""
+SQLite databases:
+    connection = sqlite3.connect("a.db") -> creates the database file if it does not exist
+    connection.execute(statement, parameters) -> runs one statement, the parameters replace the "?" placeholders
+    connection.executemany(statement, list_of_parameters) -> runs the same statement for each tuple of parameters
+
+Transactions:
+    with connection:
+        connection.execute(...)
+    -> the statements inside the with block are committed together, or rolled back together if an exception occurs
+
+Indexes:
+    CREATE INDEX index_name ON table_name (column_1, column_2) -> lookups by (column_1, column_2) no longer scan the table
+"""
+
+PERSONS_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS persons (
+        id INTEGER NOT NULL UNIQUE,
+        name TEXT NOT NULL,
+        phone_number TEXT NOT NULL
+    );
+"""
+
+ACTIVITIES_SCHEMA = """
+    CREATE TABLE IF NOT EXISTS activities (
+        id INTEGER NOT NULL UNIQUE,
+        year INTEGER NOT NULL,
+        month INTEGER NOT NULL,
+        day INTEGER NOT NULL,
+        time INTEGER NOT NULL,
+        description TEXT NOT NULL
+    );
+    CREATE INDEX IF NOT EXISTS activities_time_slot ON activities (year, month, day, time);
+    CREATE TABLE IF NOT EXISTS activity_participants (
+        activity_id INTEGER NOT NULL REFERENCES activities (id) ON DELETE CASCADE,
+        position INTEGER NOT NULL,
+        person_id INTEGER NOT NULL,
+        PRIMARY KEY (activity_id, position)
+    );
+    CREATE INDEX IF NOT EXISTS activity_participants_person ON activity_participants (person_id);
+"""
+
+
+class SqlitePersonRepository(PersonRepository):
+    """
+    Class used to instantiate persons repositories based on SQLite databases.
+    Inherits from the base class PersonRepository.
+    The persons are loaded from the database only once, at the instantiation of the repository. Every change is then
+        written to the database by a single indexed statement (the persons are looked up by their unique ID), run in
+        its own transaction.
+    """
+
+    def __init__(self, filename):
+        """
+        The constructor of a person repository based on a SQLite database, which calls the __init__ method of the base
+        class, but in addition receives the name of the database file from which data is loaded and into which data is
+        saved. The table of persons is created if it does not exist.
+        :param filename: the name of the database file
+        """
+        super().__init__()
+        self.__connection = sqlite3.connect(filename)
+        self.__connection.executescript(PERSONS_SCHEMA)
+        self.__load_persons_from_database_into_memory()
+
+    def __load_persons_from_database_into_memory(self):
+        """
+        Loads all the persons from the database into memory, in the order in which they were added.
+        """
+        rows = self.__connection.execute("SELECT id, name, phone_number FROM persons ORDER BY rowid")
+        self._bulk_load_persons(Person(person_id, name, phone_number) for person_id, name, phone_number in rows)
+
+    @property
+    def person_list(self):
+        """ Getter for the list of persons in the repository """
+        return self._person_list
+
+    @person_list.setter
+    def person_list(self, new_persons_list):
+        """
+        Setter for the list of persons.
+        Raises PersonRepositoryError if the new value of the list of persons is actually not a list or if the list
+            does not contain objects of type Person.
+        :param new_persons_list: the new list of persons
+        Replaces all the persons from the database with the persons from the new list.
+        """
+        PersonRepository.person_list.fset(self, new_persons_list)
+        with self.__connection:
+            self.__connection.execute("DELETE FROM persons")
+            self.__connection.executemany("INSERT INTO persons (id, name, phone_number) VALUES (?, ?, ?)",
+                                          [(person.id, person.name, person.phone_number) for person in
+                                           self._person_list])
+
+    def save_person(self, new_person):
+        """
+        Adds a new person to the repository.
+        Raises PersonRepositoryError if there already exists a person having the same ID with the new person.
+        :param new_person: the new person that is wanted to be added to the repository
+        Inserts the new person into the database.
+        """
+        super().save_person(new_person)
+        with self.__connection:
+            self.__connection.execute("INSERT INTO persons (id, name, phone_number) VALUES (?, ?, ?)",
+                                      (new_person.id, new_person.name, new_person.phone_number))
+
+    def remove_person(self, remove_person_id):
+        """
+        Removes a person from the repository by a given ID.
+        Raises PersonRepositoryError if there is no person having the given ID in the repository.
+        :param remove_person_id: the ID of the person to be removed
+        Deletes the person from the database.
+        """
+        super().remove_person(remove_person_id)
+        with self.__connection:
+            self.__connection.execute("DELETE FROM persons WHERE id = ?", (remove_person_id,))
+
+    def update_person(self, person_to_update_id, updated_person):
+        """
+        Receives the ID of the person to be updated, and also the updated object (i.e. person) replacing the old
+            object from the repository with the new one.
+        Raises PersonRepositoryError if there is no person having the given ID.
+        :param person_to_update_id: positive integer, the ID of the person to be updated
+        :param updated_person: the updated person
+        Updates the person in the database.
+        """
+        super().update_person(person_to_update_id, updated_person)
+        with self.__connection:
+            self.__connection.execute("UPDATE persons SET name = ?, phone_number = ? WHERE id = ?",
+                                      (updated_person.name, updated_person.phone_number, person_to_update_id))
+
+    def close(self):
+        """ Closes the connection to the database """
+        self.__connection.close()
+
+
+class SqliteActivityRepository(ActivityRepository):
+    """
+    Class used to instantiate activities repositories based on SQLite databases.
+    Inherits from the base class ActivityRepository.
+    The activities are stored in two tables: the activities themselves (indexed by their unique ID and by their time
+        slot) and the participants of each activity (a junction table, indexed by the ID of the participant).
+    The activities are loaded from the database only once, at the instantiation of the repository. Every change is then
+        written to the database by indexed statements, run in a single transaction.
+    """
+
+    def __init__(self, filename, conflict_mode=PLANNER_CONFLICTS):
+        """
+        The constructor of an activity repository based on a SQLite database, which calls the __init__ method of the
+        base class, but in addition receives the name of the database file from which data is loaded and into which
+        data is saved. The tables and their indexes are created if they do not exist.
+        :param filename: the name of the database file
+        :param conflict_mode: the conflict mode of the repository (see ActivityRepository)
+        """
+        super().__init__(conflict_mode)
+        self.__connection = sqlite3.connect(filename)
+        self.__connection.execute("PRAGMA foreign_keys = ON")
+        self.__connection.executescript(ACTIVITIES_SCHEMA)
+        self.__load_activities_from_database_into_memory()
+
+    def __load_activities_from_database_into_memory(self):
+        """
+        Loads all the activities from the database into memory, in the order in which they were added.
+        """
+        participants_by_activity_id = {}
+        participants_rows = self.__connection.execute(
+            "SELECT activity_id, person_id FROM activity_participants ORDER BY activity_id, position")
+        for activity_id, person_id in participants_rows:
+            participants_by_activity_id.setdefault(activity_id, []).append(person_id)
+
+        rows = self.__connection.execute(
+            "SELECT id, year, month, day, time, description FROM activities ORDER BY rowid")
+        self._bulk_load_activities(
+            Activity(activity_id, participants_by_activity_id.get(activity_id, []),
+                     {"year": year, "month": month, "day": day}, time, description)
+            for activity_id, year, month, day, time, description in rows)
+
+    def __insert_activity(self, activity):
+        """
+        Inserts an activity and its participants into the database (without committing the transaction).
+        :param activity: the activity to be inserted
+        """
+        self.__connection.execute(
+            "INSERT INTO activities (id, year, month, day, time, description) VALUES (?, ?, ?, ?, ?, ?)",
+            (activity.id, activity.year, activity.month, activity.day, activity.time, activity.description))
+        self.__insert_participants(activity)
+
+    def __insert_participants(self, activity):
+        """
+        Inserts the participants of an activity into the junction table (without committing the transaction).
+        :param activity: the activity whose participants are inserted
+        """
+        self.__connection.executemany(
+            "INSERT INTO activity_participants (activity_id, position, person_id) VALUES (?, ?, ?)",
+            [(activity.id, position, person_id) for position, person_id in enumerate(activity.participants_ids)])
+
+    @property
+    def activities_list(self):
+        """ Getter for the list of activities (i.e. all the activities that are in the repository) """
+        return self._activities_list
+
+    @activities_list.setter
+    def activities_list(self, new_activities_list):
+        """
+        Setter for the list of activities.
+        Raises ActivityRepositoryError if the supposed new list of activities is actually not a list, or if it does not
+            contain activities.
+        :param new_activities_list: the new list of activities
+        Replaces all the activities from the database with the activities from the new list.
+        """
+        ActivityRepository.activities_list.fset(self, new_activities_list)
+        with self.__connection:
+            self.__connection.execute("DELETE FROM activities")
+            for activity in self._activities_list:
+                self.__insert_activity(activity)
+
+    def save_activity(self, new_activity):
+        """
+        Method that adds a new activity in the repository of activities.
+        Raises ActivityRepositoryError if there already exists an activity having the same ID as the new activity or
+            if there is another activity in the repository that takes place in the same time time as the new activity.
+        :param new_activity: the new activity that is wanted to be introduced in the repository
+        Inserts the new activity and its participants into the database.
+        """
+        super().save_activity(new_activity)
+        with self.__connection:
+            self.__insert_activity(new_activity)
+
+    def remove_activity(self, remove_activity_id):
+        """
+        Removes an activity from the repository by its ID.
+        Raises ActivityRepositoryError if there is no activity having the received ID.
+        :param remove_activity_id: the ID of the activity that needs to be removed
+        Deletes the activity from the database (its participants are deleted in cascade).
+        """
+        super().remove_activity(remove_activity_id)
+        with self.__connection:
+            self.__connection.execute("DELETE FROM activities WHERE id = ?", (remove_activity_id,))
+
+    def update_activity(self, to_update_activity_id, updated_activity):
+        """
+        Receives an activity ID and an updated version of that activity, and replaces the attributes of the old activity
+            with the updated attributes.
+        Raises ActivityRepositoryError if there is no activity in the repository having the given ID or if the new
+            activity takes place in the same time with another activity already existing in the repository.
+        :param to_update_activity_id: the ID of the activity that needs to be updated
+        :param updated_activity: the updated version of the searched activity
+        Updates the activity and replaces its participants in the database.
+        """
+        super().update_activity(to_update_activity_id, updated_activity)
+        activity = super().find_activity(to_update_activity_id)
+        with self.__connection:
+            self.__connection.execute(
+                "UPDATE activities SET year = ?, month = ?, day = ?, time = ?, description = ? WHERE id = ?",
+                (activity.year, activity.month, activity.day, activity.time, activity.description, activity.id))
+            self.__connection.execute("DELETE FROM activity_participants WHERE activity_id = ?", (activity.id,))
+            self.__insert_participants(activity)
+
+    def close(self):
+        """ Closes the connection to the database """
+        self.__connection.close()
@@ -1,5 +1,9 @@
+import os
+
 from DOMAIN.entities import Person, Activity
-from INFRASTRUCTURE.inmemory_repositories import PersonRepository, ActivityRepository
+from INFRASTRUCTURE.group_commit import GroupCommit, DEFAULT_BATCH_SIZE
+from INFRASTRUCTURE.indexes import DEFAULT_MAXIMUM_EDIT_DISTANCE
+from INFRASTRUCTURE.inmemory_repositories import PersonRepository, ActivityRepository, PLANNER_CONFLICTS
 from UTILITY.utils import Utility
 
 """
@@ -40,21 +44,79 @@ file.seek(offset, from)
     offset = the number of characters we want to move from the specified starting position
 """
 
+JOURNAL_EXTENSION = ".journal"
+DEFAULT_COMPACTION_THRESHOLD = 1024 * 1024
+
 
 class TextFileActivityRepository(ActivityRepository):
     """
     Class used to instantiate activities repositories based on text files.
     Inherits from the base class ActivityRepository.
+    The repository can work in two modes:
+        - the default mode, in which the file is read before every operation if it changed since it was last read or
+            written (its modification time, size and inode are compared), and rewritten after every operation;
+        - the journal mode, in which the file (together with its journal) is read only once, at the instantiation of
+            the repository, and every change is appended to the journal as an "add", "update" or "remove" record.
+            When the journal grows beyond a given size, it is compacted: the file is rewritten using the data from
+            memory and the journal is emptied.
     """
 
-    def __init__(self, filename):
+    def __init__(self, filename, journal_mode=False, compaction_threshold=DEFAULT_COMPACTION_THRESHOLD,
+                 batch_size=DEFAULT_BATCH_SIZE, time_window=None, conflict_mode=PLANNER_CONFLICTS):
         """
         Constructor of a text file based activity repository, which calls the __init__ of the base class, but in addition,
         receives a filename from which the data must be loaded and into which the data must be saved.
         :param filename: the name of the file
+        :param journal_mode: True if the changes must be appended to a journal instead of rewriting the whole file
+        :param compaction_threshold: the size (in bytes) the journal can reach before being compacted into the file
+        :param batch_size: in the default mode, the number of changes after which the file is rewritten
+        :param time_window: in the default mode, the number of seconds after which the pending changes are written
+        :param conflict_mode: the conflict mode of the repository (see ActivityRepository)
         """
-        super().__init__()
+        super().__init__(conflict_mode)
         self.__filename = filename
+        self.__journal_mode = journal_mode
+        self.__journal_filename = filename + JOURNAL_EXTENSION
+        self.__compaction_threshold = compaction_threshold
+        self.__journal_size = 0
+        self.__loaded = False
+        self.__file_signature = None
+        self.__group_commit = GroupCommit(self.__save_activities_from_memory_to_file, batch_size, time_window)
+        if self.__journal_mode:
+            self.__load_activities_from_file_into_memory()
+
+    @staticmethod
+    def __convert_line_to_activity(activity_line):
+        """
+        Converts a line of the file into an activity.
+        e.g. "7543;193 201;20 12 2019;19;shopping" -> Activity(7543, [193, 201], {...}, 19, "shopping")
+        :param activity_line: the stripped line of the file
+        :return: the activity represented by the line
+        """
+        activity_components = activity_line.split(";")
+
+        # e.g. activity_components -> ["7543", "193 201", "20 12 2019", "19", "shopping"]
+        activity_id = int(activity_components[0])
+        string_of_participants_ids = activity_components[1]
+        participants_ids = Utility.convert_ids_string_to_separate_integers(string_of_participants_ids)
+        string_calendar_date = activity_components[2]
+        calendar_date = Utility.convert_calendar_date_string_to_dictionary(string_calendar_date)
+        time = int(activity_components[3])
+        description = activity_components[4]
+        return Activity(activity_id, participants_ids, calendar_date, time, description)
+
+    @staticmethod
+    def __convert_activity_to_line(activity):
+        """
+        Converts an activity into a line of the file (without the new line character).
+        e.g. Activity(7543, [193, 201], {...}, 19, "shopping") -> "7543;193 201;20 12 2019;19;shopping"
+        :param activity: the activity to be converted
+        :return: the string representing the activity
+        """
+        participants_ids_as_string = Utility.convert_list_of_integers_into_string(activity.participants_ids)
+        calendar_date_as_string = f"{activity.day} {activity.month} {activity.year}"
+        return f"{activity.id};{participants_ids_as_string};{calendar_date_as_string};" \
+               f"{activity.time};{activity.description}"
 
     def __load_activities_from_file_into_memory(self):
         """
@@ -68,37 +130,106 @@ class TextFileActivityRepository(ActivityRepository):
         activity.year == 2020
         activity.time == 19
         activity.description == "dinner"
+        In journal mode, the file is read only once and the records of the journal are replayed on top of it.
+        In the default mode, the file is not read while there are pending changes, since the data from memory is newer,
+        nor if it did not change since it was last read or written, so that the indexes are not rebuilt (and the
+        generation of the repository is not increased) by the operations that do not change anything.
         """
+        if self.__journal_mode and self.__loaded:
+            return
+        if self.__group_commit.pending_changes > 0:
+            return
+
+        file_signature = Utility.get_file_signature(self.__filename)
+        if self.__journal_mode is False and file_signature is not None and file_signature == self.__file_signature:
+            return
+
         with open(self.__filename, mode="r") as activities_file:
-            super().clear_repository()
-            activities_lines = activities_file.readlines()
-            for activity_line in activities_lines:
-                activity_line = activity_line.strip()
-                if activity_line != "":
-                    activity_components = activity_line.split(";")
-
-                    # e.g. activity_components -> ["7543", "193 201", "20 12 2019", "19", "shopping"]
-                    activity_id = int(activity_components[0])
-                    string_of_participants_ids = activity_components[1]
-                    participants_ids = Utility.convert_ids_string_to_separate_integers(string_of_participants_ids)
-                    string_calendar_date = activity_components[2]
-                    calendar_date = Utility.convert_calendar_date_string_to_dictionary(string_calendar_date)
-                    time = int(activity_components[3])
-                    description = activity_components[4]
-                    activity = Activity(activity_id, participants_ids, calendar_date, time, description)
-                    super().save_activity(activity)
+            activities = (self.__convert_line_to_activity(activity_line.strip()) for activity_line in activities_file
+                          if activity_line.strip() != "")
+            if self.__journal_mode is False:
+                self._bulk_load_activities(activities)
+                self.__file_signature = file_signature
+                return
+
+            # the file and the journal are replayed into an ordered dictionary (activity ID -> activity), so that
+            # only the final state of the activities is checked for duplicates and overlaps
+            activities_by_id = {activity.id: activity for activity in activities}
+        self.__journal_size = self.__replay_journal(activities_by_id)
+        self._bulk_load_activities(activities_by_id.values())
+        self.__loaded = True
+
+    def __replay_journal(self, activities_by_id):
+        """
+        Applies the records of the journal on a dictionary of activities. Each record should be represented in the
+        journal as it follows:
+            add;1000;204 159;30 11 2020;19;dinner
+            update;1000;204;30 11 2020;20;late dinner
+            remove;1000
+        :param activities_by_id: dictionary (activity ID -> activity) containing the activities from the file
+        :return: the size (in bytes) of the journal
+        """
+        if os.path.exists(self.__journal_filename) is False:
+            return 0
+
+        with open(self.__journal_filename, mode="r") as journal_file:
+            for journal_line in journal_file.readlines():
+                journal_line = journal_line.strip()
+                if journal_line != "":
+                    [operation, argument] = journal_line.split(";", 1)
+                    if operation == "remove":
+                        activities_by_id.pop(int(argument), None)
+                    else:
+                        activity = self.__convert_line_to_activity(argument)
+                        activities_by_id[activity.id] = activity
+        return os.path.getsize(self.__journal_filename)
 
     def __save_activities_from_memory_to_file(self):
         """
         Transfers the data from memory (i.e. the list of activities) into the file.
         """
-        with open(self.__filename, mode="w") as activities_file:
-            for activity in self._activities_list:
-                participants_ids_as_string = Utility.convert_list_of_integers_into_string(activity.participants_ids)
-                calendar_date_as_string = f"{activity.day} {activity.month} {activity.year}"
-                activity_line = f"{activity.id};{participants_ids_as_string};{calendar_date_as_string};" \
-                                f"{activity.time};{activity.description}\n"
-                activities_file.write(activity_line)
+        activities_lines = [self.__convert_activity_to_line(activity) + "\n" for activity in self._activities_list]
+        Utility.write_file_atomically(self.__filename, "".join(activities_lines))
+        self.__file_signature = Utility.get_file_signature(self.__filename)
+
+    def __persist_change(self, operation, argument):
+        """
+        Makes a change of the repository persistent.
+        In the default mode, the change is registered in the group commit, which rewrites the whole file of activities
+            once per batch of changes. In journal mode, a record is appended to the journal, which is compacted if it
+            grew beyond the compaction threshold.
+        :param operation: the name of the change ("add", "update" or "remove")
+        :param argument: the added or updated activity, or the ID of the removed activity
+        """
+        if self.__journal_mode is False:
+            self.__group_commit.register_change()
+            return
+
+        if operation == "remove":
+            journal_line = f"remove;{argument}\n"
+        else:
+            journal_line = f"{operation};{self.__convert_activity_to_line(argument)}\n"
+        with open(self.__journal_filename, mode="a") as journal_file:
+            journal_file.write(journal_line)
+        self.__journal_size += len(journal_line.encode())
+
+        if self.__journal_size > self.__compaction_threshold:
+            self.compact()
+
+    def compact(self):
+        """
+        Rewrites the file using the data from memory and empties the journal.
+        """
+        self.__save_activities_from_memory_to_file()
+        with open(self.__journal_filename, mode="w"):
+            pass
+        self.__journal_size = 0
+
+    def flush(self):
+        """
+        Writes the pending changes (if any) into the file.
+        """
+        self.__group_commit.flush()
 
     @property
     def activities_list(self):
@@ -118,8 +249,13 @@ class TextFileActivityRepository(ActivityRepository):
         :param new_activities_list: the new list of activities
         Saves all the activities from the list of activities into the file.
         """
-        self._activities_list = new_activities_list
-        self.__save_activities_from_memory_to_file()
+        with self.__group_commit.lock:
+            self._activities_list = new_activities_list
+            self._rebuild_indexes()
+            if self.__journal_mode:
+                self.compact()
+            else:
+                self.__group_commit.register_change()
 
     def save_activity(self, new_activity):
         """
@@ -127,11 +263,12 @@ class TextFileActivityRepository(ActivityRepository):
         Method that adds a new activity in the repository of activities.
         Raises ActivityRepositoryError if there already exists an activity having the same ID as the new activity or
             if there is another activity in the repository that takes place in the same time time as the new activ
-        Saves all the activities from the list of activities into the file.
+        Saves the change into the file (or appends it to the journal, in journal mode).
         """
-        self.__load_activities_from_file_into_memory()
-        super().save_activity(new_activity)
-        self.__save_activities_from_memory_to_file()
+        with self.__group_commit.lock:
+            self.__load_activities_from_file_into_memory()
+            super().save_activity(new_activity)
+            self.__persist_change("add", new_activity)
 
     def remove_activity(self, remove_activity_id):
         """
@@ -139,11 +276,12 @@ class TextFileActivityRepository(ActivityRepository):
         Removes an activity from the repository by its ID.
         Raises ActivityRepositoryError if there is no activity having the received ID.
         :param remove_activity_id: the ID of the activity that needs to be removed
-        Saves all the activities from the list of activities into the file.
+        Saves the change into the file (or appends it to the journal, in journal mode).
         """
-        self.__load_activities_from_file_into_memory()
-        super().remove_activity(remove_activity_id)
-        self.__save_activities_from_memory_to_file()
+        with self.__group_commit.lock:
+            self.__load_activities_from_file_into_memory()
+            super().remove_activity(remove_activity_id)
+            self.__persist_change("remove", remove_activity_id)
 
     def update_activity(self, to_update_activity_id, updated_activity):
         """
@@ -154,11 +292,12 @@ class TextFileActivityRepository(ActivityRepository):
             activity takes place in the same time with another activity already existing in the repository.
         :param to_update_activity_id: the ID of the activity that needs to be updated
         :param updated_activity: the updated version of the searched activity
-        Saves all the activities from the list of activities into the file.
+        Saves the change into the file (or appends it to the journal, in journal mode).
         """
-        self.__load_activities_from_file_into_memory()
-        super().update_activity(to_update_activity_id, updated_activity)
-        self.__save_activities_from_memory_to_file()
+        with self.__group_commit.lock:
+            self.__load_activities_from_file_into_memory()
+            super().update_activity(to_update_activity_id, updated_activity)
+            self.__persist_change("update", super().find_activity(to_update_activity_id))
 
     def find_activity(self, searched_activity_id):
         """
@@ -180,6 +319,100 @@ class TextFileActivityRepository(ActivityRepository):
         self.__load_activities_from_file_into_memory()
         return super().check_activity_existence(searched_activity_id)
 
+    def find_activities_by_participant(self, participant_id):
+        """
+        Loads all the activities from the file into the list of activities.
+        Finds all the activities in which a person takes part, using the participant index.
+        :param participant_id: the ID of the person
+        :return: a list containing the activities of the person, in the order of the list of activities
+        """
+        self.__load_activities_from_file_into_memory()
+        return super().find_activities_by_participant(participant_id)
+
+    def find_activities_by_date(self, calendar_date):
+        """
+        Loads all the activities from the file into the list of activities.
+        Finds all the activities taking place in a day, using the day schedules.
+        :param calendar_date: the calendar date, as a dictionary
+        :return: a list containing the activities of the day, sorted by time
+        """
+        self.__load_activities_from_file_into_memory()
+        return super().find_activities_by_date(calendar_date)
+
+    def iterate_day_schedules(self, start_date=None, end_date=None):
+        """
+        Loads all the activities from the file into the list of activities.
+        Iterates over the days having activities, in chronological order, using the day schedules.
+        :param start_date: the first calendar date (included), as a dictionary, or None to start from the first day
+        :param end_date: the last calendar date (included), as a dictionary, or None to continue until the last day
+        :return: a generator of (date key, mask of the occupied hours, number of activities) triples
+        """
+        self.__load_activities_from_file_into_memory()
+        return super().iterate_day_schedules(start_date, end_date)
+
+    def get_participant_schedule(self, participant_id, start_date, end_date):
+        """
+        Loads all the activities from the file into the list of activities.
+        Computes the occupied hours of a person in every day between two dates.
+        :param participant_id: the ID of the person
+        :param start_date: the first calendar date (included), as a dictionary
+        :param end_date: the last calendar date (included), as a dictionary
+        :return: a dictionary from date keys to the masks of the hours in which the person is busy
+        """
+        self.__load_activities_from_file_into_memory()
+        return super().get_participant_schedule(participant_id, start_date, end_date)
+
+    def iterate_days_by_number_of_activities(self, start_date=None, end_date=None):
+        """
+        Loads all the activities from the file into the list of activities.
+        Iterates over the days having activities in ascending order of their number of activities, then of their date.
+        :param start_date: the first calendar date (included), as a dictionary, or None to start from the first day
+        :param end_date: the last calendar date (included), as a dictionary, or None to continue until the last day
+        :return: a generator of (number of activities, date key) pairs
+        """
+        self.__load_activities_from_file_into_memory()
+        return super().iterate_days_by_number_of_activities(start_date, end_date)
+
+    def find_activities_by_description(self, searched_description):
+        """
+        Loads all the activities from the file into the list of activities.
+        Finds all the activities whose lowercased descriptions contain a text, using the description index.
+        :param searched_description: the searched text (lowercase)
+        :return: a list containing the found activities, in the order of the list of activities
+        """
+        self.__load_activities_from_file_into_memory()
+        return super().find_activities_by_description(searched_description)
+
+    def iterate_activities_chronologically(self, start_date=None, end_date=None):
+        """
+        Loads all the activities from the file into the list of activities.
+        Iterates over the activities in chronological order (by date, then by hour), using the timeline.
+        :param start_date: the first calendar date (included), as a dictionary, or None to start from the first activity
+        :param end_date: the last calendar date (included), as a dictionary, or None to continue until the last activity
+        :return: a generator of activities
+        """
+        self.__load_activities_from_file_into_memory()
+        return super().iterate_activities_chronologically(start_date, end_date)
+
+    def query_activities(self, start_date=None, end_date=None, participant_id=None, searched_description=None,
+                         start_hour=None, end_hour=None):
+        """
+        Loads all the activities from the file into the list of activities.
+        Iterates over the activities matching any combination of criteria, in chronological order.
+        :return: a generator of the matching activities
+        """
+        self.__load_activities_from_file_into_memory()
+        return super().query_activities(start_date, end_date, participant_id, searched_description, start_hour,
+                                        end_hour)
+
+    def get_generation(self):
+        """
+        Loads all the activities from the file into the list of activities.
+        Returns the generation of the repository, which is increased by every change of the activities.
+        """
+        self.__load_activities_from_file_into_memory()
+        return super().get_generation()
+
     def get_all_activities_list(self):
         """
         Loads all the activities from the file into the list of activities.
@@ -188,6 +421,14 @@ class TextFileActivityRepository(ActivityRepository):
         self.__load_activities_from_file_into_memory()
         return super().get_all_activities_list()
 
+    def get_columnar_index(self):
+        """
+        Loads all the activities from the file into the list of activities.
+        Returns the columnar index of the activities, used by the analytics engine of the statistics service.
+        """
+        self.__load_activities_from_file_into_memory()
+        return super().get_columnar_index()
+
     def get_number_of_activities(self):
         """
         Loads all the activities from the file into the list of activities.
@@ -209,16 +450,57 @@ class TextFilePersonRepository(PersonRepository):
     """
     Class used to instantiate persons repositories based on text files.
     Inherits from the base class PersonRepository.
+    Just like the text file based activity repository, it can work either in the default mode (the file is read and
+        rewritten at every operation) or in journal mode (the file is read once and the changes are appended to
+        a journal, which is compacted into the file when it grows beyond a given size).
     """
 
-    def __init__(self, filename):
+    def __init__(self, filename, journal_mode=False, compaction_threshold=DEFAULT_COMPACTION_THRESHOLD,
+                 batch_size=DEFAULT_BATCH_SIZE, time_window=None):
         """
         Constructor of a text file based person repository, which calls the __init__ of the base class, but in addition,
         receives a filename from which the data must be loaded and into which the data must be saved.
         :param filename: the name of the file
+        :param journal_mode: True if the changes must be appended to a journal instead of rewriting the whole file
+        :param compaction_threshold: the size (in bytes) the journal can reach before being compacted into the file
+        :param batch_size: in the default mode, the number of changes after which the file is rewritten
+        :param time_window: in the default mode, the number of seconds after which the pending changes are written
         """
         super().__init__()
         self.__filename = filename
+        self.__journal_mode = journal_mode
+        self.__journal_filename = filename + JOURNAL_EXTENSION
+        self.__compaction_threshold = compaction_threshold
+        self.__journal_size = 0
+        self.__loaded = False
+        self.__file_signature = None
+        self.__group_commit = GroupCommit(self.__save_persons_from_memory_to_file, batch_size, time_window)
+        if self.__journal_mode:
+            self.__load_persons_from_file_into_memory()
+
+    @staticmethod
+    def __convert_line_to_person(person_line):
+        """
+        Converts a line of the file into a person.
+        e.g. "100;Alex;48327329" -> Person(100, "Alex", "48327329")
+        :param person_line: the stripped line of the file
+        :return: the person represented by the line
+        """
+        person_components = person_line.split(";")
+        person_id = int(person_components[0])
+        person_name = person_components[1]
+        person_phone_number = person_components[2]
+        return Person(person_id, person_name, person_phone_number)
+
+    @staticmethod
+    def __convert_person_to_line(person):
+        """
+        Converts a person into a line of the file (without the new line character).
+        e.g. Person(100, "alex", "085482") -> "100;Alex;085482"
+        :param person: the person to be converted
+        :return: the string representing the person
+        """
+        return f"{person.id};{person.name.title()};{person.phone_number}"
 
     def __load_persons_from_file_into_memory(self):
         """
@@ -228,29 +510,105 @@ class TextFilePersonRepository(PersonRepository):
         person.id == 100
         person.name == "Alex"
         person.phone_number == "48327329"
+        In journal mode, the file is read only once and the records of the journal are replayed on top of it.
+        In the default mode, the file is not read while there are pending changes, since the data from memory is newer,
+        nor if it did not change since it was last read or written, so that the indexes are not rebuilt (and the
+        generation of the repository is not increased) by the operations that do not change anything.
         """
+        if self.__journal_mode and self.__loaded:
+            return
+        if self.__group_commit.pending_changes > 0:
+            return
+
+        file_signature = Utility.get_file_signature(self.__filename)
+        if self.__journal_mode is False and file_signature is not None and file_signature == self.__file_signature:
+            return
+
         with open(self.__filename, mode="r") as persons_file:
-            super().clear_repository()
-            persons_lines = persons_file.readlines()
-            for person_line in persons_lines:
-                person_line = person_line.strip()
-                if person_line != "":
-                    person_components = person_line.split(";")
-                    person_id = int(person_components[0])
-                    person_name = person_components[1]
-                    person_phone_number = person_components[2]
-                    person = Person(person_id, person_name, person_phone_number)
-                    super().save_person(person)
+            persons = (self.__convert_line_to_person(person_line.strip()) for person_line in persons_file
+                       if person_line.strip() != "")
+            if self.__journal_mode is False:
+                self._bulk_load_persons(persons)
+                self.__file_signature = file_signature
+                return
+
+            persons_by_id = {person.id: person for person in persons}
+        self.__journal_size = self.__replay_journal(persons_by_id)
+        self._bulk_load_persons(persons_by_id.values())
+        self.__loaded = True
+
+    def __replay_journal(self, persons_by_id):
+        """
+        Applies the records of the journal on a dictionary of persons. Each record should be represented in the
+        journal as it follows:
+            add;100;Alex;48327329
+            update;100;Alex Pop;48327329
+            remove;100
+        :param persons_by_id: dictionary (person ID -> person) containing the persons from the file
+        :return: the size (in bytes) of the journal
+        """
+        if os.path.exists(self.__journal_filename) is False:
+            return 0
+
+        with open(self.__journal_filename, mode="r") as journal_file:
+            for journal_line in journal_file.readlines():
+                journal_line = journal_line.strip()
+                if journal_line != "":
+                    [operation, argument] = journal_line.split(";", 1)
+                    if operation == "remove":
+                        persons_by_id.pop(int(argument), None)
+                    else:
+                        person = self.__convert_line_to_person(argument)
+                        persons_by_id[person.id] = person
+        return os.path.getsize(self.__journal_filename)
 
     def __save_persons_from_memory_to_file(self):
         """
         Transfers the data from memory (i.e. the list of activities) into the file following the next syntax:
         Person(100, "Alex", "085482") -> 100;Alex;085482
         """
-        with open(self.__filename, mode="w") as persons_file:
-            for person in self._person_list:
-                person_line = f"{person.id};{person.name.title()};{person.phone_number}\n"
-                persons_file.write(person_line)
+        persons_lines = [self.__convert_person_to_line(person) + "\n" for person in self._person_list]
+        Utility.write_file_atomically(self.__filename, "".join(persons_lines))
+        self.__file_signature = Utility.get_file_signature(self.__filename)
+
+    def __persist_change(self, operation, argument):
+        """
+        Makes a change of the repository persistent.
+        In the default mode, the change is registered in the group commit, which rewrites the whole file of persons once
+            per batch of changes. In journal mode, a record is appended to the journal, which is compacted if it grew
+            beyond the compaction threshold.
+        :param operation: the name of the change ("add", "update" or "remove")
+        :param argument: the added or updated person, or the ID of the removed person
+        """
+        if self.__journal_mode is False:
+            self.__group_commit.register_change()
+            return
+
+        if operation == "remove":
+            journal_line = f"remove;{argument}\n"
+        else:
+            journal_line = f"{operation};{self.__convert_person_to_line(argument)}\n"
+        with open(self.__journal_filename, mode="a") as journal_file:
+            journal_file.write(journal_line)
+        self.__journal_size += len(journal_line.encode())
+
+        if self.__journal_size > self.__compaction_threshold:
+            self.compact()
+
+    def compact(self):
+        """
+        Rewrites the file using the data from memory and empties the journal.
+        """
+        self.__save_persons_from_memory_to_file()
+        with open(self.__journal_filename, mode="w"):
+            pass
+        self.__journal_size = 0
+
+    def flush(self):
+        """
+        Writes the pending changes (if any) into the file.
+        """
+        self.__group_commit.flush()
 
     @property
     def person_list(self):
@@ -270,8 +628,13 @@ class TextFilePersonRepository(PersonRepository):
         :param new_persons_list: the new list of persons
         Saves all the persons from the list of persons into the file.
         """
-        self._person_list = new_persons_list
-        self.__save_persons_from_memory_to_file()
+        with self.__group_commit.lock:
+            self._person_list = new_persons_list
+            self._rebuild_indexes()
+            if self.__journal_mode:
+                self.compact()
+            else:
+                self.__group_commit.register_change()
 
     def save_person(self, new_person):
         """
@@ -279,11 +642,12 @@ class TextFilePersonRepository(PersonRepository):
         Adds a new person to the repository.
         Raises PersonRepositoryError if there already exists a person having the same ID with the new person.
         :param new_person: the new person that is wanted to be added to the repository
-        Saves all the persons from the list of persons into the file.
+        Saves the change into the file (or appends it to the journal, in journal mode).
         """
-        self.__load_persons_from_file_into_memory()
-        super().save_person(new_person)
-        self.__save_persons_from_memory_to_file()
+        with self.__group_commit.lock:
+            self.__load_persons_from_file_into_memory()
+            super().save_person(new_person)
+            self.__persist_change("add", new_person)
 
     def remove_person(self, remove_person_id):
         """
@@ -291,11 +655,12 @@ class TextFilePersonRepository(PersonRepository):
         Removes a person from the repository by a given ID.
         Raises PersonRepositoryError if there is no person having the given ID in the repository.
         :param remove_person_id: the ID of the person to be removed
-        Saves all the persons from the list of persons into the file.
+        Saves the change into the file (or appends it to the journal, in journal mode).
         """
-        self.__load_persons_from_file_into_memory()
-        super().remove_person(remove_person_id)
-        self.__save_persons_from_memory_to_file()
+        with self.__group_commit.lock:
+            self.__load_persons_from_file_into_memory()
+            super().remove_person(remove_person_id)
+            self.__persist_change("remove", remove_person_id)
 
     def check_person_existence(self, searched_person_id):
         """
@@ -325,11 +690,51 @@ class TextFilePersonRepository(PersonRepository):
         Raises PersonRepositoryError if there is no person having the given ID.
         :param person_to_update_id: positive integer, the ID of the person to be updated
         :param updated_person: the updated person
-        Saves all the persons from the list of persons into the file.
+        Saves the change into the file (or appends it to the journal, in journal mode).
+        """
+        with self.__group_commit.lock:
+            self.__load_persons_from_file_into_memory()
+            super().update_person(person_to_update_id, updated_person)
+            self.__persist_change("update", super().find_person(person_to_update_id))
+
+    def find_persons_by_name(self, searched_name):
+        """
+        Loads all the persons from file into the list of persons.
+        Finds all the persons whose lowercased names contain a text, using the name index.
+        :param searched_name: the searched text (lowercase)
+        :return: a list containing the found persons, in the order of the list of persons
         """
         self.__load_persons_from_file_into_memory()
-        super().update_person(person_to_update_id, updated_person)
-        self.__save_persons_from_memory_to_file()
+        return super().find_persons_by_name(searched_name)
+
+    def find_persons_by_fuzzy_name(self, searched_name, maximum_distance=DEFAULT_MAXIMUM_EDIT_DISTANCE):
+        """
+        Loads all the persons from file into the list of persons.
+        Finds all the persons whose names are at most a given edit distance away from a text, using the BK-tree.
+        :param searched_name: the searched text
+        :param maximum_distance: the maximum edit distance
+        :return: a list containing the found persons, ranked by their edit distance
+        """
+        self.__load_persons_from_file_into_memory()
+        return super().find_persons_by_fuzzy_name(searched_name, maximum_distance)
+
+    def find_persons_by_phone_number(self, searched_phone_number):
+        """
+        Loads all the persons from file into the list of persons.
+        Finds all the persons whose phone numbers contain a text, using the phone number index.
+        :param searched_phone_number: the searched (part of the) phone number
+        :return: a list containing the found persons, in the order of the list of persons
+        """
+        self.__load_persons_from_file_into_memory()
+        return super().find_persons_by_phone_number(searched_phone_number)
+
+    def get_generation(self):
+        """
+        Loads all the persons from file into the list of persons.
+        Returns the generation of the repository, which is increased by every change of the persons.
+        """
+        self.__load_persons_from_file_into_memory()
+        return super().get_generation()
 
     def get_all_persons_list(self):
         """
@@ -2,6 +2,12 @@ import datetime
 
 from EXCEPTIONS.custom_exceptions import StackError, DateValidatorError, ActivityRepositoryError, PersonRepositoryError, \
     ActivityValidatorError, PersonValidatorError, ActivityServiceError, PersonServiceError
+from INFRASTRUCTURE.indexes import DEFAULT_MAXIMUM_EDIT_DISTANCE
+from UTILITY.utils import Utility
+
+PAGE_SIZE = 10
+DEFAULT_NUMBER_OF_DAYS = 10
+DEFAULT_NUMBER_OF_FREE_HOURS = 10
 
 
 class UI:
@@ -32,47 +38,134 @@ class UI:
         print("Please choose one statistic from below:\n"
               "     1. Find all activities for a given date, in the order of their start time\n"
               "     2. Check the availability of the upcoming days\n"
-              "     3. Find all the activities performed together with a certain person\n")
+              "     3. Find all the activities performed together with a certain person\n"
+              "     4. Count all the activities by hour of the day, by person and by month\n"
+              "     5. Find the first hours in which a group of persons is free\n")
         user_choice = input("Type your option: ").strip()
         print("")
         if user_choice == "1":
             self.__ui_search_activities_by_date()
         elif user_choice == "2":
-            self.__ui_find_busiest_days()
+            self.__ui_find_free_time_of_upcoming_days()
         elif user_choice == "3":
             self.__ui_find_activities_by_participant()
+        elif user_choice == "4":
+            self.__ui_count_activities()
+        elif user_choice == "5":
+            self.__ui_find_common_free_slots()
         else:
             print("Invalid option!\n")
             return
 
-    def __ui_find_busiest_days(self):
-        dates_dictionary = self.__statistics_service.find_busiest_days()
+    @staticmethod
+    def __ui_display_pages(get_page, display_item):
+        """
+        Displays some results page by page: only the results of the current page are fetched, and the user can go to
+            the next or to the previous page.
+        :param get_page: function receiving an offset and a limit, returning an iterable of at most limit results
+        :param display_item: function that displays one result
+        :return: False if there are no results at all, True otherwise
+        """
+        page_number = 0
+        while True:
+            # one more result than a page is fetched, in order to know whether there is a next page
+            page = list(get_page(page_number * PAGE_SIZE, PAGE_SIZE + 1))
+            if page_number == 0 and len(page) == 0:
+                return False
+            has_next_page = len(page) > PAGE_SIZE
+            has_previous_page = page_number > 0
+            for item in page[:PAGE_SIZE]:
+                display_item(item)
+            if has_next_page is False and has_previous_page is False:
+                return True
+
+            user_choice = input(f"Page {page_number + 1} • n = next page, p = previous page, "
+                                f"anything else = back to the menu: ").strip().lower()
+            print("")
+            if user_choice == "n" and has_next_page:
+                page_number += 1
+            elif user_choice == "p" and has_previous_page:
+                page_number -= 1
+            else:
+                return True
+
+    @staticmethod
+    def __ui_display_activity(activity):
+        """ Displays an activity, followed by an empty line """
+        print(activity)
+        print("")
 
-        if dates_dictionary == {}:
+    def __ui_find_free_time_of_upcoming_days(self):
+        """
+        Asks the user how many upcoming days (and until which date) they want to see, then displays the free time of the
+        upcoming days having activities (the number of activities, the free hours and the free intervals of each day),
+        starting with the day having the most free time
+        """
+        number_of_days = self.__ui_read_optional_integer(
+            f"How many days do you want to see? (leave empty for {DEFAULT_NUMBER_OF_DAYS}): ")
+        if number_of_days is None:
+            number_of_days = DEFAULT_NUMBER_OF_DAYS
+        end_date = self.__ui_read_optional_calendar_date("Until which date? (dd mm yyyy, leave empty for no limit): ")
+        print("")
+        upcoming_days = self.__statistics_service.find_free_time_of_upcoming_days(number_of_days, None, end_date)
+
+        if len(upcoming_days) == 0:
             print("You have no activities in the upcoming days\n")
-        else:
-            current_date = datetime.date.today()
-            current_day = current_date.day
-            current_month = current_date.month
-            current_year = current_date.year
-            print("The availability of the upcoming days (today's date is {}.{}.{}):".format(current_day,
-                                                                                             current_month,
-                                                                                             current_year))
-
-        for date, number_of_activities in zip(dates_dictionary.keys(), dates_dictionary.values()):
-            day = date[0]
-            month = date[1]
-            year = date[2]
-            if number_of_activities > 1:
-                print(
-                    f"    {day}.{month}.{year} • {number_of_activities} activities planned • "
-                    f"{12 - number_of_activities} hours available")
-            elif number_of_activities == 1:
-                print(
-                    f"    {day}.{month}.{year} • {number_of_activities} activity planned • "
-                    f"{12 - number_of_activities} hours available")
+            return
+
+        current_date = datetime.date.today()
+        print("The availability of the upcoming days (today's date is {}.{}.{}):".format(current_date.day,
+                                                                                         current_date.month,
+                                                                                         current_date.year))
+        for upcoming_day in upcoming_days:
+            day, month, year = upcoming_day["date"]
+            number_of_activities = upcoming_day["activities"]
+            activities_word = "activity" if number_of_activities == 1 else "activities"
+            free_intervals = ", ".join(f"{start_hour}:00-{end_hour}:00"
+                                       for start_hour, end_hour in upcoming_day["free_intervals"])
+            print(f"    {day}.{month}.{year} • {number_of_activities} {activities_word} planned • "
+                  f"{upcoming_day['free_hours']} hours available" + (f" ({free_intervals})" if free_intervals else ""))
         print("")
 
+    def __ui_count_activities(self):
+        """ Displays the number of activities (past and upcoming) by hour of the day, by person and by month """
+        print("Activities by hour of the day:")
+        for hour, number_of_activities in enumerate(self.__statistics_service.count_activities_by_hour()):
+            if number_of_activities > 0:
+                print(f"    {hour}:00 • {number_of_activities}")
+        print("Activities by person:")
+        for person_id, number_of_activities in self.__statistics_service.count_activities_by_participant().items():
+            print(f"    ID {person_id} • {number_of_activities}")
+        print("Activities by month:")
+        for (year, month), number_of_activities in self.__statistics_service.count_activities_by_month().items():
+            print(f"    {month}.{year} • {number_of_activities}")
+        print("")
+
+    def __ui_find_common_free_slots(self):
+        """ Asks the user for some persons and two dates, and displays the first hours in which they are all free """
+        existing_persons_ids = self.__person_service.get_existing_persons_ids()
+        persons_ids = self.__ui_convert_ids_string_to_list(
+            input(f"Introduce the IDs of the persons (you can choose from the list: {existing_persons_ids})\n   > "))
+        start_date = self.__ui_read_optional_calendar_date("Introduce the first date (dd mm yyyy): ")
+        end_date = self.__ui_read_optional_calendar_date("Introduce the last date (dd mm yyyy): ")
+        if start_date is None or end_date is None:
+            print("You must introduce both dates!\n")
+            return
+        number_of_slots = self.__ui_read_optional_integer(
+            f"How many hours do you want to see? (leave empty for {DEFAULT_NUMBER_OF_FREE_HOURS}): ")
+        if number_of_slots is None:
+            number_of_slots = DEFAULT_NUMBER_OF_FREE_HOURS
+
+        free_slots = self.__activity_service.find_common_free_slots(persons_ids, (start_date, end_date),
+                                                                    number_of_slots)
+        print("")
+        if len(free_slots) == 0:
+            print("There is no hour in which all of them are free!\n")
+        else:
+            for calendar_date, hour in free_slots:
+                print(f"    {calendar_date['day']}.{calendar_date['month']}.{calendar_date['year']} • {hour}:00")
+            print("")
+
     def __ui_find_activities_by_participant(self):
         """ Asks the user for the ID of the person for whom the activities he/she took part in are displayed """
         existing_persons_ids = self.__person_service.get_existing_persons_ids()
@@ -93,12 +186,18 @@ class UI:
         """ Asks the user for the criteria he/she wants to find activities by """
         print("By which criteria do you want to search activities?\n"
               "     1. By date\n"
-              "     2. By description\n")
+              "     2. By description\n"
+              "     3. Between two dates\n"
+              "     4. By several criteria\n")
         user_choice = input("Type your option: ").strip()
         if user_choice == "1":
             self.__ui_search_activities_by_date()
         elif user_choice == "2":
             self.__ui_search_activities_by_description()
+        elif user_choice == "3":
+            self.__ui_search_activities_between_dates()
+        elif user_choice == "4":
+            self.__ui_search_activities_by_several_criteria()
         else:
             print("Invalid option!\n")
             return
@@ -119,6 +218,76 @@ class UI:
                 print(activity)
                 print("")
 
+    def __ui_search_activities_between_dates(self):
+        """ Asks the user for two calendar dates and displays the activities between them, in chronological order """
+        start_date = {
+            "year": int(input("Introduce the first year: ")),
+            "month": int(input("Introduce the first month: ")),
+            "day": int(input("Introduce the first day: "))
+        }
+        end_date = {
+            "year": int(input("Introduce the last year: ")),
+            "month": int(input("Introduce the last month: ")),
+            "day": int(input("Introduce the last day: "))
+        }
+
+        print("")
+        found_activities = self.__ui_display_pages(
+            lambda offset, limit: self.__activity_service.iterate_activities_chronologically(start_date, end_date,
+                                                                                             offset, limit),
+            self.__ui_display_activity)
+        if found_activities is False:
+            print("There is no activity scheduled between {}.{}.{} and {}.{}.{}!\n".format(
+                start_date["day"], start_date["month"], start_date["year"],
+                end_date["day"], end_date["month"], end_date["year"]))
+
+    @staticmethod
+    def __ui_read_optional_calendar_date(message):
+        """
+        Asks the user for an optional calendar date, given as "dd mm yyyy".
+        :param message: the message shown to the user
+        :return: the calendar date as a dictionary, or None if the user typed nothing
+        """
+        string_calendar_date = input(message).strip()
+        if string_calendar_date == "":
+            return None
+        if len(string_calendar_date.split()) != 3:
+            raise ValueError("a calendar date must be given as dd mm yyyy")
+        return Utility.convert_calendar_date_string_to_dictionary(string_calendar_date)
+
+    @staticmethod
+    def __ui_read_optional_integer(message):
+        """
+        Asks the user for an optional integer.
+        :param message: the message shown to the user
+        :return: the integer, or None if the user typed nothing
+        """
+        string_integer = input(message).strip()
+        if string_integer == "":
+            return None
+        return int(string_integer)
+
+    def __ui_search_activities_by_several_criteria(self):
+        """ Asks the user for any combination of criteria and displays the matching activities chronologically """
+        print("Leave a criterion empty in order to ignore it.")
+        start_date = self.__ui_read_optional_calendar_date("Introduce the first date (dd mm yyyy): ")
+        end_date = self.__ui_read_optional_calendar_date("Introduce the last date (dd mm yyyy): ")
+        participant_id = self.__ui_read_optional_integer("Introduce the ID of a participant: ")
+        searched_description = input("Introduce the description: ").strip().lower()
+        start_hour = self.__ui_read_optional_integer("Introduce the first hour: ")
+        end_hour = self.__ui_read_optional_integer("Introduce the last hour: ")
+        if searched_description == "":
+            searched_description = None
+
+        print("")
+        found_activities = self.__ui_display_pages(
+            lambda offset, limit: self.__activity_service.query(start_date, end_date, participant_id,
+                                                                searched_description, start_hour, end_hour, offset,
+                                                                limit),
+            self.__ui_display_activity)
+        if found_activities is False:
+            print("There is no activity matching all the criteria!\n")
+
     def __ui_search_activities_by_description(self):
         """ Asks the user for the description of the activity he/she looks for """
         searched_description = input("Introduce the description: ").strip().lower()
@@ -126,26 +295,27 @@ class UI:
             print("You cannot search activities by an empty description!\n")
             return
 
-        searched_activities = self.__activity_service.find_activities_by_description(searched_description)
-
-        if len(searched_activities) == 0:
+        print("")
+        found_activities = self.__ui_display_pages(
+            lambda offset, limit: self.__activity_service.iterate_activities_by_description(searched_description,
+                                                                                            offset, limit),
+            self.__ui_display_activity)
+        if found_activities is False:
             print('There is no activity whose description contains "{}"!\n'.format(searched_description))
-        else:
-            print("")
-            for activity in searched_activities:
-                print(activity)
-                print("")
 
     def __ui_choose_search_criteria_for_persons(self):
         """ Asks the user for the criteria he/she wants to find persons by """
         print("By which criteria do you want to search persons?\n"
               "     1. By name\n"
-              "     2. By phone number\n")
+              "     2. By phone number\n"
+              "     3. By name, tolerating typos\n")
         user_choice = input("Type your option: ").strip()
         if user_choice == "1":
             self.__ui_search_persons_by_name()
         elif user_choice == "2":
             self.__ui_search_persons_by_phone_number()
+        elif user_choice == "3":
+            self.__ui_search_persons_by_fuzzy_name()
         else:
             print("Invalid option!\n")
             return
@@ -157,10 +327,29 @@ class UI:
             print("You cannot search persons by an empty name!\n")
             return
 
-        searched_persons = self.__person_service.find_persons_by_name(searched_name)
+        print("")
+        found_persons = self.__ui_display_pages(
+            lambda offset, limit: self.__person_service.iterate_persons_by_name(searched_name, offset, limit), print)
+        if found_persons is False:
+            print('There is no person whose name contains "{}"!\n'.format(searched_name))
+        else:
+            print("")
+
+    def __ui_search_persons_by_fuzzy_name(self):
+        """ Asks the user for the (possibly misspelled) name of the person he/she looks for """
+        searched_name = input("Introduce the name: ").strip()
+        if searched_name == "":
+            print("You cannot search persons by an empty name!\n")
+            return
+        maximum_distance = self.__ui_read_optional_integer(
+            f"Introduce the maximum number of typos (default {DEFAULT_MAXIMUM_EDIT_DISTANCE}): ")
+        if maximum_distance is None:
+            maximum_distance = DEFAULT_MAXIMUM_EDIT_DISTANCE
+
+        searched_persons = self.__person_service.find_persons_by_fuzzy_name(searched_name, maximum_distance)
 
         if len(searched_persons) == 0:
-            print('There is no person whose name contains "{}"!\n'.format(searched_name))
+            print('There is no person whose name resembles "{}"!\n'.format(searched_name))
         else:
             print("")
             for person in searched_persons:
@@ -186,13 +375,10 @@ class UI:
 
     def __ui_list_all_activities(self):
         """ Displays all the activities the user has in his/her agenda """
-        activities_list = self.__activity_service.service_get_list_of_activities()
-        if len(activities_list) == 0:
+        found_activities = self.__ui_display_pages(self.__activity_service.iterate_activities,
+                                                   self.__ui_display_activity)
+        if found_activities is False:
             print("The list of activities is empty!\n")
-        else:
-            for activity in activities_list:
-                print(activity)
-                print("")
 
     def __ui_add_new_activity(self):
         """
@@ -273,14 +459,11 @@ class UI:
 
     def __ui_list_all_persons(self):
         """ Displays all the persons the user has in his/her agenda """
-        persons_list = self.__person_service.service_get_persons_list()
-
-        if len(persons_list) == 0:
+        if self.__person_service.service_get_number_of_persons() == 0:
             print("The list of persons is empty!")
         else:
             print("The list of persons in your agenda:")
-            for person in persons_list:
-                print("    " + str(person))
+            self.__ui_display_pages(self.__person_service.iterate_persons, lambda person: print("    " + str(person)))
             print("")
 
     def __ui_add_new_person(self):
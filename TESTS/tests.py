@@ -1,11 +1,29 @@
+import datetime
+import json
+import os
+import shutil
+import tempfile
+import time
 import unittest
+from unittest import mock
 
+from APPLICATION_START.application_setter import Settings
 from BUSINESS.services import StatisticsService, ActivityService, PersonService, UndoService, RedoService
 from DOMAIN.entities import Activity, Person, Operation
-from EXCEPTIONS.custom_exceptions import ActivityServiceError, DateValidatorError, ActivityValidatorError, \
-    PersonValidatorError, ActivityRepositoryError, PersonRepositoryError, PersonServiceError, StackError
-from INFRASTRUCTURE.inmemory_repositories import ActivityRepository, PersonRepository
+from EXCEPTIONS.custom_exceptions import ApplicationStartError, ActivityServiceError, DateValidatorError, \
+    ActivityValidatorError, PersonValidatorError, ActivityRepositoryError, PersonRepositoryError, PersonServiceError, \
+    StackError
+from INFRASTRUCTURE.columnar_index import is_numpy_available
+from INFRASTRUCTURE.indexes import compute_edit_distance
+from INFRASTRUCTURE.inmemory_repositories import ActivityRepository, PersonRepository, PARTICIPANT_CONFLICTS
+from INFRASTRUCTURE.json_repositories import JsonFilePersonRepository
+from INFRASTRUCTURE.jsonlines_repositories import JsonLinesActivityRepository
+from INFRASTRUCTURE.recordfile_repositories import RecordFileActivityRepository, RecordFilePersonRepository, \
+    HEADER_STRUCT, ACTIVITY_RECORD_STRUCT, HEAP_EXTENSION, MINIMUM_STALE_HEAP_BYTES
+from INFRASTRUCTURE.sqlite_repositories import SqliteActivityRepository
 from INFRASTRUCTURE.stacks import UndoStack, RedoStack
+from INFRASTRUCTURE.textfile_repositories import TextFileActivityRepository
+from UTILITY.utils import Utility
 from VALIDATION.validators import Validator
 
 
@@ -269,8 +287,106 @@ class ActivityRepositoryTest(unittest.TestCase):
         self.assertEqual(self.__activity_repository.activities_list[-1].date, {"year": 2020, "month": 12, "day": 1})
         self.assertRaises(ActivityRepositoryError, self.__activity_repository.update_activity, 1049, updated_activity)
         invalid_updated_activity = Activity(8731, [356, 654], {"year": 2020, "month": 11, "day": 28}, 11, "study")
+        generation = self.__activity_repository.get_generation()
         self.assertRaises(ActivityRepositoryError, self.__activity_repository.update_activity, 8731,
                           invalid_updated_activity)
+        self.assertEqual(self.__activity_repository.get_generation(), generation)
+        self.assertEqual(self.__activity_repository.find_activity(8731).date, {"year": 2018, "month": 11, "day": 13})
+        self.__activity_repository.update_activity(8731, Activity(8731, [356], {"year": 2018, "month": 11, "day": 13},
+                                                                  9, "study more"))
+        self.assertEqual(self.__activity_repository.find_activity(8731).description, "study more")
+
+    def test_update_activity_in_participant_mode(self):
+        activity_repository = ActivityRepository(PARTICIPANT_CONFLICTS)
+        day = {"year": 2021, "month": 3, "day": 4}
+        activity_repository.activities_list = [Activity(1, [100, 200], day, 9, "meeting"),
+                                               Activity(2, [300], day, 9, "call")]
+        activity_repository.update_activity(1, Activity(1, [100, 200, 400], day, 9, "longer meeting"))
+        generation = activity_repository.get_generation()
+        self.assertRaises(ActivityRepositoryError, activity_repository.update_activity, 1,
+                          Activity(1, [100, 300], day, 9, "meeting"))
+        self.assertEqual(activity_repository.get_generation(), generation)
+        self.assertEqual(activity_repository.find_activity(1).participants_ids, [100, 200, 400])
+
+    def test_indexes_follow_updates_and_removals(self):
+        updated_activity = Activity(1237, [524], {"year": 2021, "month": 1, "day": 1}, 8, "trip to Iasi")
+        self.__activity_repository.update_activity(1237, updated_activity)
+        freed_slot_activity = Activity(1000, [524], {"year": 2020, "month": 8, "day": 29}, 14, "reuse the slot")
+        self.__activity_repository.save_activity(freed_slot_activity)
+        self.assertEqual(self.__activity_repository.find_activity(1000), freed_slot_activity)
+        taken_slot_activity = Activity(1001, [524], {"year": 2021, "month": 1, "day": 1}, 8, "same time")
+        self.assertRaises(ActivityRepositoryError, self.__activity_repository.save_activity, taken_slot_activity)
+        self.__activity_repository.remove_activity(1237)
+        self.assertFalse(self.__activity_repository.check_activity_existence(1237))
+        self.__activity_repository.save_activity(taken_slot_activity)
+        self.assertEqual(len(self.__activity_repository), 5)
+
+    def test_removal_keeps_the_order_of_the_list(self):
+        self.__activity_repository.remove_activity(9874)
+        self.assertEqual([activity.id for activity in self.__activity_repository.get_all_activities_list()],
+                         [1237, 8731, 9933])
+        self.__activity_repository.update_activity(1237, Activity(1237, [524], {"year": 2020, "month": 8, "day": 30},
+                                                                  14, "trip to Cluj"))
+        self.__activity_repository.save_activity(Activity(1000, [1], {"year": 2020, "month": 1, "day": 1}, 8, "run"))
+        self.assertEqual([activity.id for activity in self.__activity_repository.get_all_activities_list()],
+                         [1237, 8731, 9933, 1000])
+        self.assertEqual(len(self.__activity_repository), 4)
+        with self.assertRaisesRegex(ActivityRepositoryError, "There is already an activity taking place at that time"):
+            self.__activity_repository.update_activity(1000, Activity(1000, [1], {"year": 2018, "month": 11, "day": 13},
+                                                                      9, "run"))
+
+    def test_find_activities_by_participant(self):
+        participant_activities = self.__activity_repository.find_activities_by_participant(241)
+        self.assertEqual([activity.id for activity in participant_activities], [9874, 9933])
+        updated_activity = Activity(9874, [143], {"year": 2020, "month": 11, "day": 28}, 11, "clean the house")
+        self.__activity_repository.update_activity(9874, updated_activity)
+        self.__activity_repository.update_activity(1237, Activity(1237, [241], {"year": 2020, "month": 8, "day": 29},
+                                                                  14, "trip to Cluj"))
+        participant_activities = self.__activity_repository.find_activities_by_participant(241)
+        self.assertEqual([activity.id for activity in participant_activities], [1237, 9933])
+        self.__activity_repository.remove_activity(9933)
+        self.assertEqual(self.__activity_repository.find_activities_by_participant(876), [])
+        self.assertEqual(self.__activity_repository.find_activities_by_participant(1), [])
+
+    def test_find_activities_by_date(self):
+        day = {"year": 2020, "month": 11, "day": 28}
+        self.__activity_repository.save_activity(Activity(5000, [1], day, 23, "late dinner"))
+        self.__activity_repository.save_activity(Activity(5001, [1], day, 0, "midnight walk"))
+        self.assertEqual([activity.id for activity in self.__activity_repository.find_activities_by_date(day)],
+                         [5001, 9874, 5000])
+        self.__activity_repository.update_activity(5000, Activity(5000, [1], day, 5, "early breakfast"))
+        self.__activity_repository.remove_activity(5001)
+        self.assertEqual([activity.id for activity in self.__activity_repository.find_activities_by_date(day)],
+                         [5000, 9874])
+        self.assertRaises(ActivityRepositoryError, self.__activity_repository.save_activity,
+                          Activity(5002, [1], day, 5, "coffee"))
+        self.__activity_repository.save_activity(Activity(5002, [1], day, 23, "coffee"))
+        self.assertEqual(self.__activity_repository.find_activities_by_date({"year": 2020, "month": 11, "day": 27}),
+                         [])
+
+    def test_iterate_days_by_number_of_activities(self):
+        self.__activity_repository.save_activity(Activity(5000, [1], {"year": 2020, "month": 8, "day": 29}, 9, "run"))
+        self.__activity_repository.save_activity(Activity(5001, [1], {"year": 2020, "month": 8, "day": 29}, 8, "read"))
+        self.assertEqual(list(self.__activity_repository.iterate_days_by_number_of_activities()),
+                         [(1, 20181113), (1, 20201128), (1, 20201129), (3, 20200829)])
+        self.__activity_repository.update_activity(5000, Activity(5000, [1], {"year": 2020, "month": 11, "day": 29}, 9,
+                                                                  "run"))
+        self.__activity_repository.remove_activity(9874)
+        days = self.__activity_repository.iterate_days_by_number_of_activities({"year": 2019, "month": 1, "day": 1})
+        self.assertEqual(list(days), [(2, 20200829), (2, 20201129)])
+
+    def test_bulk_load_activities(self):
+        activities = [
+            Activity(100, [1], {"year": 2021, "month": 5, "day": 5}, 10, "read"),
+            Activity(200, [2], {"year": 2021, "month": 5, "day": 5}, 11, "write")
+        ]
+        self.__activity_repository._bulk_load_activities(iter(activities))
+        self.assertEqual(self.__activity_repository.get_all_activities_list(), activities)
+        self.assertIsNone(self.__activity_repository.find_activity(1237))
+        duplicated_ids = activities + [Activity(100, [3], {"year": 2022, "month": 1, "day": 1}, 8, "dup")]
+        self.assertRaises(ActivityRepositoryError, self.__activity_repository._bulk_load_activities, duplicated_ids)
+        overlapping = activities + [Activity(300, [3], {"year": 2021, "month": 5, "day": 5}, 10, "overlap")]
+        self.assertRaises(ActivityRepositoryError, self.__activity_repository._bulk_load_activities, overlapping)
 
     def test_activity_repository_getters(self):
         self.assertEqual(self.__activity_repository.get_number_of_activities(), 4)
@@ -299,6 +415,19 @@ class PersonRepositoryTest(unittest.TestCase):
             Person(356, "Sorin", "832923")
         ]
 
+    def test_removal_keeps_the_order_of_the_list(self):
+        self.__person_repository.remove_person(534)
+        self.assertEqual([person.id for person in self.__person_repository.get_all_persons_list()],
+                         [456, 241, 423, 978, 356])
+        self.__person_repository.update_person(456, Person(456, "Ionut", "64765"))
+        self.__person_repository.save_person(Person(100, "Ana", "0740"))
+        self.__person_repository.remove_person(978)
+        self.assertEqual([person.id for person in self.__person_repository.get_all_persons_list()],
+                         [456, 241, 423, 356, 100])
+        self.assertEqual(self.__person_repository.get_all_persons_list()[0].name, "Ionut")
+        self.assertEqual(len(self.__person_repository), 5)
+        self.assertFalse(self.__person_repository.check_person_existence(978))
+
     def test_person_list_property(self):
         expected_list = [
             Person(456, "Ion", "64765"),
@@ -352,6 +481,51 @@ class PersonRepositoryTest(unittest.TestCase):
         self.assertRaises(PersonRepositoryError, self.__person_repository.update_person, 499, updated_person)
         self.assertRaises(PersonRepositoryError, self.__person_repository.update_person, 423, updated_person)
 
+    def test_index_follows_removals(self):
+        self.__person_repository.remove_person(534)
+        self.assertIsNone(self.__person_repository.find_person(534))
+        self.assertEqual(len(self.__person_repository), 5)
+        self.__person_repository.save_person(Person(534, "Radu", "65432"))
+        self.assertEqual(self.__person_repository.person_list[-1], Person(534, "Radu", "65432"))
+        self.assertRaises(PersonRepositoryError, self.__person_repository.save_person, Person(534, "Dan", "1"))
+
+    def test_find_persons_by_name(self):
+        for searched_name in ["", "i", "in", "ori", "sorin", "rad", "xyz", "Ion"]:
+            expected_persons = [person for person in self.__person_repository.person_list
+                                if searched_name in person.name.lower()]
+            self.assertEqual(self.__person_repository.find_persons_by_name(searched_name), expected_persons)
+        self.__person_repository.update_person(356, Person(356, "Sorina", "832923"))
+        self.__person_repository.remove_person(978)
+        self.assertEqual([person.id for person in self.__person_repository.find_persons_by_name("orin")], [356])
+        self.assertEqual(self.__person_repository.find_persons_by_name("andrei"), [])
+        self.__person_repository.save_person(Person(101, "Andreea", "1"))
+        self.assertEqual([person.id for person in self.__person_repository.find_persons_by_name("andre")], [101])
+
+    def test_find_persons_by_fuzzy_name(self):
+        for searched_name in ["Sroin", "ion", "TIBY", "andrew", "x", "cosmin radu"]:
+            for maximum_distance in range(4):
+                expected_ids = {person.id for person in self.__person_repository.person_list if
+                                compute_edit_distance(searched_name.lower(), person.name.lower()) <= maximum_distance}
+                found_persons = self.__person_repository.find_persons_by_fuzzy_name(searched_name, maximum_distance)
+                self.assertEqual({person.id for person in found_persons}, expected_ids)
+        self.assertEqual([person.id for person in self.__person_repository.find_persons_by_fuzzy_name("Sorn")],
+                         [356, 456])
+        self.__person_repository.update_person(356, Person(356, "Sorina Pop", "832923"))
+        self.__person_repository.remove_person(456)
+        self.assertEqual([person.id for person in self.__person_repository.find_persons_by_fuzzy_name("Sorna")], [356])
+        self.assertEqual([person.id for person in self.__person_repository.find_persons_by_fuzzy_name("ion", 1)], [])
+
+    def test_find_persons_by_phone_number(self):
+        for searched_phone_number in ["", "6", "65", "543", "6539434", "12"]:
+            expected_persons = [person for person in self.__person_repository.person_list
+                                if searched_phone_number in person.phone_number]
+            self.assertEqual(self.__person_repository.find_persons_by_phone_number(searched_phone_number),
+                             expected_persons)
+        self.__person_repository.update_person(456, Person(456, "Ion", "111"))
+        self.__person_repository.remove_person(534)
+        self.assertEqual(self.__person_repository.find_persons_by_phone_number("654"), [])
+        self.assertEqual([person.id for person in self.__person_repository.find_persons_by_phone_number("11")], [456])
+
     def test_person_repository_getters(self):
         self.assertEqual(self.__person_repository.get_number_of_persons(), 6)
         new_person = Person(667, "Rob", "898654")
@@ -482,6 +656,98 @@ class StatisticsServiceTest(unittest.TestCase):
         expected_dictionary = {(18, 12, 2020): 1}
         self.assertEqual(dates_dictionary, expected_dictionary)
 
+    def test_find_busiest_days_relative_to_today(self):
+        today = datetime.date.today()
+        days = [today - datetime.timedelta(days=1), today, today + datetime.timedelta(days=3)]
+        activity_id = 0
+        for day, number_of_activities in zip(days, [3, 2, 1]):
+            for hour in range(number_of_activities):
+                activity_id += 1
+                self.__activity_repository.save_activity(
+                    Activity(activity_id, [100], Utility.convert_date_to_calendar_date(day), hour, "class"))
+        busiest_days = self.__statistics_service.find_busiest_days()
+        self.assertEqual(list(busiest_days.items())[:2], [((days[2].day, days[2].month, days[2].year), 1),
+                                                          ((today.day, today.month, today.year), 2)])
+        self.assertFalse(self.__statistics_service.check_upcoming_activity(self.__activity_repository.find_activity(1),
+                                                                           today))
+
+    def test_find_free_time_of_upcoming_days(self):
+        self.assertEqual(StatisticsService.compute_free_intervals(1 << 10 | 1 << 14 | 1 << 23, (8, 20)),
+                         [(8, 10), (11, 14), (15, 20)])
+        self.assertEqual(StatisticsService.compute_free_intervals((1 << 24) - 1, (0, 24)), [])
+        today = datetime.date.today()
+        tomorrow = today + datetime.timedelta(days=1)
+        for activity_id, day, hour in [(1, today, 8), (2, today, 9), (3, tomorrow, 12), (4, tomorrow, 22),
+                                       (5, today - datetime.timedelta(days=1), 10)]:
+            self.__activity_repository.save_activity(
+                Activity(activity_id, [100], Utility.convert_date_to_calendar_date(day), hour, "class"))
+        statistics_service = StatisticsService(self.__activity_repository, (8, 20))
+        self.assertEqual(statistics_service.find_free_time_of_upcoming_days(), [
+            {"date": (tomorrow.day, tomorrow.month, tomorrow.year), "activities": 2, "free_hours": 11,
+             "free_intervals": [(8, 12), (13, 20)]},
+            {"date": (today.day, today.month, today.year), "activities": 2, "free_hours": 10,
+             "free_intervals": [(10, 20)]}
+        ])
+        self.assertEqual([day["free_hours"] for day in statistics_service.find_free_time_of_upcoming_days(1)], [11])
+        today_only = statistics_service.find_free_time_of_upcoming_days(
+            5, None, Utility.convert_date_to_calendar_date(today))
+        self.assertEqual([day["date"] for day in today_only], [(today.day, today.month, today.year)])
+        self.assertEqual(list(statistics_service.find_busiest_days(1).values()), [2])
+        self.assertEqual(len(statistics_service.find_busiest_days(start_date={"year": 2020, "month": 1, "day": 1})),
+                         6)
+        self.assertRaises(ActivityServiceError, statistics_service.find_busiest_days, -1)
+        self.assertRaises(ActivityServiceError, statistics_service.find_free_time_of_upcoming_days, -1)
+        self.__activity_repository.remove_activity(3)
+        self.assertEqual(statistics_service.find_free_time_of_upcoming_days()[0]["free_hours"], 12)
+
+    def test_count_activities(self):
+        self.assertEqual(self.__statistics_service.count_activities_by_hour(),
+                         [0] * 6 + [1] + [0] * 3 + [1] + [0] * 8 + [1] + [0] * 4)
+        self.assertEqual(self.__statistics_service.count_activities_by_participant(),
+                         {241: 1, 356: 2, 423: 1, 876: 1, 978: 1})
+        self.__activity_repository.remove_activity(1393)
+        self.assertEqual(self.__statistics_service.count_activities_by_month(), {(2020, 11): 1, (2020, 12): 1})
+
+    @unittest.skipUnless(is_numpy_available(), "NumPy is not installed")
+    def test_numpy_analytics_match_pure_python(self):
+        numpy_statistics_service = StatisticsService(self.__activity_repository, use_numpy_analytics=True)
+
+        def check_statistics():
+            for statistic_name in ["count_activities_by_hour", "count_activities_by_participant",
+                                   "count_activities_by_month"]:
+                expected_statistic = getattr(self.__statistics_service, statistic_name)()
+                self.assertEqual(getattr(numpy_statistics_service, statistic_name)(), expected_statistic)
+
+        check_statistics()
+        self.__activity_repository.save_activity(Activity(1, [356, 356, 100], {"year": 2019, "month": 2, "day": 31}, 0,
+                                                          "x"))
+        check_statistics()
+        self.__activity_repository.remove_activity(9933)
+        check_statistics()
+        self.__activity_repository.update_activity(1393, Activity(1393, [100, 241], {"year": 2021, "month": 1,
+                                                                                     "day": 5}, 23, "city-break"))
+        check_statistics()
+        self.__activity_repository.clear_repository()
+        check_statistics()
+
+    @unittest.skipUnless(is_numpy_available(), "NumPy is not installed")
+    def test_columnar_index_is_updated_incrementally(self):
+        columnar_index = self.__activity_repository.get_columnar_index()
+        self.assertEqual(len(columnar_index), 3)
+        for activity_id in range(1, 101):
+            self.__activity_repository.save_activity(Activity(activity_id, [activity_id, 356],
+                                                              {"year": 2021, "month": 3, "day": activity_id % 28 + 1},
+                                                              activity_id // 28, "x"))
+        for activity_id in range(1, 101, 2):
+            self.__activity_repository.remove_activity(activity_id)
+        self.__activity_repository.remove_activity(9933)
+        self.assertIs(self.__activity_repository.get_columnar_index(), columnar_index)
+        self.assertEqual(len(columnar_index), 52)
+        self.assertEqual(columnar_index.count_by_participant(),
+                         dict(sorted([(356, 52), (423, 1)] + [(activity_id, 1) for activity_id in range(2, 101, 2)])))
+        self.assertEqual(columnar_index.count_by_month(), {(2020, 11): 1, (2020, 12): 1, (2021, 3): 50})
+        self.assertEqual(sum(columnar_index.count_by_hour()), 52)
+
 
 class PersonServiceTest(unittest.TestCase):
     def setUp(self):
@@ -542,6 +808,8 @@ class PersonServiceTest(unittest.TestCase):
         another_searched_name = "John"
         searched_persons = self.__person_service.find_persons_by_name(another_searched_name)
         self.assertEqual(len(searched_persons), 0)
+        self.assertEqual(self.__person_service.find_persons_by_fuzzy_name(" ALXE  "), [Person(876, "Alex", "223543")])
+        self.assertRaises(PersonServiceError, self.__person_service.find_persons_by_fuzzy_name, "Alex", -1)
 
     def test_find_persons_by_phone_number(self):
         searched_phone_number = "54"
@@ -647,6 +915,50 @@ class ActivityServiceTest(unittest.TestCase):
         searched_activities = self.__activity_service.find_activities_by_date(year, month, day)
         self.assertEqual(len(searched_activities), 0)
 
+    def test_find_activities_between(self):
+        self.__activity_service.service_add_activity(3910, [654], {"year": 2018, "month": 5, "day": 1}, 8, "gym")
+        searched_activities = self.__activity_service.find_activities_between({"year": 2017, "month": 12, "day": 23},
+                                                                              {"year": 2018, "month": 5, "day": 1})
+        self.assertEqual([activity.id for activity in searched_activities], [9842, 3910, 1145])
+        self.__activity_service.service_update_activity(3910, [654], {"year": 2019, "month": 8, "day": 15}, 8, "gym")
+        searched_activities = self.__activity_service.find_activities_between({"year": 2018, "month": 1, "day": 1},
+                                                                              {"year": 2019, "month": 12, "day": 31})
+        self.assertEqual([activity.id for activity in searched_activities], [1145, 3910, 1237])
+        self.assertEqual(self.__activity_service.find_activities_between({"year": 2020, "month": 1, "day": 1},
+                                                                         {"year": 2019, "month": 1, "day": 1}), [])
+        self.assertRaises(DateValidatorError, self.__activity_service.find_activities_between,
+                          {"year": 2020, "month": 13, "day": 1}, {"year": 2021, "month": 1, "day": 1})
+        all_activities = list(self.__activity_service.iterate_activities_chronologically())
+        self.assertEqual([activity.id for activity in all_activities], [9842, 1145, 3910, 1237])
+
+    def test_iterate_activities_in_pages(self):
+        self.assertEqual([activity.id for activity in self.__activity_service.iterate_activities(1, 1)], [9842])
+        self.assertEqual([activity.id for activity in self.__activity_service.iterate_activities(2)], [1237])
+        self.assertEqual(list(self.__activity_service.iterate_activities(5, 10)), [])
+        chronological_page = self.__activity_service.iterate_activities_chronologically(offset=1, limit=5)
+        self.assertEqual([activity.id for activity in chronological_page], [1145, 1237])
+        description_page = self.__activity_service.iterate_activities_by_description("o", 0, 1)
+        self.assertEqual([activity.id for activity in description_page], [9842])
+        description_page = self.__activity_service.iterate_activities_by_description("o", 1, 5)
+        self.assertEqual([activity.id for activity in description_page], [1145, 1237])
+        self.assertEqual(list(Utility.paginate((1, 2, 3, 4), 1, 2)), [2, 3])
+        self.assertEqual(list(Utility.paginate(iter([1, 2, 3, 4]), 3)), [4])
+
+    def test_query(self):
+        self.__activity_service.service_add_activity(3910, [143], {"year": 2018, "month": 5, "day": 1}, 8, "Shopping")
+        self.__activity_service.service_add_activity(3911, [654], {"year": 2018, "month": 6, "day": 2}, 9, "shopping")
+        found_activities = self.__activity_service.query(participant_id=143, searched_description="SHOP")
+        self.assertEqual([activity.id for activity in found_activities], [9842, 3910])
+        found_activities = self.__activity_service.query({"year": 2018, "month": 1, "day": 1}, None, None, "shop", 9)
+        self.assertEqual([activity.id for activity in found_activities], [3911])
+        found_activities = self.__activity_service.query(start_hour=14, end_hour=20)
+        self.assertEqual([activity.id for activity in found_activities], [9842, 1237])
+        found_activities = self.__activity_service.query(participant_id=876, offset=1, limit=1)
+        self.assertEqual([activity.id for activity in found_activities], [1237])
+        self.assertEqual(list(self.__activity_service.query(participant_id=999)), [])
+        self.assertRaises(ActivityServiceError, self.__activity_service.query, start_hour=24)
+        self.assertRaises(DateValidatorError, self.__activity_service.query, {"year": 2018, "month": 0, "day": 1})
+
     def test_find_activities_by_description(self):
         searched_description = "  tRiP   "
         searched_activities = self.__activity_service.find_activities_by_description(
@@ -658,6 +970,53 @@ class ActivityServiceTest(unittest.TestCase):
         searched_activities = self.__activity_service.find_activities_by_description(searched_description)
         self.assertEqual(searched_activities, [])
 
+    def test_find_common_free_slots(self):
+        date_range = ({"year": 2018, "month": 4, "day": 30}, {"year": 2018, "month": 5, "day": 2})
+        self.__activity_service.service_add_activity(3910, [654], {"year": 2018, "month": 5, "day": 1}, 8, "gym")
+        self.__activity_service.service_add_activity(3911, [143], {"year": 2018, "month": 4, "day": 30}, 21, "read")
+        free_slots = self.__activity_service.find_common_free_slots([654, 143], date_range, 4, (20, 24))
+        self.assertEqual(free_slots, [({"year": 2018, "month": 4, "day": 30}, 20),
+                                      ({"year": 2018, "month": 4, "day": 30}, 22),
+                                      ({"year": 2018, "month": 4, "day": 30}, 23),
+                                      ({"year": 2018, "month": 5, "day": 1}, 20)])
+        free_slots = self.__activity_service.find_common_free_slots([654], date_range, 100, (7, 10))
+        self.assertEqual([(calendar_date["day"], hour) for calendar_date, hour in free_slots],
+                         [(30, 7), (30, 8), (30, 9), (1, 7), (1, 9), (2, 7), (2, 8), (2, 9)])
+        self.assertRaises(ActivityServiceError, self.__activity_service.find_common_free_slots, [999], date_range, 1)
+        self.assertRaises(ActivityServiceError, self.__activity_service.find_common_free_slots, [654],
+                          ({"year": 2018, "month": 2, "day": 31}, {"year": 2018, "month": 3, "day": 1}), 1)
+
+    def test_participant_conflict_mode(self):
+        self.assertRaises(ActivityRepositoryError, ActivityRepository, "nobody")
+        activity_repository = ActivityRepository(PARTICIPANT_CONFLICTS)
+        activity_repository.activities_list = [
+            Activity(1145, [654, 143], {"year": 2018, "month": 5, "day": 1}, 23, "go to Shanghai")]
+        activity_service = ActivityService(self.__activity_validator, activity_repository, self.__person_repository,
+                                           UndoStack(), RedoStack())
+        day = {"year": 2018, "month": 5, "day": 1}
+        self.assertRaises(ActivityRepositoryError, activity_service.service_add_activity, 3910, [876, 654], day, 23,
+                          "gym")
+        activity_service.service_add_activity(3910, [876], day, 23, "gym")
+        self.assertEqual([activity.id for activity in activity_repository.find_activities_by_date(day)], [1145, 3910])
+        self.assertRaises(ActivityRepositoryError, activity_service.service_update_activity, 3910, [876, 143], day, 23,
+                          "gym")
+        activity_service.service_update_activity(1145, [654], day, 23, "go to Shanghai")
+        activity_service.service_update_activity(3910, [876, 143], day, 23, "gym")
+        self.assertEqual(activity_repository.get_participant_schedule(143, day, day), {20180501: 1 << 23})
+        self.assertEqual(activity_service.find_common_free_slots([143], (day, day), 2, (22, 24)), [(day, 22)])
+        activity_service.service_remove_activity(3910)
+        self.assertEqual(activity_repository.get_participant_schedule(143, day, day), {})
+        self.assertEqual(activity_service.find_common_free_slots([143], (day, day), 2, (22, 24)),
+                         [(day, 22), (day, 23)])
+        self.assertEqual(self.__activity_service.find_common_free_slots([143], (day, day), 2, (22, 24)), [(day, 22)])
+
+        # the setter does not check the conflicts, so a person can be booked twice
+        activity_repository.activities_list = [Activity(1, [654], day, 9, "read"), Activity(2, [654], day, 9, "eat")]
+        activity_repository.remove_activity(1)
+        self.assertEqual(activity_repository.get_participant_schedule(654, day, day), {20180501: 1 << 9})
+        activity_repository.remove_activity(2)
+        self.assertEqual(activity_repository.get_participant_schedule(654, day, day), {})
+
     def test_find_activities_by_participant(self):
         participant_id = 143
         searched_activities = self.__activity_service.find_activities_by_participant(143)
@@ -673,6 +1032,20 @@ class ActivityServiceTest(unittest.TestCase):
         participant_id = 999
         self.assertRaises(ActivityServiceError, self.__activity_service.find_activities_by_participant, participant_id)
 
+    def test_cached_search_is_invalidated_by_changes(self):
+        self.assertEqual([activity.id for activity in self.__activity_service.find_activities_by_description("trip")],
+                         [1237])
+        generation = self.__activity_repository.get_generation()
+        self.__activity_service.service_add_activity(3910, [654], {"year": 2020, "month": 1, "day": 2}, 10, "trip")
+        self.assertGreater(self.__activity_repository.get_generation(), generation)
+        self.assertEqual([activity.id for activity in self.__activity_service.find_activities_by_description("trip")],
+                         [1237, 3910])
+        self.__activity_repository.remove_activity(3910)
+        self.assertEqual([activity.id for activity in self.__activity_service.find_activities_by_description("trip")],
+                         [1237])
+        self.__activity_service.find_activities_by_description("trip").clear()
+        self.assertEqual(len(self.__activity_service.find_activities_by_description("trip")), 1)
+
 
 class UndoStackTest(unittest.TestCase):
     def setUp(self):
@@ -732,3 +1105,296 @@ class RedoStackTest(unittest.TestCase):
         self.__redo_stack.clear_stack()
         self.assertEqual(len(self.__redo_stack), 0)
         self.assertTrue(not self.__redo_stack.operations)
+
+
+class TextFileJournalTest(unittest.TestCase):
+    def setUp(self):
+        self.__directory = tempfile.mkdtemp()
+        self.__filename = os.path.join(self.__directory, "activities.txt")
+        with open(self.__filename, mode="w") as activities_file:
+            activities_file.write("7546;100 150;18 10 2020;11;shopping\n3478;200;25 12 2020;9;gym\n")
+
+    def tearDown(self):
+        shutil.rmtree(self.__directory)
+
+    def test_changes_are_appended_to_the_journal(self):
+        activity_repository = TextFileActivityRepository(self.__filename, journal_mode=True)
+        activity_repository.save_activity(Activity(1000, [100], {"year": 2021, "month": 1, "day": 1}, 5, "run"))
+        activity_repository.update_activity(1000, Activity(1000, [200], {"year": 2021, "month": 1, "day": 2}, 5,
+                                                            "walk"))
+        activity_repository.remove_activity(7546)
+        with open(self.__filename, mode="r") as activities_file:
+            self.assertEqual(len(activities_file.readlines()), 2)
+
+        reloaded_repository = TextFileActivityRepository(self.__filename, journal_mode=True)
+        self.assertEqual(len(reloaded_repository), 2)
+        self.assertIsNone(reloaded_repository.find_activity(7546))
+        self.assertEqual(reloaded_repository.find_activity(1000).description, "walk")
+
+    def test_journal_is_compacted(self):
+        activity_repository = TextFileActivityRepository(self.__filename, journal_mode=True, compaction_threshold=64)
+        for activity_id in range(5):
+            activity_repository.save_activity(
+                Activity(activity_id, [100], {"year": 2022, "month": 3, "day": 1}, activity_id, "study"))
+        self.assertLessEqual(os.path.getsize(self.__filename + ".journal"), 64)
+        self.assertEqual(len(TextFileActivityRepository(self.__filename, journal_mode=True)), 7)
+
+    def test_repeated_cached_search_does_not_touch_the_repository(self):
+        activity_repository = TextFileActivityRepository(self.__filename)
+        activity_service = ActivityService(Validator(), activity_repository, PersonRepository(), UndoStack(),
+                                           RedoStack())
+        generation = activity_repository.get_generation()
+        searches = []
+        search_activities = activity_repository.find_activities_by_description
+
+        def count_searches(searched_description):
+            searches.append(searched_description)
+            return search_activities(searched_description)
+
+        activity_repository.find_activities_by_description = count_searches
+        for _ in range(5):
+            self.assertEqual([activity.id for activity in activity_service.find_activities_by_description("shop")],
+                             [7546])
+        self.assertEqual(searches, ["shop"])
+        self.assertEqual(activity_repository.get_generation(), generation)
+
+        with open(self.__filename, mode="a") as activities_file:
+            activities_file.write("1200;100;1 1 2021;8;shopping\n")
+        self.assertEqual([activity.id for activity in activity_service.find_activities_by_description("shop")],
+                         [7546, 1200])
+        self.assertEqual(searches, ["shop", "shop"])
+
+
+class JsonFileCacheTest(unittest.TestCase):
+    def setUp(self):
+        self.__directory = tempfile.mkdtemp()
+        self.__filename = os.path.join(self.__directory, "persons.json")
+        self.__write_persons([{"id": 100, "name": "Bob", "phone_number": "123"}])
+
+    def tearDown(self):
+        shutil.rmtree(self.__directory)
+
+    def __write_persons(self, persons):
+        with open(self.__filename, mode="w") as persons_json_file:
+            json.dump({"persons": persons}, persons_json_file)
+
+    def test_unchanged_file_is_not_parsed_again(self):
+        person_repository = JsonFilePersonRepository(self.__filename)
+        person = person_repository.find_person(100)
+        self.assertIs(person_repository.find_person(100), person)
+        person_repository.save_person(Person(200, "Tom", "456"))
+        self.assertIs(person_repository.find_person(100), person)
+
+    def test_changed_file_is_loaded_again(self):
+        person_repository = JsonFilePersonRepository(self.__filename)
+        self.assertEqual(len(person_repository), 1)
+        self.__write_persons([{"id": 100, "name": "Bob", "phone_number": "123"},
+                              {"id": 300, "name": "Ana", "phone_number": "789"}])
+        self.assertEqual(len(person_repository), 2)
+        self.assertTrue(person_repository.check_person_existence(300))
+
+    def test_changes_are_written_once_per_batch(self):
+        person_repository = JsonFilePersonRepository(self.__filename, batch_size=3)
+        person_repository.save_person(Person(200, "Tom", "456"))
+        person_repository.update_person(100, Person(100, "Rob", "123"))
+        with open(self.__filename) as persons_json_file:
+            self.assertEqual(len(json.load(persons_json_file)["persons"]), 1)
+        self.assertEqual(len(person_repository), 2)
+
+        person_repository.save_person(Person(300, "Ana", "789"))
+        with open(self.__filename) as persons_json_file:
+            self.assertEqual(len(json.load(persons_json_file)["persons"]), 3)
+
+        person_repository.remove_person(200)
+        person_repository.flush()
+        reloaded_repository = JsonFilePersonRepository(self.__filename)
+        self.assertEqual([person.id for person in reloaded_repository.person_list], [100, 300])
+        self.assertEqual(reloaded_repository.find_person(100).name, "Rob")
+        self.assertFalse(os.path.exists(self.__filename + ".tmp"))
+
+    def test_pending_changes_are_written_after_the_time_window(self):
+        person_repository = JsonFilePersonRepository(self.__filename, batch_size=100, time_window=0.05)
+        person_repository.save_person(Person(200, "Tom", "456"))
+        # no other change and no other operation follows: the timer of the time window writes the change
+        deadline = time.monotonic() + 5
+        while JsonFilePersonRepository(self.__filename).get_number_of_persons() == 1 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        self.assertEqual(JsonFilePersonRepository(self.__filename).get_number_of_persons(), 2)
+
+
+class SqliteRepositoryTest(unittest.TestCase):
+    def setUp(self):
+        self.__directory = tempfile.mkdtemp()
+        self.__filename = os.path.join(self.__directory, "planner.db")
+
+    def tearDown(self):
+        shutil.rmtree(self.__directory)
+
+    def test_changes_are_persisted(self):
+        activity_repository = SqliteActivityRepository(self.__filename)
+        activity_repository.save_activity(Activity(10, [1, 2], {"year": 2021, "month": 3, "day": 4}, 9, "chess"))
+        activity_repository.save_activity(Activity(20, [3], {"year": 2021, "month": 3, "day": 4}, 10, "tennis"))
+        activity_repository.update_activity(10, Activity(10, [2], {"year": 2021, "month": 3, "day": 5}, 9, "go"))
+        activity_repository.remove_activity(20)
+        self.assertRaises(ActivityRepositoryError, activity_repository.save_activity,
+                          Activity(30, [1], {"year": 2021, "month": 3, "day": 5}, 9, "overlap"))
+        activity_repository.close()
+
+        reloaded_repository = SqliteActivityRepository(self.__filename)
+        self.assertEqual(len(reloaded_repository), 1)
+        activity = reloaded_repository.find_activity(10)
+        self.assertEqual(activity.participants_ids, [2])
+        self.assertEqual(activity.date, {"year": 2021, "month": 3, "day": 5})
+        self.assertEqual(activity.description, "go")
+        reloaded_repository.close()
+
+
+class RecordFileRepositoryTest(unittest.TestCase):
+    def setUp(self):
+        self.__directory = tempfile.mkdtemp()
+        self.__filename = os.path.join(self.__directory, "planner.dat")
+
+    def tearDown(self):
+        shutil.rmtree(self.__directory)
+
+    def test_activity_changes_are_persisted(self):
+        activity_repository = RecordFileActivityRepository(self.__filename)
+        for activity_id in range(1, 40):
+            activity_repository.save_activity(
+                Activity(activity_id, [activity_id], {"year": 2021, "month": 3, "day": activity_id // 24 + 1},
+                         activity_id % 24, "chess"))
+        activity_repository.update_activity(10, Activity(10, [2, 3], {"year": 2021, "month": 12, "day": 31}, 9,
+                                                         "go to Brașov"))
+        activity_repository.remove_activity(20)
+        activity_repository.close()
+
+        reloaded_repository = RecordFileActivityRepository(self.__filename)
+        self.assertEqual(len(reloaded_repository), 38)
+        self.assertFalse(reloaded_repository.check_activity_existence(20))
+        activity = reloaded_repository.find_activity(10)
+        self.assertEqual(activity.participants_ids, [2, 3])
+        self.assertEqual(activity.date, {"year": 2021, "month": 12, "day": 31})
+        self.assertEqual(activity.description, "go to Brașov")
+        self.assertEqual(reloaded_repository.activities_list[-1].id, 39)
+        reloaded_repository.close()
+
+    def test_stale_records_are_compacted(self):
+        activity_repository = RecordFileActivityRepository(self.__filename, minimum_stale_records=4)
+        day = {"year": 2021, "month": 3, "day": 4}
+        for activity_id in range(1, 4):
+            activity_repository.save_activity(Activity(activity_id, [activity_id], day, activity_id, "chess"))
+        for update_number in range(500):
+            activity_repository.update_activity(1, Activity(1, [1, 2], day, 1, f"chess {update_number} " * 50))
+            activity_repository.save_activity(Activity(4, [4], day, 4, "tennis"))
+            activity_repository.remove_activity(4)
+        activity_repository.close()
+        self.assertLess(os.path.getsize(self.__filename), HEADER_STRUCT.size + 16 * ACTIVITY_RECORD_STRUCT.size)
+        self.assertLess(os.path.getsize(self.__filename + HEAP_EXTENSION), 2 * MINIMUM_STALE_HEAP_BYTES)
+
+        reloaded_repository = RecordFileActivityRepository(self.__filename, minimum_stale_records=4)
+        self.assertEqual([activity.id for activity in reloaded_repository.activities_list], [1, 2, 3])
+        self.assertEqual(reloaded_repository.find_activity(1).description, "chess 499 " * 50)
+        reloaded_repository.close()
+
+    def test_interrupted_compaction_keeps_the_data(self):
+        day = {"year": 2021, "month": 3, "day": 4}
+        replace_file = os.replace
+
+        def crash_before_last_replace(source, destination):
+            # the new heap file is already in place, but the new record file is not
+            if destination == self.__filename:
+                raise OSError("crash")
+            replace_file(source, destination)
+
+        def crash(*arguments):
+            raise OSError("crash")
+
+        for simulated_crash in [mock.patch("os.fsync", crash), mock.patch("os.replace", crash_before_last_replace)]:
+            activity_repository = RecordFileActivityRepository(self.__filename, minimum_stale_records=2)
+            activity_repository.activities_list = [Activity(activity_id, [activity_id], day, activity_id, "chess")
+                                                   for activity_id in range(1, 5)]
+            activity_repository.remove_activity(1)
+            with simulated_crash:
+                self.assertRaises(OSError, activity_repository.remove_activity, 2)
+            activity_repository.close()
+
+            reloaded_repository = RecordFileActivityRepository(self.__filename, minimum_stale_records=2)
+            self.assertEqual([activity.id for activity in reloaded_repository.activities_list], [3, 4])
+            reloaded_repository.close()
+            self.assertEqual(sorted(os.listdir(self.__directory)), ["planner.dat", "planner.dat" + HEAP_EXTENSION])
+
+    def test_person_changes_are_persisted(self):
+        person_repository = RecordFilePersonRepository(self.__filename)
+        person_repository.person_list = [Person(1, "Ana", "0740"), Person(2, "Ion", "0741")]
+        person_repository.update_person(1, Person(1, "Maria", "0742"))
+        person_repository.remove_person(2)
+        person_repository.save_person(Person(3, "Radu", "0743"))
+        person_repository.close()
+
+        reloaded_repository = RecordFilePersonRepository(self.__filename)
+        self.assertEqual([person.id for person in reloaded_repository.person_list], [1, 3])
+        self.assertEqual(reloaded_repository.find_person(1).name, "Maria")
+        self.assertEqual(reloaded_repository.find_person(1).phone_number, "0742")
+        reloaded_repository.close()
+        self.assertRaises(ActivityRepositoryError, RecordFileActivityRepository, self.__filename)
+
+
+class JsonLinesRepositoryTest(unittest.TestCase):
+    def setUp(self):
+        self.__directory = tempfile.mkdtemp()
+        self.__filename = os.path.join(self.__directory, "activities.jsonl")
+
+    def tearDown(self):
+        shutil.rmtree(self.__directory)
+
+    def test_changes_are_appended_and_compacted(self):
+        activity_repository = JsonLinesActivityRepository(self.__filename, minimum_stale_records=2)
+        activity_repository.save_activity(Activity(10, [1, 2], {"year": 2021, "month": 3, "day": 4}, 9, "chess"))
+        activity_repository.save_activity(Activity(20, [3], {"year": 2021, "month": 3, "day": 4}, 10, "tennis"))
+        activity_repository.update_activity(10, Activity(10, [2], {"year": 2021, "month": 3, "day": 5}, 9, "go"))
+        with open(self.__filename) as activities_file:
+            self.assertEqual(len(activities_file.readlines()), 3)
+
+        reloaded_repository = JsonLinesActivityRepository(self.__filename, minimum_stale_records=2)
+        self.assertEqual([activity.id for activity in reloaded_repository.activities_list], [10, 20])
+        self.assertEqual(reloaded_repository.find_activity(10).description, "go")
+
+        reloaded_repository.remove_activity(20)
+        with open(self.__filename) as activities_file:
+            self.assertEqual(len(activities_file.readlines()), 1)
+        self.assertEqual(len(JsonLinesActivityRepository(self.__filename)), 1)
+
+
+class SettingsTest(unittest.TestCase):
+    def setUp(self):
+        self.__directory = tempfile.mkdtemp()
+        self.__filename = os.path.join(self.__directory, "settings.properties")
+
+    def tearDown(self):
+        shutil.rmtree(self.__directory)
+
+    def __read_settings(self, settings_lines):
+        with open(self.__filename, mode="w") as settings_file:
+            settings_file.write("repository = textfile\n" + "".join(line + "\n" for line in settings_lines))
+        return Settings(self.__filename)
+
+    def test_optional_settings(self):
+        settings = self.__read_settings(["journal = on", "journal_threshold = 4096", "batch_size = 100",
+                                         "batch_window = 2.5"])
+        self.assertTrue(settings.journal_mode)
+        self.assertEqual(settings.journal_compaction_threshold, 4096)
+        self.assertEqual(settings.group_commit_batch_size, 100)
+        self.assertEqual(settings.group_commit_time_window, 2.5)
+        settings = self.__read_settings([])
+        self.assertFalse(settings.journal_mode)
+        self.assertIsNone(settings.group_commit_time_window)
+
+    def test_malformed_settings_are_rejected(self):
+        settings = self.__read_settings(["journal = yes", "journal_threshold = 1MB", "batch_size = 0",
+                                         "batch_window = -2.5"])
+        for setting_name in ["journal_mode", "journal_compaction_threshold", "group_commit_batch_size",
+                             "group_commit_time_window"]:
+            self.assertRaises(ApplicationStartError, getattr, settings, setting_name)
+        settings = self.__read_settings(["batch_size = 2.5", "batch_window = nan"])
+        self.assertRaises(ApplicationStartError, getattr, settings, "group_commit_batch_size")
+        self.assertRaises(ApplicationStartError, getattr, settings, "group_commit_time_window")
@@ -0,0 +1,47 @@
+from collections import OrderedDict
+
+DEFAULT_CACHE_SIZE = 128
+
+
+class LRUCache:
+    """
+    Class used to instantiate bounded caches, which keep at most a given number of values and evict the least recently
+        used value when a new value does not fit anymore.
+    The services use such caches for the results of their searches and statistics, keyed by the query and by the
+        generations of the repositories it reads, so a result is never reused after the repositories have changed
+        (the results computed for older generations are simply not used anymore and are eventually evicted).
+    """
+
+    def __init__(self, maximum_size=DEFAULT_CACHE_SIZE):
+        """
+        The constructor of an empty cache.
+        :param maximum_size: the maximum number of values kept in the cache (0 disables the cache)
+        """
+        self.__maximum_size = maximum_size
+        self.__values = OrderedDict()
+
+    def get_or_compute(self, key, compute_value):
+        """
+        Gets the value cached for a key, computing and caching it if it is not in the cache.
+        :param key: the key of the value (must be hashable)
+        :param compute_value: the function (without parameters) that computes the value
+        :return: the value
+        """
+        if key in self.__values:
+            self.__values.move_to_end(key)
+            return self.__values[key]
+
+        value = compute_value()
+        if self.__maximum_size > 0:
+            self.__values[key] = value
+            if len(self.__values) > self.__maximum_size:
+                self.__values.popitem(last=False)
+        return value
+
+    def clear(self):
+        """ Removes all the values from the cache """
+        self.__values.clear()
+
+    def __len__(self):
+        """ The number of values in the cache """
+        return len(self.__values)
@@ -1,3 +1,8 @@
+import itertools
+import os
+from collections.abc import Sequence
+
+
 class Utility:
     @staticmethod
     def convert_ids_string_to_separate_integers(string_of_ids):
@@ -28,3 +33,82 @@ class Utility:
             expected_string += str(integer) + " "
         expected_string = expected_string[:-1]
         return expected_string
+
+    @staticmethod
+    def get_file_signature(filename):
+        """
+        Creates a signature of a file, which changes whenever the file is rewritten or replaced.
+        e.g. returns the tuple (1606338000000000000, 1009, 2883641) -> (modification time in ns, size, inode)
+        :param filename: the name of the file
+        :return: the signature of the file, or None if the file does not exist
+        """
+        try:
+            file_status = os.stat(filename)
+        except FileNotFoundError:
+            return None
+        return file_status.st_mtime_ns, file_status.st_size, file_status.st_ino
+
+    @staticmethod
+    def write_file_atomically(filename, contents):
+        """
+        Replaces the contents of a file, so that the file is never left half-written: the contents are written into
+            a temporary file, which is flushed to the disk and then renamed over the file (the rename is atomic).
+        e.g. write_file_atomically("persons.txt", "100;Joshua Bates;287967392\n")
+        :param filename: the name of the file
+        :param contents: the new contents of the file, either a string or bytes
+        """
+        temporary_filename = filename + ".tmp"
+        access_mode = "wb" if isinstance(contents, bytes) else "w"
+        with open(temporary_filename, mode=access_mode) as temporary_file:
+            temporary_file.write(contents)
+            temporary_file.flush()
+            os.fsync(temporary_file.fileno())
+        os.replace(temporary_filename, filename)
+
+    @staticmethod
+    def convert_date_to_calendar_date(python_date):
+        """ e.g. receives datetime.date(2020, 11, 30) and returns the dictionary {"year": 2020, "month": 11, "day": 30}
+        """
+        return {
+            "year": python_date.year,
+            "month": python_date.month,
+            "day": python_date.day
+        }
+
+    @staticmethod
+    def convert_calendar_date_to_key(calendar_date):
+        """
+        Converts a calendar date into an integer having the same order as the dates, used as a key in the indexes.
+        Unlike datetime.date, it also accepts the dates allowed by the validator that do not exist (e.g. 31.02).
+        e.g. receives the dictionary {"year": 2019, "month": 11, "day": 30} and returns the integer 20191130
+        :param calendar_date: the calendar date, as a dictionary
+        :return: the integer yyyymmdd
+        """
+        return calendar_date["year"] * 10000 + calendar_date["month"] * 100 + calendar_date["day"]
+
+    @staticmethod
+    def convert_key_to_calendar_date(date_key):
+        """ e.g. receives the integer 20191130 and returns the dictionary {"year": 2019, "month": 11, "day": 30} """
+        return {
+            "year": date_key // 10000,
+            "month": date_key // 100 % 100,
+            "day": date_key % 100
+        }
+
+    @staticmethod
+    def paginate(results, offset=0, limit=None):
+        """
+        Lazily selects a page of results: the results before the page are skipped and the ones after it are never
+            produced, so a generator of results is consumed only until the end of the page.
+        A list (or tuple) of results is sliced directly, so only the results of the page are copied, whatever the
+            offset and the number of results.
+        e.g. paginate(generator of 100 activities, 20, 10) -> generator of the 21st, ..., 30th activities
+        :param results: an iterable of results (e.g. a list or a generator)
+        :param offset: the number of results to skip
+        :param limit: the maximum number of results of the page, or None for all the results after the offset
+        :return: an iterator of the results of the page
+        """
+        stop = None if limit is None else offset + limit
+        if isinstance(results, Sequence):
+            return iter(results[offset:stop])
+        return itertools.islice(results, offset, stop)
@@ -5,9 +5,26 @@ from EXCEPTIONS.custom_exceptions import ApplicationStartError
 if __name__ == '__main__':
     """
     settings.properties should contain:
-    repository = inmemory /   textfile         / binaryfile             / json
-    persons    =   ""     /   persons.txt      / persons.pickle         / persons.json
-    activities =   ""     /   activities.txt   / activities.pickle      / activities.json
+    repository = inmemory / textfile       / binaryfile        / json            / jsonlines        / sqlite
+    persons    =   ""     / persons.txt    / persons.pickle    / persons.json    / persons.jsonl    / planner.db
+    activities =   ""     / activities.txt / activities.pickle / activities.json / activities.jsonl / planner.db
+    or:
+    repository = recordfile
+    persons    = persons.dat
+    activities = activities.dat
+    optionally, for the text file repositories:
+    journal           = on / off
+    journal_threshold = the size (in bytes) of the journal before it is compacted
+    optionally, for the text (default mode), binary and json file repositories:
+    batch_size   = the number of changes after which the file is rewritten (1 by default)
+    batch_window = the number of seconds after which the pending changes are written
+    optionally, for the free time of the busiest days:
+    working_hours = first hour-last hour (8-20 by default)
+    optionally, for the statistics over all the activities (NumPy must be installed, otherwise it is ignored):
+    analytics = numpy / python
+    optionally, for the activities that cannot take place at the same time (all of them by default, or only the ones
+    having a common participant):
+    conflicts = planner / participant
     """
     application_setter = Settings("settings.properties")
     application_coordinator = ApplicationCoordinator(application_setter)